@@ -0,0 +1,89 @@
+"""Benchmarks for the RP calendars: day count <-> date lookups in a custom calendar near and far from
+year 1 (which should cost the same), month arithmetic, formatting, and the vectorized month addition
+used by `RpClockStore`, against the Gregorian calendar.
+
+Run with `python -m benchmarks.bench_calendars`.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.harness import format_result, measure
+from cidderbot.calendars.custom import CustomCalendar
+from cidderbot.calendars.gregorian import GREGORIAN
+from cidderbot.scheduling.clock_store import datetime_to_us
+from cidderbot.utils.time_formatters import TimeUnit
+
+# 13 months of 28 days and a leap day every 4 years
+CALENDAR = CustomCalendar(
+    "thirteen moons", [(f"Moon {chr(65 + i)}", 28) for i in range(13)], leap_every=4, leap_month=0
+)
+NEAR = CALENDAR.date(2, 3, 4, 5, 6)
+FAR = CALENDAR.date(9000, 12, 27, 5, 6)
+GREGORIAN_DATE = GREGORIAN.from_isoformat("1970-03-14T15:09:26")
+
+BATCH_SIZE = 1000
+
+
+def run(quick: bool = False) -> List[Dict[str, float]]:
+    repeat = 3 if quick else 5
+    results = []
+
+    for name, dt in (("near", NEAR), ("far", FAR)):
+        days = (dt - CALENDAR.date(1, 1, 1)).days
+        results.append(
+            measure(
+                f"CustomCalendar.date_from_days[{name}]",
+                lambda days=days: CALENDAR.date_from_days(days),
+                repeat=repeat,
+            )
+        )
+        results.append(
+            measure(
+                f"CustomCalendar.add[MONTH, {name}]",
+                lambda dt=dt: CALENDAR.add(dt, TimeUnit.MONTH, 7),
+                repeat=repeat,
+            )
+        )
+
+    results.append(
+        measure("GregorianCalendar.add[MONTH]", lambda: GREGORIAN.add(GREGORIAN_DATE, TimeUnit.MONTH, 7), repeat=repeat)
+    )
+    results.append(
+        measure("CustomCalendar.format[MINUTE]", lambda: CALENDAR.format(FAR, TimeUnit.MINUTE), repeat=repeat)
+    )
+    results.append(
+        measure(
+            "GregorianCalendar.format[MINUTE]",
+            lambda: GREGORIAN.format(GREGORIAN_DATE, TimeUnit.MINUTE),
+            repeat=repeat,
+        )
+    )
+    results.append(measure("CustomCalendar.parse", lambda: CALENDAR.parse("27 Moon L 9000, 05:06"), repeat=repeat))
+
+    # e.g. the current month of every RP on an overview
+    custom_us = np.full(BATCH_SIZE, datetime_to_us(NEAR), dtype=np.int64)
+    gregorian_us = np.full(BATCH_SIZE, datetime_to_us(GREGORIAN_DATE), dtype=np.int64)
+    months = np.arange(BATCH_SIZE, dtype=np.int64)
+    results.append(
+        measure(
+            "CustomCalendar.add_months_us x1000",
+            lambda: CALENDAR.add_months_us(custom_us, months),
+            repeat=repeat,
+        )
+    )
+    results.append(
+        measure(
+            "GregorianCalendar.add_months_us x1000",
+            lambda: GREGORIAN.add_months_us(gregorian_us, months),
+            repeat=repeat,
+        )
+    )
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(format_result(result))
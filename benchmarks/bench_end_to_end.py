@@ -0,0 +1,60 @@
+"""End-to-end load test on the offline fake Discord harness: synthetic `rp!` messages through
+`on_message` and the `Rp` cog, then a day of RP increments on a virtual clock.
+
+Run with `python -m benchmarks.bench_end_to_end`.
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Dict, List
+
+from cidderbot.testing.fake_discord import FakeDiscordHarness
+from cidderbot.utils.memory import deep_sizeof
+
+
+async def _run(rp_count: int, message_count: int, duration: timedelta) -> List[Dict[str, float]]:
+    async with FakeDiscordHarness(rp_count=rp_count, guild_count=max(rp_count // 5, 1)) as harness:
+        commands = await harness.run_commands(harness.make_commands(message_count))
+        increments = await harness.advance(duration)
+        # the registry vs. the (fake) discord objects it was built from
+        memory = {
+            "registry_bytes": harness.cidder.entities.get_memory_bytes(),
+            "source_guild_bytes": deep_sizeof(harness.guilds),
+        }
+
+    return [
+        {
+            "name": f"end to end commands[{rp_count} RPs]",
+            "number": commands["messages"],
+            "best_us": 1e6 / commands["messages_per_s"],
+            "median_us": commands["p50_ms"] * 1000,
+            "ops_per_s": commands["messages_per_s"],
+            **commands,
+            **memory,
+        },
+        {
+            "name": f"end to end increments[{rp_count} RPs, {duration}]",
+            "number": increments["increments"],
+            "best_us": 1e6 / increments["increments_per_s"] if increments["increments"] else 0.0,
+            "median_us": 1e6 / increments["increments_per_s"] if increments["increments"] else 0.0,
+            "ops_per_s": increments["increments_per_s"],
+            **increments,
+        },
+    ]
+
+
+def run(quick: bool = False) -> List[Dict[str, float]]:
+    # per-command INFO logs would otherwise be part of the measurement
+    logging.getLogger().setLevel(logging.WARNING)
+    if quick:
+        return asyncio.run(_run(200, 2_000, timedelta(hours=6)))
+    return asyncio.run(_run(2_000, 20_000, timedelta(days=1)))
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(
+            f"{result['name']}: {result['ops_per_s']:,.0f}/s"
+            + (f", p99 {result['p99_ms']:.3f}ms" if "p99_ms" in result else "")
+        )
@@ -0,0 +1,52 @@
+"""Benchmark for `Cidder.get_rps_for_guild` and `get_rp_for_guild` with 10k synthetic RPs.
+
+Run with `python -m benchmarks.bench_guild_lookup`.
+"""
+
+import random
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.harness import format_result, measure
+from cidderbot.cidder import Cidder
+from cidderbot.testing.factories import StubGuild, make_rp
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_cidder(rp_count: int, guild_count: int, seed: int = 0) -> Cidder:
+    rng = random.Random(seed)
+    guilds = [StubGuild(i) for i in range(guild_count)]
+
+    cidder = Cidder()
+    cidder._initialized = True  # pylint: disable=protected-access
+    for i in range(rp_count):
+        cidder.register_rp(make_rp(f"rp{i}", rng.sample(guilds, rng.randint(1, 3)), clock=lambda: START))
+    return cidder
+
+
+def run(quick: bool = False) -> List[Dict[str, float]]:
+    rp_count = 2_000 if quick else 10_000
+    guild_count = rp_count // 2
+    cidder = make_cidder(rp_count, guild_count)
+
+    rng = random.Random(1)
+    lookups = [StubGuild(rng.randrange(guild_count)) for _ in range(1024)]
+    names = [rp.name for rp in cidder.get_rps_for_guild(lookups[0])]
+    index = iter(range(1 << 62))
+
+    def get_rps():
+        cidder.get_rps_for_guild(lookups[next(index) & 1023])
+
+    def get_rp_by_name():
+        cidder.get_rp_for_guild(lookups[0], names[0])
+
+    return [
+        measure(f"Cidder.get_rps_for_guild[{rp_count} RPs]", get_rps),
+        measure(f"Cidder.get_rp_for_guild[{rp_count} RPs, by name]", get_rp_by_name),
+    ]
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(format_result(result))
@@ -0,0 +1,133 @@
+"""Microbenchmark for log record rendering: records/sec through the plaintext, colored and
+console formatters used by `LogConfig`, before and after the shared rendering stage.
+
+Run with `python -m benchmarks.bench_log_rendering`, or as part of `python -m benchmarks.run`.
+"""
+
+import logging
+import sys
+import time
+from typing import Callable, Dict, List
+
+from cidderbot.utils.logging_utils.log_config import (
+    ColoredFormatter,
+    RenderedFormatter,
+    format_message_from_level,
+)
+
+FORMAT = "[%(asctime)s %(levelname)s] %(message)s"
+LEVELS = (logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR)
+
+
+class LegacyColoredFormatter(logging.Formatter):
+    """ColoredFormatter as it was before the rendering stage, for comparison."""
+
+    DEFAULT_FORMAT = "[%(asctime)s %(levelname)s]: %(message)s"
+
+    def __init__(self, *args, **kwargs):
+        if "fmt" in kwargs:
+            self.used_format = kwargs["fmt"]
+        else:
+            self.used_format = self.DEFAULT_FORMAT
+
+        self.kwargs = kwargs
+        self.args = args
+
+        super().__init__(*args, **kwargs)
+
+    def format(self, record):
+        color_appended_format = format_message_from_level(
+            self.used_format, record.levelno
+        )
+        self.kwargs["fmt"] = color_appended_format
+        colored_formatter = logging.Formatter(*self.args, **self.kwargs)
+
+        return colored_formatter.format(record)
+
+
+def make_records(count: int) -> List[logging.LogRecord]:
+    return [
+        logging.LogRecord(
+            name="root",
+            level=LEVELS[i % len(LEVELS)],
+            pathname=__file__,
+            lineno=i,
+            msg="%s has been updated from %s to %s. Next update is in %s.",
+            args=("<RP: Sagrea>", "March 1970", "01 April 1970", "23 hours and 59 minutes"),
+            exc_info=None,
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_formatters() -> List[logging.Formatter]:
+    return [
+        LegacyColoredFormatter(fmt=FORMAT, datefmt="%H:%M:%S"),  # console
+        LegacyColoredFormatter(fmt=FORMAT),  # cidder.log
+        logging.Formatter(fmt=FORMAT),  # cidder_plaintext.log
+    ]
+
+
+def rendered_formatters() -> List[logging.Formatter]:
+    return [
+        ColoredFormatter(fmt=FORMAT, datefmt="%H:%M:%S"),
+        ColoredFormatter(fmt=FORMAT),
+        RenderedFormatter(fmt=FORMAT),
+    ]
+
+
+def records_per_second(make_formatters: Callable[[], List[logging.Formatter]], count: int) -> float:
+    formatters = make_formatters()
+    records = make_records(count)
+
+    start = time.perf_counter()
+    for record in records:
+        for formatter in formatters:
+            formatter.format(record)
+    return count / (time.perf_counter() - start)
+
+
+def check_identical_output() -> None:
+    for legacy, rendered in zip(legacy_formatters(), rendered_formatters()):
+        for legacy_record, rendered_record in zip(make_records(8), make_records(8)):
+            rendered_record.created = legacy_record.created
+            rendered_record.msecs = legacy_record.msecs
+            assert legacy.format(legacy_record) == rendered.format(rendered_record)
+
+
+def main(count: int = 50_000) -> dict:
+    check_identical_output()
+
+    before = records_per_second(legacy_formatters, count)
+    after = records_per_second(rendered_formatters, count)
+    print(f"before: {before:,.0f} records/s")
+    print(f"after:  {after:,.0f} records/s ({after / before:.1f}x)")
+    return {"before_records_per_s": before, "after_records_per_s": after}
+
+
+def run(quick: bool = False) -> List[Dict[str, float]]:
+    """Records/sec through the `LogConfig` formatters, and through a single `ColoredFormatter`."""
+    check_identical_output()
+    count = 10_000 if quick else 50_000
+
+    results = []
+    for name, make_formatters in (
+        ("log rendering[legacy, 3 formatters]", legacy_formatters),
+        ("log rendering[rendered, 3 formatters]", rendered_formatters),
+        ("ColoredFormatter", lambda: [ColoredFormatter(fmt=FORMAT)]),
+    ):
+        per_second = records_per_second(make_formatters, count)
+        results.append(
+            {
+                "name": name,
+                "number": count,
+                "best_us": 1e6 / per_second,
+                "median_us": 1e6 / per_second,
+                "ops_per_s": per_second,
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
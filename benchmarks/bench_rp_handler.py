@@ -0,0 +1,53 @@
+"""Benchmarks for the `RpHandler` time getters and `format_*` methods, both straight after
+a unit boundary (cache miss) and within a unit (cache hit).
+
+Run with `python -m benchmarks.bench_rp_handler`.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from benchmarks.harness import format_result, measure
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.testing.factories import VirtualClock, make_rp
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def getters(rp: RpHandler) -> Dict[str, Callable[[], object]]:
+    return {
+        "get_time_to_next_incr": rp.get_time_to_next_incr,
+        "get_time_to_next_rp_unit": rp.get_time_to_next_rp_unit,
+        "get_current_rp_unit_time": rp.get_current_rp_unit_time,
+        "get_next_rp_unit_time": rp.get_next_rp_unit_time,
+        "format_current_rp_time": rp.format_current_rp_time,
+        "format_current_rp_incr_time": rp.format_current_rp_incr_time,
+        "format_next_rp_time": rp.format_next_rp_time,
+        "format_next_rp_incr_time": rp.format_next_rp_incr_time,
+        "format_time_to_next_incr": rp.format_time_to_next_incr,
+    }
+
+
+def run(quick: bool = False) -> List[Dict[str, float]]:
+    repeat = 3 if quick else 5
+    clock = VirtualClock(START)
+    # 1 day of real time = 1 RP month
+    rp = make_rp("Sagrea", clock=clock)
+    clock.now = START + timedelta(hours=13)
+    results = []
+
+    for name, getter in getters(rp).items():
+        results.append(measure(f"RpHandler.{name}[cached]", getter, repeat=repeat))
+
+        def uncached(getter=getter):
+            rp.invalidate_cache()
+            getter()
+
+        results.append(measure(f"RpHandler.{name}[uncached]", uncached, repeat=repeat))
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(format_result(result))
@@ -0,0 +1,94 @@
+"""Scheduler simulation: thousands of RPs with mixed intervals, driven on a virtual clock
+through `RpScheduler.run_pending`, measuring increments per second of scheduler + update work.
+
+Run with `python -m benchmarks.bench_scheduler`.
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from benchmarks.harness import format_result
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.scheduling.scheduler import RpScheduler
+from cidderbot.utils.time_formatters import TimeUnit
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+INTERVALS = [timedelta(minutes=m) for m in (5, 15, 30, 60, 360, 1440)]
+
+
+class FakeClock:
+    def __init__(self, now: datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def make_rps(count: int, clock: FakeClock, seed: int = 0) -> List[RpHandler]:
+    rng = random.Random(seed)
+    rps = []
+    for i in range(count):
+        interval = rng.choice(INTERVALS)
+        rps.append(
+            RpHandler(
+                name=f"rp{i}",
+                guilds=[],
+                rp_datetime_unit=TimeUnit.DAY,
+                rp_datetime_incr_unit=TimeUnit.MONTH,
+                rp_datetime=datetime(1970, 1, 1, tzinfo=timezone.utc),
+                rp_datetime_incr_amount=1,
+                # spread the deadlines over the first interval
+                last_datetime=START - rng.random() * interval,
+                incr_interval=interval,
+                clock=clock,
+            )
+        )
+    return rps
+
+
+def simulate(rp_count: int, duration: timedelta) -> Dict[str, float]:
+    """Runs the scheduler over `duration` of virtual time, jumping straight to each deadline."""
+    clock = FakeClock(START)
+    rps = make_rps(rp_count, clock)
+
+    async def on_due(batch: List[RpHandler]) -> None:
+        for rp in batch:
+            rp.update()
+
+    scheduler = RpScheduler(on_due, clock=clock)
+    for rp in rps:
+        scheduler.add(rp)
+
+    async def scenario() -> None:
+        end = START + duration
+        while scheduler.next_deadline and scheduler.next_deadline <= end:
+            clock.now = scheduler.next_deadline
+            await scheduler.run_pending(clock.now)
+
+    start = time.perf_counter()
+    asyncio.run(scenario())
+    elapsed = time.perf_counter() - start
+
+    fired = scheduler.fired_count
+    return {
+        "name": f"RpScheduler.simulation[{rp_count} RPs, {duration}]",
+        "number": fired,
+        "batches": scheduler.batch_count,
+        "best_us": elapsed / fired * 1e6 if fired else 0.0,
+        "median_us": elapsed / fired * 1e6 if fired else 0.0,
+        "ops_per_s": fired / elapsed if elapsed else float("inf"),
+    }
+
+
+def run(quick: bool = False) -> List[Dict[str, float]]:
+    if quick:
+        return [simulate(1_000, timedelta(hours=2))]
+    return [simulate(5_000, timedelta(hours=6))]
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(format_result(result))
@@ -0,0 +1,82 @@
+"""Benchmarks for `time_formatters`: `format_timedelta` and `convert_time_unit_string`,
+one at a time and in batches.
+
+Run with `python -m benchmarks.bench_time_formatters`.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from benchmarks.harness import format_result, measure
+from cidderbot.utils.time_formatters import (
+    TimeUnit,
+    convert_time_unit_string,
+    convert_time_unit_strings,
+    format_timedelta,
+    format_timedeltas,
+)
+
+TIMEDELTAS = [
+    timedelta(seconds=42),
+    timedelta(hours=23, minutes=59),
+    timedelta(days=3, hours=4, minutes=5, seconds=6),
+    timedelta(days=800, hours=1),
+]
+DATETIME = datetime(1970, 3, 14, 15, 9, 26, tzinfo=timezone.utc)
+
+# e.g. every RP's countdown on an overview - RPs that update together share theirs
+BATCH_SIZE = 1000
+BATCH_DATETIMES = [DATETIME + timedelta(hours=7 * i) for i in range(BATCH_SIZE)]
+BATCH_TIMEDELTAS = [timedelta(minutes=i % 97, seconds=i % 3) for i in range(BATCH_SIZE)]
+
+
+def run(quick: bool = False) -> List[Dict[str, float]]:
+    repeat = 3 if quick else 5
+    results = []
+
+    for i, td in enumerate(TIMEDELTAS):
+        results.append(measure(f"format_timedelta[{i}]", lambda td=td: format_timedelta(td), repeat=repeat))
+    results.append(
+        measure("format_timedelta[limit=1]", lambda: format_timedelta(TIMEDELTAS[2], 1), repeat=repeat)
+    )
+
+    for unit in TimeUnit:
+        results.append(
+            measure(
+                f"convert_time_unit_string[{unit.name}]",
+                lambda unit=unit: convert_time_unit_string(DATETIME, unit),
+                repeat=repeat,
+            )
+        )
+
+    results.append(
+        measure(
+            "convert_time_unit_string[DAY]x1000 (loop)",
+            lambda: [convert_time_unit_string(dt, TimeUnit.DAY) for dt in BATCH_DATETIMES],
+            repeat=repeat,
+        )
+    )
+    results.append(
+        measure(
+            "convert_time_unit_strings[DAY]x1000",
+            lambda: convert_time_unit_strings(BATCH_DATETIMES, TimeUnit.DAY),
+            repeat=repeat,
+        )
+    )
+    results.append(
+        measure(
+            "format_timedelta x1000 (loop)",
+            lambda: [format_timedelta(td) for td in BATCH_TIMEDELTAS],
+            repeat=repeat,
+        )
+    )
+    results.append(
+        measure("format_timedeltas x1000", lambda: format_timedeltas(BATCH_TIMEDELTAS), repeat=repeat)
+    )
+
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(format_result(result))
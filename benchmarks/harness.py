@@ -0,0 +1,51 @@
+"""Shared timing helpers for the benchmark suite."""
+
+import statistics
+import time
+from typing import Callable, Dict, Optional
+
+
+def measure(
+    name: str,
+    func: Callable[[], object],
+    number: Optional[int] = None,
+    repeat: int = 5,
+    min_time: float = 0.05,
+) -> Dict[str, float]:
+    """Times a function, in batches of `number` calls, and keeps the best batch.
+
+    Args:
+        name (str): Benchmark name.
+        func (Callable[[], object]): Function to time.
+        number (Optional[int], optional): Calls per batch. Defaults to however many take at least `min_time`.
+        repeat (int, optional): Number of batches. Defaults to 5.
+        min_time (float, optional): Minimum seconds per batch when `number` is not given. Defaults to 0.05.
+
+    Returns:
+        Dict[str, float]: Name, calls per batch, and best/median time per call (µs) and calls per second.
+    """
+    if number is None:
+        number = 1
+        while _time_batch(func, number) < min_time:
+            number *= 2
+
+    batches = [_time_batch(func, number) / number for _ in range(repeat)]
+    best = min(batches)
+    return {
+        "name": name,
+        "number": number,
+        "best_us": best * 1e6,
+        "median_us": statistics.median(batches) * 1e6,
+        "ops_per_s": 1 / best if best else float("inf"),
+    }
+
+
+def _time_batch(func: Callable[[], object], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return time.perf_counter() - start
+
+
+def format_result(result: Dict[str, float]) -> str:
+    return f"{result['name']:<48} {result['best_us']:>12.3f} µs {result['ops_per_s']:>16,.0f} /s"
@@ -0,0 +1,105 @@
+"""Runs the whole benchmark suite offline and writes the results to a JSON file, to compare runs.
+
+Usage:
+    python -m benchmarks.run [--quick] [--only scheduler] [-o results.json] [--compare old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from benchmarks import (
+    bench_calendars,
+    bench_end_to_end,
+    bench_guild_lookup,
+    bench_log_rendering,
+    bench_rp_handler,
+    bench_scheduler,
+    bench_time_formatters,
+)
+from benchmarks.harness import format_result
+
+SUITES = {
+    "time_formatters": bench_time_formatters,
+    "calendars": bench_calendars,
+    "rp_handler": bench_rp_handler,
+    "log_rendering": bench_log_rendering,
+    "guild_lookup": bench_guild_lookup,
+    "scheduler": bench_scheduler,
+    "end_to_end": bench_end_to_end,
+}
+DEFAULT_OUTPUT = os.path.join("benchmarks", "results", "latest.json")
+
+
+def get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suites(names: List[str], quick: bool = False) -> Dict:
+    results = {}
+    for name in names:
+        print(f"==== {name} ====")
+        results[name] = SUITES[name].run(quick=quick)
+        for result in results[name]:
+            print(format_result(result))
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": get_git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "quick": quick,
+        "suites": results,
+    }
+
+
+def compare(old: Dict, new: Dict) -> None:
+    """Prints the speedup of every benchmark that is in both runs."""
+    old_results = {
+        result["name"]: result for suite in old["suites"].values() for result in suite
+    }
+    print(f"==== compared to {old.get('commit')} ({old.get('created')}) ====")
+    for suite in new["suites"].values():
+        for result in suite:
+            previous = old_results.get(result["name"])
+            if previous and result["best_us"]:
+                print(f"{result['name']:<48} {previous['best_us'] / result['best_us']:>8.2f}x")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run Cidder's benchmark suite.")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a fast sanity check")
+    parser.add_argument("--only", action="append", choices=SUITES, help="suite to run (repeatable)")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="JSON file to write results to")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = run_suites(args.only or list(SUITES), quick=args.quick)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}.")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
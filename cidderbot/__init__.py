@@ -0,0 +1,4 @@
+import time
+
+# taken before anything else is imported, so the startup timeline includes import time
+IMPORT_STARTED_AT = time.perf_counter()
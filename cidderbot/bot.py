@@ -1,24 +1,54 @@
 import asyncio
 import logging
 import os
-import pkgutil
+import platform
 
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
 from cidderbot.cidder import Cidder
-from cidderbot.cogs import rp
+from cidderbot.database.database import Database
 from cidderbot.events import events
+from cidderbot.messaging.prefixes import DEFAULT_PREFIX
 from cidderbot.utils.logging_utils import log_config
+from cidderbot.utils.startup_timeline import STARTUP_TIMELINE
 
 # should move to a constants file
 TOKEN_STRING = "DISCORD_TOKEN"
 DEBUG_MODE_STRING = "DEBUG_MODE"
-COMMAND_PREFIX = "rp!"  # ok to define this here?
+ASYNC_LOGGING_STRING = "ASYNC_LOGGING"
+JSON_LOGGING_STRING = "JSON_LOGGING"
+SHARD_COUNT_STRING = "SHARD_COUNT"  # "auto", or a number of shards. Unset = no sharding
+# 1 = also accept rp! prefix commands, which needs the message content intent. Unset = slash commands only
+PREFIX_COMMANDS_STRING = "PREFIX_COMMANDS"
+COMMAND_PREFIX = DEFAULT_PREFIX  # default only, guilds can change theirs
 # INTENTS_INTEGER = 182272
 
 
+class CidderBotMixin:
+    """Shuts Cidder down when the bot closes - however it's closed, including Ctrl+C in `bot.run()`.
+
+    Cidder's shutdown runs first, while the bot can still send messages: queued RP updates are sent,
+    unsaved RP state is written and worker leases are released.
+    """
+
+    cidder: Cidder  # set by BotEvents
+
+    async def close(self) -> None:
+        if not self.is_closed():
+            await self.cidder.shutdown()
+        await super().close()
+
+
+class CidderBot(CidderBotMixin, commands.Bot):
+    pass
+
+
+class AutoShardedCidderBot(CidderBotMixin, commands.AutoShardedBot):
+    pass
+
+
 class BotMain:
     """Class used to handle bot startup.
 
@@ -33,45 +63,106 @@ class BotMain:
         # this is the only print statement in the entire project I promise
         print("Bot initialising...")
 
+        # see on_ready for the rest of the timeline
+        timeline = STARTUP_TIMELINE
+        timeline.mark("imports")
+
         # load logger
         is_debug = os.getenv(DEBUG_MODE_STRING) == "1"
+        use_async_logging = os.getenv(ASYNC_LOGGING_STRING) == "1"
+        use_json_logging = os.getenv(JSON_LOGGING_STRING) == "1"
         log_config_handler = log_config.LogConfig()
 
-        log_config_handler.setup(is_debug=is_debug)
+        log_config_handler.setup(
+            is_debug=is_debug,
+            use_async=use_async_logging,
+            json_logs=use_json_logging,
+        )
         if is_debug:
             logging.info("DEBUG mode is enabled.")
 
         self._logger = logging.getLogger()
         self._logger.info("Logging setup complete.")
         self._logger.debug("Program running in %s.", os.getcwd())
+        timeline.mark("logging setup")
 
-        self.bot = commands.Bot(
-            command_prefix=COMMAND_PREFIX, intents=self._setup_intents()
-        )
+        self.prefix_commands = os.getenv(PREFIX_COMMANDS_STRING) == "1"
+        if self.prefix_commands:
+            self._logger.info("Prefix commands are enabled (%s).", COMMAND_PREFIX)
+
+        # Create empty Cidder instance. The database pool is only opened once the bot is ready.
+        self.cidder = Cidder(database=Database())
 
-        # Create empty Cidder instance
-        self.cidder = Cidder()
+        self.bot = self._create_bot()
+
+        # creates events, including all the important initialization (this feels very jank)
+        events.BotEvents(
+            self.bot,
+            self.cidder,
+            timeline=timeline,
+            prefix_commands=self.prefix_commands,
+            sync_app_commands=True,
+        )
+        timeline.mark("bot setup")
 
         # load tokens and cogs
         self._load_tokens()
         self._logger.info("Token loading complete.")
+        timeline.mark("token load")
 
-        # creates events, including all the important initialization (this feels very jank)
-        events.BotEvents(self.bot, self.cidder)
+        if platform.system() == "Windows":
+            # psycopg's async connections don't work on the default Proactor event loop
+            asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
         # FINAL STATEMENT = blocking call
         self.bot.run(
             self._token, log_handler=log_config_handler.get_discord_logging_handler()
         )
 
-    def _setup_intents(self) -> discord.Intents:
-        """Sets up Discord intents. Uses the default set of intents, plus `message_content`.
+        # flush anything still queued (async logging)
+        log_config_handler.shutdown()
+
+    def _create_bot(self) -> commands.Bot:
+        """Creates the bot. With `SHARD_COUNT` set, an auto-sharded bot is used, which runs one gateway
+        connection per shard (with "auto", Discord's recommended number of shards).
+
+        Returns:
+            commands.Bot: The bot.
+        """
+        # without prefix commands, messages aren't received at all, so the prefix is never used
+        # per guild, looked up in Cidder's prefix cache
+        command_prefix = self.cidder.prefixes if self.prefix_commands else commands.when_mentioned
+        intents = self._setup_intents(self.prefix_commands)
+
+        shard_count = os.getenv(SHARD_COUNT_STRING)
+        if not shard_count:
+            return CidderBot(command_prefix=command_prefix, intents=intents)
+
+        self._logger.info("Sharding enabled (shard count: %s).", shard_count)
+        return AutoShardedCidderBot(
+            command_prefix=command_prefix,
+            intents=intents,
+            shard_count=None if shard_count == "auto" else int(shard_count),
+        )
+
+    @staticmethod
+    def _setup_intents(prefix_commands: bool) -> discord.Intents:
+        """Sets up Discord intents. Uses the default set of intents, plus `message_content` for prefix commands.
+
+        Slash commands arrive as interactions, so without prefix commands message events are turned off
+        entirely and the gateway doesn't send the bot every message in every guild.
+
+        Args:
+            prefix_commands (bool): Whether `rp!` prefix commands are enabled.
 
         Returns:
             discord.Intents: Correctly set up intents
         """
         intents = discord.Intents.default()
-        intents.message_content = True
+        if prefix_commands:
+            intents.message_content = True
+        else:
+            intents.messages = False
 
         return intents
 
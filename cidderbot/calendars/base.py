@@ -0,0 +1,180 @@
+import abc
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+
+from cidderbot.utils.time_formatters import DEFAULT_LOCALE, TimeUnit
+
+# Day 0 of calendars that aren't the Gregorian one. Their dates are kept in datetimes as well
+# (so they can be stored, compared and subtracted like any other), as this plus the time elapsed
+# since their year 1 began - the datetime's own year/month/day mean nothing for them.
+CALENDAR_EPOCH = datetime(1, 1, 1, tzinfo=timezone.utc)
+
+SECONDS_PER_DAY = 86400
+US_PER_DAY = SECONDS_PER_DAY * 1_000_000
+
+
+class RpCalendar(abc.ABC):
+    """Base class for the calendar an RP's dates are in: all the date arithmetic, formatting and parsing
+    an RP needs. Days are always 24 hours long, months and years are up to the calendar.
+
+    Subclasses implement the month arithmetic, formatting and parsing, i.e. the abstract methods.
+    """
+
+    name = ""
+    months_per_year = 12
+    days_per_week = 7
+    # length of a common year, for the approximate unit conversions in `units_in`
+    days_per_year = 365
+
+    def __repr__(self) -> str:
+        return f"<Calendar {self.name}>"
+
+    # ================================ Units ================================
+
+    def unit_months(self, unit: TimeUnit) -> int:
+        """Number of months in a unit, or 0 if it is a fixed length of time."""
+        if unit == TimeUnit.MONTH:
+            return 1
+        if unit == TimeUnit.YEAR:
+            return self.months_per_year
+        return 0
+
+    def unit_seconds(self, unit: TimeUnit) -> int:
+        """Length of a unit in seconds, or 0 if it is made of months (which aren't all the same length)."""
+        if self.unit_months(unit):
+            return 0
+        if unit == TimeUnit.WEEK:
+            return self.days_per_week * SECONDS_PER_DAY
+        return unit.value
+
+    def _approximate_seconds(self, unit: TimeUnit) -> float:
+        if unit == TimeUnit.YEAR:
+            return self.days_per_year * SECONDS_PER_DAY
+        if unit == TimeUnit.MONTH:
+            return self.days_per_year / self.months_per_year * SECONDS_PER_DAY
+        return self.unit_seconds(unit)
+
+    def units_in(self, unit_a: TimeUnit, unit_b: TimeUnit) -> int:
+        """Returns an integer n where n is an approximate number of `unit_b` in `unit_a`.
+
+        Args:
+            unit_a (TimeUnit): Larger time unit.
+            unit_b (TimeUnit): Smaller time unit.
+
+        Returns:
+            int: Approximated integer number of `unit_b` in `unit_a`. Returns 0 if `unit_a` is smaller than `unit_b`.
+        """
+        if unit_a == unit_b:
+            return 1
+        months_a, months_b = self.unit_months(unit_a), self.unit_months(unit_b)
+        if months_a and months_b:
+            return months_a // months_b
+        return int(self._approximate_seconds(unit_a) // self._approximate_seconds(unit_b))
+
+    # ================================ Arithmetic ================================
+
+    def add(self, dt: datetime, unit: TimeUnit, value: int) -> datetime:
+        """Adds `value` of a time unit to a date. Months and years are added as calendar months/years,
+        with the day clamped to the length of the resulting month.
+
+        Args:
+            dt (datetime): Date to add to.
+            unit (TimeUnit): Unit of time.
+            value (int): Amount of unit to add. May be negative.
+
+        Returns:
+            datetime: Added date.
+        """
+        months = self.unit_months(unit)
+        if months:
+            return self._add_months(dt, months * value)
+        return dt + timedelta(seconds=self.unit_seconds(unit) * value)
+
+    def count_until(self, start: datetime, end: datetime, unit: TimeUnit) -> int:
+        """Returns the smallest number n of a time unit such that `add(start, unit, n) >= end`.
+
+        Args:
+            start (datetime): Date to count from.
+            end (datetime): Date to reach. Must not be before `start`.
+            unit (TimeUnit): Unit of time.
+
+        Returns:
+            int: Number of units.
+        """
+        if end <= start:
+            return 0
+
+        months = self.unit_months(unit)
+        if not months:
+            return math.ceil((end - start) / timedelta(seconds=self.unit_seconds(unit)))
+
+        # estimate from the calendar difference, then correct by at most a unit either way
+        count = self._months_between(start, end) // months
+        if self.add(start, unit, count) < end:
+            count += 1
+        elif count > 0 and self.add(start, unit, count - 1) >= end:
+            count -= 1
+        return count
+
+    @abc.abstractmethod
+    def _add_months(self, dt: datetime, months: int) -> datetime:
+        """Adds calendar months to a date, clamping the day to the length of the resulting month."""
+
+    @abc.abstractmethod
+    def _months_between(self, start: datetime, end: datetime) -> int:
+        """Difference between the months (not counting days) two dates are in."""
+
+    @abc.abstractmethod
+    def add_months_us(self, base_us: np.ndarray, months: np.ndarray) -> np.ndarray:
+        """Vectorized `add(dt, TimeUnit.MONTH, months)`, for `RpClockStore`.
+
+        Args:
+            base_us (np.ndarray): Dates, in int64 microseconds since the Unix epoch.
+            months (np.ndarray): Number of months to add to each.
+
+        Returns:
+            np.ndarray: Added dates, in int64 microseconds since the Unix epoch.
+        """
+
+    # ================================ Strings ================================
+
+    @abc.abstractmethod
+    def format(self, dt: datetime, unit: TimeUnit, locale: str = DEFAULT_LOCALE) -> str:
+        """Formats a date to the precision of a unit, e.g. "01 January 1970" for days.
+
+        Args:
+            dt (datetime): Date to format.
+            unit (TimeUnit): Unit of measurement for the date.
+            locale (str, optional): Locale code for the names that aren't the calendar's own. Defaults to "en".
+
+        Returns:
+            str: Formatted date.
+        """
+
+    @abc.abstractmethod
+    def parse(self, string: str) -> Optional[datetime]:
+        """Parses a user supplied date, in ISO format or any of the formats produced by `format`.
+
+        Args:
+            string (str): Date string.
+
+        Returns:
+            Optional[datetime]: Parsed date, or None if the string could not be parsed.
+        """
+
+    @abc.abstractmethod
+    def from_isoformat(self, string: str) -> datetime:
+        """Parses a date in ISO format, e.g. from configuration.
+
+        Args:
+            string (str): Date string, "YYYY-MM-DD" optionally followed by "THH:MM[:SS]".
+
+        Raises:
+            ValueError: If the string isn't a valid date.
+
+        Returns:
+            datetime: Parsed date.
+        """
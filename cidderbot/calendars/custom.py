@@ -0,0 +1,321 @@
+import bisect
+import re
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cidderbot.calendars.base import CALENDAR_EPOCH, US_PER_DAY, RpCalendar
+from cidderbot.utils.time_formatters import DEFAULT_LOCALE, TimeUnit, get_locale_names
+
+# CALENDAR_EPOCH in microseconds since the Unix epoch, for RpClockStore's arrays
+_EPOCH_US = (CALENDAR_EPOCH - datetime(1970, 1, 1, tzinfo=timezone.utc)) // timedelta(microseconds=1)
+
+# the same shapes as the Gregorian formats, see `convert_time_unit_string`
+_FORMATS = {
+    TimeUnit.YEAR: "{year}",
+    TimeUnit.MONTH: "{month} {year}",
+    TimeUnit.WEEK: "{week} {week_number:02d}, {year}",
+    TimeUnit.DAY: "{day:02d} {month} {year}",
+    TimeUnit.HOUR: "{day:02d} {month} {year}, {hour:02d}:00",
+    TimeUnit.MINUTE: "{day:02d} {month} {year}, {hour:02d}:{minute:02d}",
+    TimeUnit.SECOND: "{day:02d} {month} {year}, {hour:02d}:{minute:02d}:{second:02d}",
+}
+
+_TIME = r"(?:,? (\d{1,2}):(\d{2})(?::(\d{2}))?)?"
+_ISO_DATE = re.compile(r"(\d{1,5})-(\d{1,2})-(\d{1,2})(?:[T ](\d{1,2}):(\d{2})(?::(\d{2}))?)?")
+# [day] [month name] year[, time] - month names can have spaces, but no digits or commas
+_TEXT_DATE = re.compile(r"(?:(\d{1,2}) )?(?:([^\d,]+?) )?(\d{1,5})" + _TIME)
+
+
+class CustomCalendar(RpCalendar):
+    """A calendar for RP worlds with their own named months, month and year lengths, weeks and leap days.
+
+    Dates are converted to and from day counts with precomputed cumulative day tables: days before each month
+    of a (leap) year, and days before each year of a leap cycle. Finding the date of a day is then a division
+    by the cycle length and two binary searches, however far the date is from year 1.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        months: Sequence[Tuple[str, int]],
+        days_per_week: int = 7,
+        leap_every: int = 0,
+        leap_month: int = -1,
+    ) -> None:
+        """Creates a calendar.
+
+        Args:
+            name (str): Calendar name, used to refer to it from RPs.
+            months (Sequence[Tuple[str, int]]): Name and number of days of each month, in order.
+            days_per_week (int, optional): Number of days in a week. Defaults to 7.
+            leap_every (int, optional): Every `leap_every`-th year (years divisible by it) is a leap year,
+                one day longer. Defaults to 0, for no leap years.
+            leap_month (int, optional): Index of the month that gets the leap day. Defaults to -1, the last month.
+
+        Raises:
+            ValueError: If the calendar is invalid.
+        """
+        if not name or not name.strip():
+            raise ValueError("A calendar needs a name.")
+        if not months:
+            raise ValueError(f"Calendar {name} has no months.")
+        if days_per_week < 1 or leap_every < 0:
+            raise ValueError(f"Calendar {name}: days_per_week must be positive and leap_every must not be negative.")
+        if not -len(months) <= leap_month < len(months):
+            raise ValueError(f"Calendar {name}: there's no month {leap_month} for the leap day.")
+
+        self._month_indices: Dict[str, int] = {}
+        for i, (month_name, length) in enumerate(months):
+            if not month_name.strip() or any(c.isdigit() or c == "," for c in month_name):
+                raise ValueError(f"Calendar {name}: invalid month name {month_name!r}.")
+            if month_name.lower() in self._month_indices:
+                raise ValueError(f"Calendar {name}: month {month_name} is there twice.")
+            if length < 1:
+                raise ValueError(f"Calendar {name}: month {month_name} has no days.")
+            self._month_indices[month_name.lower()] = i
+
+        self.name = name
+        self.month_names = tuple(month_name for month_name, _ in months)
+        self.months_per_year = len(months)
+        self.days_per_week = days_per_week
+        self.leap_every = leap_every
+        self.leap_month = leap_month % len(months)
+
+        common = [length for _, length in months]
+        leap = list(common)
+        if leap_every:
+            leap[self.leap_month] += 1
+        self.days_per_year = sum(common)
+
+        # indexed [is_leap][month]
+        self._month_lengths = (tuple(common), tuple(leap))
+        # days before each month, with the length of the year at the end
+        self._month_starts = (tuple(accumulate(common, initial=0)), tuple(accumulate(leap, initial=0)))
+
+        # the last year of every leap cycle is the leap year
+        self._cycle_years = leap_every or 1
+        year_lengths = [self.days_per_year] * self._cycle_years
+        year_lengths[-1] += 1 if leap_every else 0
+        # days before each year of a cycle, with the length of the cycle at the end
+        self._year_starts = tuple(accumulate(year_lengths, initial=0))
+        self._cycle_days = self._year_starts[-1]
+
+        # the same tables as arrays, for the vectorized `add_months_us`
+        self._month_lengths_array = np.array(self._month_lengths, dtype=np.int64)
+        self._month_starts_array = np.array(self._month_starts, dtype=np.int64)
+        self._year_starts_array = np.array(self._year_starts, dtype=np.int64)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CustomCalendar":
+        """Creates a calendar from its definition, as loaded from JSON, e.g.
+        `{"name": "harptos", "months": [["Hammer", 30], ["Alturiak", 30], ...], "leap_every": 4}`.
+
+        Args:
+            data (Dict[str, Any]): Definition with a `name` and `months`, and optionally
+                `days_per_week`, `leap_every` and `leap_month`.
+
+        Raises:
+            ValueError: If the definition is invalid.
+
+        Returns:
+            CustomCalendar: The calendar.
+        """
+        try:
+            return cls(
+                name=str(data["name"]),
+                months=[(str(month_name), int(length)) for month_name, length in data["months"]],
+                days_per_week=int(data.get("days_per_week", 7)),
+                leap_every=int(data.get("leap_every", 0)),
+                leap_month=int(data.get("leap_month", -1)),
+            )
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid calendar definition {data!r}: {e}") from e
+
+    # ================================ Day tables ================================
+
+    def is_leap_year(self, year: int) -> bool:
+        return bool(self.leap_every) and year % self.leap_every == 0
+
+    def month_length(self, year: int, month: int) -> int:
+        """Number of days in a month (1-based) of a year."""
+        return self._month_lengths[self.is_leap_year(year)][month - 1]
+
+    def days_before_year(self, year: int) -> int:
+        cycles, year_of_cycle = divmod(year - 1, self._cycle_years)
+        return cycles * self._cycle_days + self._year_starts[year_of_cycle]
+
+    def date_from_days(self, days: int) -> Tuple[int, int, int]:
+        """Converts a number of days since the start of year 1 into a date.
+
+        Args:
+            days (int): Days since the start of year 1.
+
+        Returns:
+            Tuple[int, int, int]: Year, month (1-based) and day of month (1-based).
+        """
+        cycles, day_of_cycle = divmod(days, self._cycle_days)
+        year_of_cycle = bisect.bisect_right(self._year_starts, day_of_cycle) - 1
+        year = cycles * self._cycle_years + year_of_cycle + 1
+
+        day_of_year = day_of_cycle - self._year_starts[year_of_cycle]
+        month_starts = self._month_starts[self.is_leap_year(year)]
+        month = bisect.bisect_right(month_starts, day_of_year) - 1
+        return year, month + 1, day_of_year - month_starts[month] + 1
+
+    def days_from_date(self, year: int, month: int, day: int) -> int:
+        """Converts a date (month and day 1-based) into the number of days since the start of year 1."""
+        return self.days_before_year(year) + self._month_starts[self.is_leap_year(year)][month - 1] + day - 1
+
+    def date(self, year: int, month: int, day: int, hour: int = 0, minute: int = 0, second: int = 0) -> datetime:
+        """Creates a date in this calendar.
+
+        Args:
+            year (int): Year, from 1.
+            month (int): Month, from 1.
+            day (int): Day of month, from 1.
+            hour (int, optional): Hour. Defaults to 0.
+            minute (int, optional): Minute. Defaults to 0.
+            second (int, optional): Second. Defaults to 0.
+
+        Raises:
+            ValueError: If the date doesn't exist, or is too far ahead.
+
+        Returns:
+            datetime: The date.
+        """
+        if year < 1 or not 1 <= month <= self.months_per_year or not 1 <= day <= self.month_length(year, month):
+            raise ValueError(f"{year}-{month}-{day} is not a date in the {self.name} calendar.")
+        if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+            raise ValueError(f"{hour}:{minute}:{second} is not a time of day.")
+
+        try:
+            return CALENDAR_EPOCH + timedelta(
+                days=self.days_from_date(year, month, day), hours=hour, minutes=minute, seconds=second
+            )
+        except OverflowError as e:
+            raise ValueError(f"Year {year} is too far ahead.") from e
+
+    def _split(self, dt: datetime) -> Tuple[int, int, int, timedelta]:
+        """Splits a date into year, month, day of month and time of day."""
+        delta = dt - CALENDAR_EPOCH
+        year, month, day = self.date_from_days(delta.days)
+        return year, month, day, delta - timedelta(days=delta.days)
+
+    # ================================ Arithmetic ================================
+
+    def _add_months(self, dt: datetime, months: int) -> datetime:
+        year, month, day, time_of_day = self._split(dt)
+        years, month_index = divmod((year - 1) * self.months_per_year + month - 1 + months, self.months_per_year)
+        year, month = years + 1, month_index + 1
+        if year < 1:
+            raise ValueError("Year is out of range.")
+
+        day = min(day, self.month_length(year, month))
+        try:
+            return CALENDAR_EPOCH + timedelta(days=self.days_from_date(year, month, day)) + time_of_day
+        except OverflowError as e:
+            raise ValueError(f"Year {year} is too far ahead.") from e
+
+    def _months_between(self, start: datetime, end: datetime) -> int:
+        start_year, start_month, _, _ = self._split(start)
+        end_year, end_month, _, _ = self._split(end)
+        return (end_year - start_year) * self.months_per_year + end_month - start_month
+
+    def add_months_us(self, base_us: np.ndarray, months: np.ndarray) -> np.ndarray:
+        days, time_of_day = np.divmod(base_us - _EPOCH_US, US_PER_DAY)
+
+        # days -> date, with the same lookups as date_from_days()
+        cycles, day_of_cycle = np.divmod(days, self._cycle_days)
+        year_of_cycle = np.searchsorted(self._year_starts_array, day_of_cycle, side="right") - 1
+        year = cycles * self._cycle_years + year_of_cycle + 1
+        day_of_year = day_of_cycle - self._year_starts_array[year_of_cycle]
+        leap = self._is_leap_array(year)
+        common_starts, leap_starts = self._month_starts_array
+        month = np.where(
+            leap,
+            np.searchsorted(leap_starts, day_of_year, side="right"),
+            np.searchsorted(common_starts, day_of_year, side="right"),
+        ) - 1
+        day = day_of_year - self._month_starts_array[leap, month]
+
+        years, month = np.divmod((year - 1) * self.months_per_year + month + months, self.months_per_year)
+        year = years + 1
+        leap = self._is_leap_array(year)
+        day = np.minimum(day, self._month_lengths_array[leap, month] - 1)
+
+        cycles, year_of_cycle = np.divmod(year - 1, self._cycle_years)
+        days = cycles * self._cycle_days + self._year_starts_array[year_of_cycle]
+        days += self._month_starts_array[leap, month] + day
+        return _EPOCH_US + days * US_PER_DAY + time_of_day
+
+    def _is_leap_array(self, years: np.ndarray) -> np.ndarray:
+        if not self.leap_every:
+            return np.zeros(len(years), dtype=np.int64)
+        return (years % self.leap_every == 0).astype(np.int64)
+
+    # ================================ Strings ================================
+
+    def format(self, dt: datetime, unit: TimeUnit, locale: str = DEFAULT_LOCALE) -> str:
+        # month names are the calendar's own, only "Week" is translated.
+        # Weeks start with the year, so unlike Gregorian ones the first is week 01.
+        year, month, day, time_of_day = self._split(dt)
+        seconds = time_of_day.seconds
+        return _FORMATS[unit].format(
+            year=year,
+            month=self.month_names[month - 1],
+            day=day,
+            week=get_locale_names(locale).week,
+            week_number=(self._month_starts[self.is_leap_year(year)][month - 1] + day - 1) // self.days_per_week + 1,
+            hour=seconds // 3600,
+            minute=seconds // 60 % 60,
+            second=seconds % 60,
+        )
+
+    def get_month(self, month_name: str) -> Optional[int]:
+        """Finds a month (1-based) by its name, or the start of it if that's unambiguous (e.g. "Ham" for "Hammer").
+
+        Args:
+            month_name (str): Month name, in any case.
+
+        Returns:
+            Optional[int]: Month, or None if there's no such month.
+        """
+        month_name = month_name.lower()
+        if month_name in self._month_indices:
+            return self._month_indices[month_name] + 1
+
+        matches = [i for name, i in self._month_indices.items() if name.startswith(month_name)]
+        if len(month_name) >= 3 and len(matches) == 1:
+            return matches[0] + 1
+        return None
+
+    def parse(self, string: str) -> Optional[datetime]:
+        string = " ".join(string.split())
+        try:
+            return self.from_isoformat(string)
+        except ValueError:
+            pass
+
+        match = _TEXT_DATE.fullmatch(string)
+        if not match:
+            return None
+        day, month_name, year, hour, minute, second = match.groups()
+        if day and not month_name:
+            return None
+
+        month = self.get_month(month_name) if month_name else 1
+        if month is None:
+            return None
+        try:
+            return self.date(int(year), month, int(day or 1), int(hour or 0), int(minute or 0), int(second or 0))
+        except ValueError:
+            return None
+
+    def from_isoformat(self, string: str) -> datetime:
+        match = _ISO_DATE.fullmatch(string.strip())
+        if not match:
+            raise ValueError(f"{string} is not an ISO format date.")
+        return self.date(*(int(value) for value in match.groups() if value is not None))
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from cidderbot.calendars.base import US_PER_DAY, RpCalendar
+from cidderbot.utils.time_formatters import (
+    DEFAULT_LOCALE,
+    TimeUnit,
+    add_time_units,
+    convert_time_unit_string,
+    count_time_units_until,
+    get_time_unit_mapping,
+    parse_time_string,
+)
+
+
+class GregorianCalendar(RpCalendar):
+    """The real-life calendar, and the default for RPs. Dates are plain UTC datetimes,
+    so everything is done by `time_formatters` (and `datetime` itself)."""
+
+    name = "gregorian"
+
+    def units_in(self, unit_a: TimeUnit, unit_b: TimeUnit) -> int:
+        return get_time_unit_mapping(unit_a, unit_b)
+
+    def add(self, dt: datetime, unit: TimeUnit, value: int) -> datetime:
+        return add_time_units(dt, unit, value)
+
+    def count_until(self, start: datetime, end: datetime, unit: TimeUnit) -> int:
+        return count_time_units_until(start, end, unit)
+
+    def _add_months(self, dt: datetime, months: int) -> datetime:
+        return add_time_units(dt, TimeUnit.MONTH, months)
+
+    def _months_between(self, start: datetime, end: datetime) -> int:
+        return (end.year - start.year) * 12 + end.month - start.month
+
+    def add_months_us(self, base_us: np.ndarray, months: np.ndarray) -> np.ndarray:
+        # add whole months with numpy's month precision datetimes, keeping the day of month
+        # (clamped to the month length) and time of day
+        base_dt = base_us.astype("datetime64[us]")
+        base_month = base_dt.astype("datetime64[M]")
+        offset_us = (base_dt - base_month.astype("datetime64[us]")).astype(np.int64)
+        day, time_of_day = np.divmod(offset_us, US_PER_DAY)
+
+        month = base_month + months
+        month_start = month.astype("datetime64[us]").astype(np.int64)
+        month_days = ((month + 1).astype("datetime64[D]") - month.astype("datetime64[D]")).astype(np.int64)
+        return month_start + np.minimum(day, month_days - 1) * US_PER_DAY + time_of_day
+
+    def format(self, dt: datetime, unit: TimeUnit, locale: str = DEFAULT_LOCALE) -> str:
+        return convert_time_unit_string(dt, unit, locale)
+
+    def parse(self, string: str) -> Optional[datetime]:
+        return parse_time_string(string)
+
+    def from_isoformat(self, string: str) -> datetime:
+        return datetime.fromisoformat(string).replace(tzinfo=timezone.utc)
+
+
+GREGORIAN = GregorianCalendar()
@@ -0,0 +1,67 @@
+import json
+import logging
+from typing import Dict, List
+
+from cidderbot.calendars.base import RpCalendar
+from cidderbot.calendars.custom import CustomCalendar
+from cidderbot.calendars.gregorian import GREGORIAN
+
+DEFAULT_CALENDAR = GREGORIAN.name
+
+CALENDARS: Dict[str, RpCalendar] = {GREGORIAN.name: GREGORIAN}
+
+
+def register_calendar(calendar: RpCalendar) -> None:
+    """Makes a calendar available to RPs by its name. A calendar with the same name is replaced.
+
+    Args:
+        calendar (RpCalendar): Calendar to add.
+
+    Raises:
+        ValueError: If it would replace the Gregorian calendar.
+    """
+    if calendar.name == GREGORIAN.name and calendar is not GREGORIAN:
+        raise ValueError(f"The {GREGORIAN.name} calendar can't be replaced.")
+    CALENDARS[calendar.name] = calendar
+
+
+def get_calendar(name: str) -> RpCalendar:
+    """Returns a calendar by its name.
+
+    Args:
+        name (str): Calendar name, e.g. "gregorian".
+
+    Raises:
+        ValueError: If there's no such calendar.
+
+    Returns:
+        RpCalendar: Calendar.
+    """
+    calendar = CALENDARS.get(name)
+    if calendar is None:
+        raise ValueError(f"Unknown calendar {name!r}, expected one of: {', '.join(CALENDARS)}")
+    return calendar
+
+
+def load_calendars(path: str) -> List[CustomCalendar]:
+    """Loads and registers custom calendars from a JSON file, containing a list of calendar definitions
+    (see `CustomCalendar.from_dict`).
+
+    Args:
+        path (str): Path to the JSON file.
+
+    Raises:
+        ValueError: If a definition is invalid.
+
+    Returns:
+        List[CustomCalendar]: Loaded calendars.
+    """
+    with open(path, encoding="utf-8") as f:
+        definitions = json.load(f)
+
+    calendars = [CustomCalendar.from_dict(definition) for definition in definitions]
+    for calendar in calendars:
+        register_calendar(calendar)
+
+    logging.info("Loaded calendars %s from %s.", ", ".join(calendar.name for calendar in calendars), path)
+    return calendars
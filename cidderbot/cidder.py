@@ -1,12 +1,51 @@
+import asyncio
 import logging
 import os
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional
 
 import discord
+from discord.ext import commands
 
-from cidderbot.cogs.rp import RpHandler
-from cidderbot.utils.time_formatters import TimeUnit
+from cidderbot.calendars.registry import DEFAULT_CALENDAR, get_calendar, load_calendars
+from cidderbot.messaging.dispatcher import MessageDispatcher
+from cidderbot.messaging.prefixes import PrefixCache
+from cidderbot.metrics.registry import MetricsRegistry
+from cidderbot.models.entity_registry import EntityRegistry
+from cidderbot.models.guild import CidderGuild
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.scheduling.clock_store import RpClockStore
+from cidderbot.scheduling.scheduler import RpScheduler
+from cidderbot.scheduling.shards import ShardPartition, shard_id_for_guild
+from cidderbot.scheduling.task_registry import TaskRegistry
+from cidderbot.utils.time_formatters import DEFAULT_LOCALE, TimeUnit, get_locale_names, utc_now
+
+# the repository (psycopg) and metrics server (aiohttp's server side) are imported when first used
+if TYPE_CHECKING:
+    from cidderbot.database.database import Database
+    from cidderbot.database.prefix_repository import PrefixRepository
+    from cidderbot.database.rp_repository import RpRepository, RpStateWriteBehind
+    from cidderbot.database.worker_leases import RpWorkerLeases
+    from cidderbot.metrics.server import MetricsServer
+
+# names in the task registry
+SCHEDULER_TASK = "rp scheduler"  # the one timer that updates every RP (per shard)
+STATE_WRITER_TASK = "rp state writer"
+DATABASE_TASK = "database connect"
+WORKER_LEASE_TASK = "rp worker leases"
+LATE_CLAIMS_TASK = "rp late claims"
+
+# set to run as one of several workers sharing the database, see RpWorkerLeases
+WORKER_ID_STRING = "WORKER_ID"
+WORKER_PARTITIONS_STRING = "WORKER_PARTITIONS"
+WORKER_LEASE_SECONDS_STRING = "WORKER_LEASE_SECONDS"
+
+# JSON file with custom calendars for RPs, see load_calendars()
+CALENDARS_FILE_STRING = "CALENDARS_FILE"
+
+
+def scheduler_task_name(shard_id: int) -> str:
+    return f"{SCHEDULER_TASK} {shard_id}"
 
 
 class Cidder:
@@ -14,29 +53,183 @@ class Cidder:
     after the bot is ready.
     """
 
-    def __init__(self) -> None:
-        """Creates an empty, uninitialized instance of Cidder."""
+    def __init__(
+        self,
+        database: Optional["Database"] = None,
+        clock: Callable[[], datetime] = utc_now,
+        shard_count: int = 1,
+    ) -> None:
+        """Creates an empty, uninitialized instance of Cidder.
+
+        Args:
+            database (Optional[Database], optional): Database handler. Its connection pool is opened
+                once the bot is ready. Defaults to None, which runs Cidder without a database.
+            clock (Callable[[], datetime], optional): Returns the current (aware) time, used for scheduling.
+                Defaults to the current UTC time.
+            shard_count (int, optional): Number of shards to partition RPs over. Can also be set when
+                initializing, once the bot knows it. Defaults to 1.
+        """
         self._initialized = False
+        self.database = database
+        self.clock = clock
+        self.rp_repository: Optional["RpRepository"] = None
+        self.rp_state_writer: Optional["RpStateWriteBehind"] = None
+        self.prefix_repository: Optional["PrefixRepository"] = None
+        # only in worker mode: decides which RP increments this process announces
+        self.worker_leases: Optional["RpWorkerLeases"] = None
 
         # fields
-        self.guilds = []
-        self.channels = []
-        self.users = []
+        # guilds and channels, kept up to date by events
+        self.entities = EntityRegistry()
         self.rps = []
 
-    def initialize(
+        # every guild's command prefix, loaded from the database once it's open
+        self.prefixes = PrefixCache()
+
+        # RP -> id of the shard that owns it
+        self._rp_owners: Dict[RpHandler, int] = {}
+
+        # vectorized copy of every RP's clock, for computing all RPs' times at once
+        self.clock_store = RpClockStore()
+
+        # shared by everything that records metrics, served by the metrics server if enabled
+        self.metrics = MetricsRegistry()
+        self.metrics_server: Optional["MetricsServer"] = None
+
+        # through a lambda, as initialize() replaces the registry
+        self.metrics.gauge(
+            "cidder_entity_registry_bytes", "Memory used by the guild and channel registry."
+        ).set_function(lambda: self.entities.get_memory_bytes())  # pylint: disable=unnecessary-lambda
+
+        # every long-running task, at most one per name
+        self.tasks = TaskRegistry()
+        self.metrics.gauge(
+            "cidder_background_tasks", "Running background tasks."
+        ).set_function(lambda: len(self.tasks))
+
+        # the schedulers and dispatcher live here rather than in the Rp cog, so upcoming increments
+        # and queued messages survive reloading it.
+        # RPs, their index and schedulers are partitioned per shard (just one, unless sharded)
+        self.shard_count = 1
+        self.shards: Dict[int, ShardPartition] = {}
+        self._setup_shards(shard_count)
+        # update messages go through the dispatcher, which keeps to Discord's rate limits.
+        # Shared by all shards, as sending messages isn't done over the gateway.
+        self.dispatcher = MessageDispatcher(metrics=self.metrics)
+        self.metrics.gauge("cidder_rps_scheduled", "RPs in the schedulers.").set_function(
+            lambda: sum(len(scheduler) for scheduler in self.schedulers)
+        )
+
+        # set by the loaded Rp cog, see set_update_handler()
+        self._update_handler: Optional[Callable[..., Awaitable[None]]] = None
+        self._update_handler_set = asyncio.Event()
+        # in worker mode, RPs whose increments this worker claimed late, waiting to be announced
+        self._late_rps: List[RpHandler] = []
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._initialized
+
+    @property
+    def is_database_connecting(self) -> bool:
+        """Whether the database is still being opened in the background, see `initialize()`."""
+        return self.tasks.is_running(DATABASE_TASK)
+
+    @property
+    def guilds(self) -> List[CidderGuild]:
+        return list(self.entities.guilds.values())
+
+    async def initialize(
         self,
         guilds: List[discord.Guild],
         channels: List[discord.ChannelType],
         users: List[discord.User],
+        shard_count: Optional[int] = None,
     ) -> None:
-        # Initialize Cidder **after** the bot is ready
-        self.guilds = guilds
-        self.channels = channels
-        self.users = users
+        """Initializes Cidder **after** the bot is ready: loads RPs, starts the metrics server, etc.
+        With a database, it's opened and the RPs are loaded from it in the background.
+
+        This only happens once. Calling it again (discord.py fires `on_ready` again after reconnecting)
+        only resyncs guilds, channels and users, see `resync()`.
+
+        Args:
+            guilds (List[discord.Guild]): Guilds the bot is in.
+            channels (List[discord.ChannelType]): Channels the bot can see.
+            users (List[discord.User]): Users the bot can see.
+            shard_count (Optional[int], optional): Number of shards the bot runs. Defaults to None,
+                which keeps the current number.
+        """
+        if self._initialized:
+            self.resync(guilds, channels, users)
+            return
+
+        self.entities = EntityRegistry()
+        for guild in guilds:
+            self.entities.add_guild(guild)
+        for channel in channels:
+            self.entities.add_channel(channel)
+        self.entities.user_count = len(users)
         self.rps = []
+        self.clock_store = RpClockStore()
+        self._setup_shards(shard_count or self.shard_count)
+
+        await self.start_metrics_server()
+
+        if self.database and self.database.is_configured():
+            # connecting can take a while (or retry for a minute, if the database is down), so it doesn't
+            # hold up on_ready: the cog and commands load now, and the RPs follow once it's open
+            self.tasks.start(DATABASE_TASK, self._connect_database())
+        else:
+            logging.info("No database configured, running without one.")
+            self._register_loaded_rps(await self._load_rps())
+
+        self._initialized = True
+        logging.info("Main Cidder handler initialized.")
 
-        # initialize RP Handler
+    async def _connect_database(self) -> None:
+        """Opens the database in the background, then loads the RPs - from the database, or from env vars
+        if it could not be opened (or has no RPs)."""
+        await self.open_database()
+        self._register_loaded_rps(await self._load_rps())
+
+    def _register_loaded_rps(self, rps: List[RpHandler]) -> None:
+        for rp in rps:
+            self.register_rp(rp)
+            logging.info(
+                "%s: Next Update event is scheduled in: %s",
+                rp,
+                rp.format_time_to_next_incr(),
+            )
+
+        # loaded RPs may have been brought up to date, and env RPs are not saved yet
+        self.notify_rps_updated(rps)
+
+    async def _load_rps(self) -> List[RpHandler]:
+        """Loads RP Handlers - from the database if there is one, otherwise from env vars.
+
+        Returns:
+            List[RpHandler]: Loaded RPs.
+        """
+        # RPs refer to their calendars by name, so those have to be there first
+        calendars_file = os.getenv(CALENDARS_FILE_STRING)
+        if calendars_file:
+            load_calendars(calendars_file)
+
+        rps = []
+        if self.rp_repository:
+            rps = await self.rp_repository.load_all(self.guilds)
+            logging.info("Loaded %s RPs from the database.", len(rps))
+
+        if not rps:
+            rps = [self._load_rp_from_env()]
+        return rps
+
+    def _load_rp_from_env(self) -> RpHandler:
+        """Creates an RP from environment variables. Only used when there is no database (or it has no RPs).
+
+        Returns:
+            RpHandler: The RP.
+        """
         # load env vars (temp solution trust)
         name = os.getenv("RP_NAME")
         rp_datetime_unit = os.getenv("RP_DT_UNIT")
@@ -46,17 +239,21 @@ class Cidder:
         prev_datetime_string = os.getenv("PREV_INCR_DT_ISOSTRING")
         increment_interval_secs = int(os.getenv("INCR_INTERVAL_SECONDS"))
 
-        channel_id = int(os.getenv("CHANNEL_ID"))
+        # comma separated, the first one is the main update channel
+        channel_ids = [int(channel_id) for channel_id in os.getenv("CHANNEL_ID").split(",")]
+        # optional, month and unit names in the RP's messages
+        locale = os.getenv("RP_LOCALE", DEFAULT_LOCALE)
+        get_locale_names(locale)  # fail early on unsupported ones
+        # optional, the name of a calendar from CALENDARS_FILE
+        calendar = get_calendar(os.getenv("RP_CALENDAR", DEFAULT_CALENDAR))
 
-        # convert datetimes first
-        rp_datetime = datetime.fromisoformat(rp_datetime_string).replace(
-            tzinfo=timezone.utc
-        )
+        # convert datetimes first - the RP date is in the RP's calendar, the last increment is real-life time
+        rp_datetime = calendar.from_isoformat(rp_datetime_string)
         rp_last_datetime = datetime.fromisoformat(prev_datetime_string).replace(
             tzinfo=timezone.utc
         )
 
-        rp = RpHandler(
+        return RpHandler(
             name=name,
             guilds=self.guilds,
             rp_datetime_unit=TimeUnit[rp_datetime_unit],
@@ -65,13 +262,306 @@ class Cidder:
             rp_datetime_incr_amount=rp_datetime_increment_amount,
             last_datetime=rp_last_datetime,
             incr_interval=timedelta(seconds=increment_interval_secs),
-            channel_id=channel_id,
+            channel_id=channel_ids[0],
+            extra_channel_ids=channel_ids[1:],
+            clock=self.clock,
+            locale=locale,
+            calendar=calendar,
         )
 
-        self.rps.append(rp)
+    async def start_metrics_server(self) -> None:
+        """Starts serving metrics for Prometheus, if `METRICS_PORT` is set."""
+        port = os.getenv("METRICS_PORT")
+        if not port or self.metrics_server:
+            return
 
-        self._initialized = True
-        logging.info("Main Cidder handler initialized.")
+        from cidderbot.metrics.server import MetricsServer  # pylint: disable=import-outside-toplevel
+
+        self.metrics_server = MetricsServer(
+            self.metrics,
+            host=os.getenv("METRICS_HOST", MetricsServer.DEFAULT_HOST),
+            port=int(port),
+        )
+        if not await self.metrics_server.start():
+            self.metrics_server = None
+
+    async def open_database(self) -> None:
+        """Opens the database connection pool, if a database is configured,
+        and starts saving RP state to it. Retries for a while if the database is unreachable."""
+        if not self.database or not self.database.is_configured():
+            logging.info("No database configured, running without one.")
+            return
+
+        if not await self.database.open():
+            logging.error("Could not connect to the database, continuing without it.")
+            return
+
+        # pylint: disable=import-outside-toplevel
+        from cidderbot.database.rp_repository import RpRepository, RpStateWriteBehind
+
+        self.rp_repository = RpRepository(self.database)
+        await self.rp_repository.ensure_schema()
+
+        self.rp_state_writer = RpStateWriteBehind(self.rp_repository)
+        self.tasks.start(STATE_WRITER_TASK, self.rp_state_writer.run())
+
+        from cidderbot.database.prefix_repository import PrefixRepository  # pylint: disable=import-outside-toplevel
+
+        prefix_repository = PrefixRepository(self.database)
+        await prefix_repository.ensure_schema()
+        self.prefixes.load(await prefix_repository.load_all())
+        logging.info("Loaded the command prefixes of %s guilds.", len(self.prefixes))
+        # until now, prefix changes only went into the cache
+        await self._save_unsaved_prefixes(prefix_repository)
+        self.prefix_repository = prefix_repository
+
+        await self.start_worker_leases()
+
+    async def _save_unsaved_prefixes(self, prefix_repository: "PrefixRepository") -> None:
+        """Saves the prefix changes made before the database was open, including any made while saving."""
+        saved_count = 0
+        unsaved = self.prefixes.get_unsaved()
+        while unsaved:
+            for guild_id, prefix in unsaved.items():
+                if prefix is None:
+                    await prefix_repository.delete(guild_id)
+                else:
+                    await prefix_repository.save(guild_id, prefix)
+                self.prefixes.mark_saved(guild_id, prefix)
+                saved_count += 1
+            unsaved = self.prefixes.get_unsaved()
+
+        if saved_count:
+            logging.info("Saved %s prefix changes made before the database was open.", saved_count)
+
+    async def start_worker_leases(self) -> None:
+        """Starts taking part in dividing RP updates between workers, if `WORKER_ID` is set.
+        Needs the database, as that's where the workers coordinate."""
+        worker_id = os.getenv(WORKER_ID_STRING)
+        if not worker_id or self.worker_leases:
+            return
+
+        from cidderbot.database.worker_leases import RpWorkerLeases  # pylint: disable=import-outside-toplevel
+
+        self.worker_leases = RpWorkerLeases(
+            self.database,
+            worker_id,
+            partition_count=int(
+                os.getenv(WORKER_PARTITIONS_STRING, str(RpWorkerLeases.DEFAULT_PARTITION_COUNT))
+            ),
+            lease_seconds=float(
+                os.getenv(WORKER_LEASE_SECONDS_STRING, str(RpWorkerLeases.DEFAULT_LEASE_SECONDS))
+            ),
+            on_late_claims=self._on_late_claims,
+        )
+        await self.worker_leases.ensure_schema()
+        self.tasks.start(WORKER_LEASE_TASK, self.worker_leases.run())
+        self.metrics.gauge(
+            "cidder_worker_partitions", "RP partitions whose leases this worker holds."
+        ).set_function(lambda: len(self.worker_leases.held_partitions))
+        logging.info("Running as worker %s.", worker_id)
+
+    def resync(
+        self,
+        guilds: List[discord.Guild],
+        channels: List[discord.ChannelType],
+        users: List[discord.User],
+    ) -> Dict[str, int]:
+        """Brings an initialized Cidder up to date with the bot's state after a reconnect, without
+        reloading anything. Guilds joined or left and channels created or deleted while disconnected
+        are added to or removed from the entity registry. RPs keep the registry's guilds, so they
+        don't need to be pointed at the bot's new objects.
+
+        Args:
+            guilds (List[discord.Guild]): Guilds the bot is in now.
+            channels (List[discord.ChannelType]): Channels the bot can see now.
+            users (List[discord.User]): Users the bot can see now.
+
+        Returns:
+            Dict[str, int]: Number of guilds joined and left.
+        """
+        current = {guild.id: guild for guild in guilds}
+
+        joined = [guild for guild_id, guild in current.items() if guild_id not in self.entities]
+        left = [guild for guild in self.guilds if guild.id not in current]
+
+        for guild in left:
+            logging.info("Left guild %s while disconnected.", guild)
+            self.remove_guild(guild)
+        for guild in joined:
+            logging.info("Joined guild %s while disconnected.", guild)
+            self.add_guild(guild)
+
+        self.entities.sync_channels(channels)
+        self.entities.user_count = len(users)
+
+        # channels may have moved, e.g. if an update channel was only visible again after reconnecting
+        moved = 0
+        for rp in self.rps:
+            if self._rp_owners.get(rp) != self._get_owning_shard_id(rp):
+                self._disown_rp(rp)
+                self._own_rp(rp)
+                moved += 1
+
+        logging.info(
+            "Resynced after reconnecting: %s guilds joined, %s left, %s RPs moved to another shard.",
+            len(joined),
+            len(left),
+            moved,
+        )
+        return {"joined": len(joined), "left": len(left), "moved": moved}
+
+    async def shutdown(self) -> None:
+        """Stops the schedulers and every background task, saves RP state, sends any queued messages
+        and closes the database. Called by the bot when it closes, while it can still send messages."""
+        for scheduler in self.schedulers:
+            scheduler.stop()
+        # not half way through setting up what's stopped below
+        await self.tasks.cancel(DATABASE_TASK)
+        if self.rp_state_writer:
+            # let it save whatever is left before it stops
+            self.rp_state_writer.stop()
+            writer = self.tasks.get(STATE_WRITER_TASK)
+            if writer:
+                await writer
+        if self.worker_leases:
+            # hand the partitions over now, rather than once the leases expire
+            self.worker_leases.stop()
+            worker = self.tasks.get(WORKER_LEASE_TASK)
+            if worker:
+                await worker
+        await self.tasks.cancel_all()
+        await self.dispatcher.stop()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+            self.metrics_server = None
+        if self.database:
+            await self.database.close()
+
+    # ================================ RP updates ================================
+
+    def start_scheduler(self, bot: commands.Bot) -> None:
+        """Starts every shard's RP scheduler once the bot is ready. Schedulers that are already
+        running are left alone, e.g. when the Rp cog is reloaded.
+
+        Args:
+            bot (commands.Bot): The bot.
+        """
+        for shard in self.shards.values():
+            self.tasks.start(scheduler_task_name(shard.shard_id), self._run_scheduler(bot, shard))
+
+    async def _run_scheduler(self, bot: commands.Bot, shard: ShardPartition) -> None:
+        await bot.wait_until_ready()
+        await shard.scheduler.run()
+
+    @property
+    def schedulers(self) -> List[RpScheduler]:
+        return [shard.scheduler for shard in self.shards.values()]
+
+    @property
+    def next_deadline(self) -> Optional[datetime]:
+        """Earliest deadline over every shard's scheduler, or None if nothing is scheduled."""
+        deadlines = [scheduler.next_deadline for scheduler in self.schedulers]
+        return min((deadline for deadline in deadlines if deadline), default=None)
+
+    async def run_pending(self, now: Optional[datetime] = None) -> List[RpHandler]:
+        """Fires every RP that is due as of `now`, on every shard. See `RpScheduler.run_pending()`."""
+        fired = []
+        for scheduler in self.schedulers:
+            fired += await scheduler.run_pending(now)
+        return fired
+
+    def get_lateness_stats(self) -> Dict[str, float]:
+        """Scheduling lateness statistics over every shard, in seconds. See `RpScheduler.get_lateness_stats()`."""
+        per_shard = [scheduler.get_lateness_stats() for scheduler in self.schedulers]
+        fired = sum(stats["fired"] for stats in per_shard)
+        return {
+            "fired": fired,
+            "batches": sum(stats["batches"] for stats in per_shard),
+            "mean": sum(stats["mean"] * stats["fired"] for stats in per_shard) / fired if fired else 0.0,
+            "max": max((stats["max"] for stats in per_shard), default=0.0),
+        }
+
+    def set_update_handler(
+        self, handler: Optional[Callable[..., Awaitable[None]]]
+    ) -> None:
+        """Sets what updates RPs when they are due (the Rp cog's `update_rps`).
+
+        While there is no handler, e.g. in the middle of a cog reload, due RPs wait for the next one
+        instead of being skipped.
+
+        Args:
+            handler (Optional[Callable[..., Awaitable[None]]]): Coroutine function called with the RPs
+                that are due, or None to unset it. Called with `advance=False` for RPs whose dates have
+                already moved on, which only need announcing and saving.
+        """
+        self._update_handler = handler
+        if handler:
+            self._update_handler_set.set()
+        else:
+            self._update_handler_set.clear()
+
+    async def _on_rps_due(self, rps: List[RpHandler]) -> None:
+        if self.worker_leases:
+            rps = await self._claim_rps(rps)
+            if not rps:
+                return
+
+        while not self._update_handler:
+            await self._update_handler_set.wait()
+        await self._update_handler(rps)
+
+    async def _claim_rps(self, rps: List[RpHandler]) -> List[RpHandler]:
+        """In worker mode, claims due RPs for this worker. RPs that another worker announces are still
+        advanced here, so that this worker's commands show the right dates, but not saved. If nobody
+        held their partition, this worker may still claim them later, see `_on_late_claims()`.
+
+        Args:
+            rps (List[RpHandler]): Due RPs.
+
+        Returns:
+            List[RpHandler]: RPs this worker should update.
+        """
+        claimed = await self.worker_leases.claim(rps)
+        claimed_set = set(claimed)
+        for rp in rps:
+            if rp not in claimed_set:
+                rp.update()
+                if rp in self.clock_store:
+                    self.clock_store.update(rp)
+        return claimed
+
+    def _on_late_claims(self, rps: List[RpHandler]) -> None:
+        """In worker mode, called by the lease heartbeat with RPs whose increments were due while nobody
+        held their partition, and that this worker has now claimed. They were advanced by `_claim_rps()`
+        already, so they are only announced and saved - in the background, as the heartbeat can't wait
+        for the update handler."""
+        self._late_rps += rps
+        if LATE_CLAIMS_TASK not in self.tasks:
+            self.tasks.start(LATE_CLAIMS_TASK, self._announce_late_claims())
+
+    async def _announce_late_claims(self) -> None:
+        while self._late_rps:
+            while not self._update_handler:
+                await self._update_handler_set.wait()
+            rps, self._late_rps = self._late_rps, []
+            await self._update_handler(rps, advance=False)
+
+    def notify_rps_updated(self, rps: List[RpHandler]) -> None:
+        """Called after RPs' dates change, to refresh their clocks and queue their state to be saved.
+
+        Args:
+            rps (List[RpHandler]): Updated RPs.
+        """
+        for rp in rps:
+            if rp in self.clock_store:
+                self.clock_store.update(rp)
+
+        if not self.rp_state_writer:
+            return
+
+        for rp in rps:
+            self.rp_state_writer.mark_dirty(rp)
 
     def _intialized_check(self) -> bool:
         if not self._initialized:
@@ -79,6 +569,123 @@ class Cidder:
             return False
         return True
 
+    # ================================ RP index ================================
+
+    def register_rp(self, rp: RpHandler) -> None:
+        """Adds an RP to Cidder and indexes it under each of its guilds.
+
+        Args:
+            rp (RpHandler): RP to add.
+        """
+        if rp in self.rps:
+            logging.warning("%s is already registered.", rp)
+            return
+
+        self.rps.append(rp)
+        self.clock_store.add(rp)
+        self._own_rp(rp)
+        for guild in rp.guilds:
+            self._index_rp(guild.id, rp)
+
+    def remove_rp(self, rp: RpHandler) -> bool:
+        """Removes an RP from Cidder and from the guild index.
+
+        Args:
+            rp (RpHandler): RP to remove.
+
+        Returns:
+            bool: Whether the RP was registered.
+        """
+        if rp not in self.rps:
+            return False
+
+        self.rps.remove(rp)
+        self.clock_store.remove(rp)
+        self._disown_rp(rp)
+        for guild in rp.guilds:
+            self._unindex_rp(guild.id, rp)
+        return True
+
+    def add_guild_to_rp(self, rp: RpHandler, guild: discord.Guild) -> None:
+        """Makes an RP available in another guild.
+
+        Args:
+            rp (RpHandler): RP to add the guild to.
+            guild (discord.Guild): Guild to add.
+        """
+        if any(g.id == guild.id for g in rp.guilds):
+            return
+
+        # the registry's guild if there is one, rather than keeping discord.py's object alive
+        rp.guilds.append(self.entities.get_guild(guild.id) or guild)
+        if rp in self.rps:
+            self._index_rp(guild.id, rp)
+
+    def remove_guild_from_rp(self, rp: RpHandler, guild: discord.Guild) -> None:
+        """Removes a guild from an RP.
+
+        Args:
+            rp (RpHandler): RP to remove the guild from.
+            guild (discord.Guild): Guild to remove.
+        """
+        rp.guilds[:] = [g for g in rp.guilds if g.id != guild.id]
+        self._unindex_rp(guild.id, rp)
+
+    def add_guild(self, guild: discord.Guild) -> None:
+        """Called when the bot joins a guild. New guilds have no RPs until one is added to them.
+
+        Args:
+            guild (discord.Guild): Joined guild.
+        """
+        self.entities.add_guild(guild)
+
+    def remove_guild(self, guild: discord.Guild) -> None:
+        """Called when the bot leaves a guild. Removes the guild from every RP that uses it.
+
+        Args:
+            guild (discord.Guild): Removed guild.
+        """
+        self.entities.remove_guild(guild.id)
+        for rp in self.get_shard_for_guild(guild.id).get_rps_for_guild(guild.id):
+            self.remove_guild_from_rp(rp, guild)
+
+    async def set_guild_prefix(self, guild_id: int, prefix: Optional[str]) -> bool:
+        """Changes a guild's command prefix, saving it to the database first if there is one.
+
+        Args:
+            guild_id (int): Guild id.
+            prefix (Optional[str]): New prefix. None (or the default prefix) goes back to the default.
+
+        Returns:
+            bool: Whether the prefix was saved. If not, it's saved once the database is open (see
+                `is_database_connecting`), or without a database it only lasts until the bot restarts.
+        """
+        saved = self.prefix_repository is not None
+        if prefix is None or prefix == self.prefixes.default_prefix:
+            if saved:
+                await self.prefix_repository.delete(guild_id)
+            self.prefixes.reset(guild_id, saved)
+            return saved
+
+        if saved:
+            await self.prefix_repository.save(guild_id, prefix)
+        self.prefixes.set(guild_id, prefix, saved)
+        return saved
+
+    def add_channel(self, channel: discord.abc.GuildChannel) -> None:
+        """Called when a channel is created in one of the bot's guilds."""
+        self.entities.add_channel(channel)
+
+    def remove_channel(self, channel: discord.abc.GuildChannel) -> None:
+        """Called when a channel is deleted from one of the bot's guilds."""
+        self.entities.remove_channel(channel.id)
+
+    def _index_rp(self, guild_id: int, rp: RpHandler) -> None:
+        self.get_shard_for_guild(guild_id).index(guild_id, rp)
+
+    def _unindex_rp(self, guild_id: int, rp: RpHandler) -> None:
+        self.get_shard_for_guild(guild_id).unindex(guild_id, rp)
+
     def get_rps_for_guild(self, guild: discord.Guild) -> List[RpHandler]:
         """Returns a list of RPs associated with a particular guild.
 
@@ -88,7 +695,80 @@ class Cidder:
         Returns:
             List[RpHandler]: List[RpHandler]: List of RP handlers.
         """
-        if not self._intialized_check():
+        if not self._intialized_check() or guild is None:
             return []
 
-        return [rp for rp in self.rps if guild in rp.guilds]
+        return self.get_shard_for_guild(guild.id).get_rps_for_guild(guild.id)
+
+    def get_rp_for_guild(
+        self, guild: discord.Guild, name: Optional[str] = None
+    ) -> Optional[RpHandler]:
+        """Returns a single RP in a guild.
+
+        Args:
+            guild (discord.Guild): Guild the RP is in.
+            name (Optional[str], optional): Name of the RP (case insensitive). Only required when
+                the guild has more than one RP. Defaults to None.
+
+        Returns:
+            Optional[RpHandler]: The RP, or None if there is no RP (or more than one, without a name).
+        """
+        rps = self.get_rps_for_guild(guild)
+
+        if name is not None:
+            name = name.lower()
+            return next((rp for rp in rps if rp.name.lower() == name), None)
+
+        if len(rps) == 1:
+            return rps[0]
+        return None
+
+    # ================================ Shards ================================
+
+    def _setup_shards(self, shard_count: int) -> None:
+        if self.rps:
+            raise ValueError("can't change the number of shards after RPs are registered")
+
+        self.shard_count = shard_count
+        self._rp_owners = {}
+        self.shards = {
+            shard_id: ShardPartition(shard_id, self._on_rps_due, self.clock)
+            for shard_id in range(shard_count)
+        }
+
+    def get_shard_for_guild(self, guild_id: int) -> ShardPartition:
+        return self.shards[shard_id_for_guild(guild_id, self.shard_count)]
+
+    def _get_owning_shard_id(self, rp: RpHandler) -> int:
+        """The shard with the guild of the RP's update channel, or with its first guild if the
+        channel isn't known."""
+        guild_id = self.entities.get_channel_guild_id(rp.channel_id)
+        if guild_id is None and rp.guilds:
+            guild_id = rp.guilds[0].id
+        if guild_id is None:
+            return 0
+        return shard_id_for_guild(guild_id, self.shard_count)
+
+    def get_shard_stats(self) -> Dict[int, Dict[str, int]]:
+        """Returns, per shard id, the number of guilds on the shard, RPs it owns and timers it runs."""
+        stats = {
+            shard_id: {"guilds": 0, "rps": len(shard.rps), "scheduled": len(shard.scheduler)}
+            for shard_id, shard in self.shards.items()
+        }
+        for guild in self.guilds:
+            stats[shard_id_for_guild(guild.id, self.shard_count)]["guilds"] += 1
+        return stats
+
+    def get_owner_shard(self, rp: RpHandler) -> Optional[ShardPartition]:
+        """Returns the shard that runs an RP's timer, or None if the RP isn't registered."""
+        shard_id = self._rp_owners.get(rp)
+        return None if shard_id is None else self.shards[shard_id]
+
+    def _own_rp(self, rp: RpHandler) -> None:
+        shard_id = self._rp_owners[rp] = self._get_owning_shard_id(rp)
+        self.shards[shard_id].own(rp)
+
+    def _disown_rp(self, rp: RpHandler) -> None:
+        shard_id = self._rp_owners.pop(rp, None)
+        if shard_id is not None:
+            self.shards[shard_id].disown(rp)
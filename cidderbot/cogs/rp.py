@@ -1,21 +1,31 @@
 import asyncio
 import logging
-import math
-from datetime import datetime, timedelta, timezone
-from typing import List
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
 
 import discord
+from discord import app_commands
 from discord.ext import commands
 
+from cidderbot.calendars.gregorian import GregorianCalendar
+from cidderbot.messaging.dispatcher import MessageDispatcher
+from cidderbot.messaging.response_cache import CachedResponse, ResponseCache
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.scheduling.clock_store import us_array_to_datetimes
+from cidderbot.utils.memory import deep_sizeof, format_bytes
+from cidderbot.utils.string_utils.validators import validate_command_prefix
 from cidderbot.utils.time_formatters import (
     TimeUnit,
     convert_datetime_to_utc_timestamp,
-    convert_time_unit_string,
     format_timedelta,
-    get_time_unit_mapping,
 )
 
 
+# in seconds, updates are scheduled to the second at best
+UPDATE_LATENESS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
 # I can't type annotate cidder because of circular imports. Must mean this whole thing is incredibly jank.
 # And there probably is a "correct" way I can't be arsed to figure out.
 class Rp(commands.Cog):
@@ -24,73 +34,313 @@ class Rp(commands.Cog):
         self.bot = bot
         self.cidder = cidder
 
-        for rp in self.cidder.rps:
-            self.bot.loop.create_task(self.update_rp_regular_task(rp))
+        # rendered rp!date / rp!info responses, per RP
+        self.response_cache = ResponseCache()
+
+        self._setup_metrics()
+
+        # RPs and their scheduler belong to Cidder, so they carry on through reloads of this cog
+        self.cidder.set_update_handler(self.update_rps)
+        self.cidder.start_scheduler(self.bot)
+
+    @property
+    def dispatcher(self) -> MessageDispatcher:
+        return self.cidder.dispatcher
+
+    def _setup_metrics(self) -> None:
+        metrics = self.cidder.metrics
+        self._command_seconds = metrics.histogram(
+            "cidder_command_seconds", "Command handling time.", ["command"]
+        )
+        self._commands_total = metrics.counter(
+            "cidder_commands_total", "Commands run, by result.", ["command", "result"]
+        )
+        self._update_lateness_seconds = metrics.histogram(
+            "cidder_rp_update_lateness_seconds",
+            "Delay between an RP's scheduled increment and its update running.",
+            buckets=UPDATE_LATENESS_BUCKETS,
+        )
+
+        # read when collected
+        metrics.gauge(
+            "cidder_gateway_latency_seconds", "Discord gateway heartbeat latency."
+        ).set_function(lambda: self.bot.latency)
+        metrics.gauge(
+            "cidder_response_cache_hit_ratio", "Hit rate of the rp!date / rp!info response cache."
+        ).set_function(lambda: self.response_cache.get_stats()["hit_rate"])
+
+        shard_latency = metrics.gauge(
+            "cidder_shard_latency_seconds", "Gateway heartbeat latency per shard.", ["shard"]
+        )
+        shard_guilds = metrics.gauge("cidder_shard_guilds", "Guilds per shard.", ["shard"])
+        shard_rps = metrics.gauge("cidder_shard_rps", "RPs owned per shard.", ["shard"])
+        for shard_id, shard in self.cidder.shards.items():
+            shard_latency.labels(str(shard_id)).set_function(
+                lambda shard_id=shard_id: self.get_shard_latencies().get(shard_id, float("nan"))
+            )
+            shard_guilds.labels(str(shard_id)).set_function(
+                lambda shard_id=shard_id: self.cidder.get_shard_stats()[shard_id]["guilds"]
+            )
+            shard_rps.labels(str(shard_id)).set_function(lambda shard=shard: len(shard.rps))
 
     # ====================== Commands START =======================================
 
-    @commands.command()
-    async def date(self, ctx: commands.Context):
+    @commands.hybrid_command()
+    @app_commands.describe(name="RP name, only needed if the server has more than one RP")
+    async def date(self, ctx: commands.Context, name: Optional[str] = None):
         """Shows the current date of the RP.
 
+        If the server has more than one RP, the RP name has to be given, e.g. `rp!date TheRP`.
+
         Example:
         The current date in <TheRP> is Jan 1970.
         Next year is in 1 day and 2 hours.
         """
-        rp: RpHandler = self._get_rp(ctx)
+        rp = await self._get_rp(ctx, name)
+        if not rp:
+            return
+
+        response = self.response_cache.get_or_build(
+            "date", rp, lambda: self._build_date_response(rp)
+        )
+        # only the countdown changes between unit boundaries
+        message = response.render(format_timedelta(rp.get_time_to_next_rp_unit(), 3, rp.locale))
+
+        await ctx.send(message)
 
+    def _build_date_response(self, rp: "RpHandler") -> CachedResponse:
         curr_time_str = rp.format_current_rp_time()
-        next_rp_time = format_timedelta(rp.get_time_to_next_rp_unit(), 3)
 
         # TODO this currently won't display any increment values - i.e. only shows Next year instead of Next 2 years.
         messsage_list = [
-            f"Current date in Sagrea is {curr_time_str}.",
-            f"-# *Next {rp.rp_datetime_unit.name.lower()} is in {next_rp_time}*",
+            f"Current date in {rp.name} is {curr_time_str}.",
+            f"-# *Next {rp.rp_datetime_unit.name.lower()} is in ",
         ]
 
-        message = "\n".join(messsage_list)
+        return CachedResponse(["\n".join(messsage_list), "*"])
 
-        await ctx.send(message)
-
-    @commands.command()
-    async def info(self, ctx: commands.Context):
+    @commands.hybrid_command()
+    @app_commands.describe(name="RP name, only needed if the server has more than one RP")
+    async def info(self, ctx: commands.Context, name: Optional[str] = None):
         """Shows a printout of the current info of the RP."""
-        rp: RpHandler = self._get_rp(ctx)
+        rp = await self._get_rp(ctx, name)
+        if not rp:
+            return
+
+        response = self.response_cache.get_or_build(
+            "info", rp, lambda: self._build_info_response(rp)
+        )
+        countdowns = [format_timedelta(rp.get_time_to_next_rp_unit(), 1, rp.locale)]
+        if rp.rp_datetime_unit != rp.rp_datetime_incr_unit:
+            countdowns.append(format_timedelta(rp.get_time_to_next_incr(), 1, rp.locale))
+        message = response.render(*countdowns)
 
+        await ctx.send(message)
+
+    def _build_info_response(self, rp: "RpHandler") -> CachedResponse:
         message_list = [
             f"### RP info for {rp.name}:",
             f"It is currently {rp.format_current_rp_time()}.",
-            f"Updates every {format_timedelta(rp.incr_interval)}.",
+            f"Updates every {format_timedelta(rp.incr_interval, locale=rp.locale)}.",
             "",
         ]
 
-        use_discord_timestamp = False
-
         # Now add "It will be X rp datetime in Y duration"
         # If both incr_unit and unit are the same, only include one
 
         # add unit first cuz assumed to be smaller.
         # currently discord timestamp is disabled based on user feedback
-        use = False
+        # countdowns are left as gaps between the parts, and filled in on every call
         next_unit_utc_timestamp = int(
             convert_datetime_to_utc_timestamp(rp.next_unit_datetime)
         )
-        next_rp_time = format_timedelta(rp.get_time_to_next_rp_unit(), 1)
-        message_list.append(
-            f"It will be {rp.format_next_rp_time()} in {next_rp_time}, at <t:{next_unit_utc_timestamp}:f>."
-        )
+        message_list.append(f"It will be {rp.format_next_rp_time()} in ")
+        parts = ["\n".join(message_list)]
+
+        tail = f", at <t:{next_unit_utc_timestamp}:f>."
         if rp.rp_datetime_unit != rp.rp_datetime_incr_unit:
             next_incr_utc_timestamp = int(
                 convert_datetime_to_utc_timestamp(rp.next_incr_datetime)
             )
-            next_rp_incr = format_timedelta(rp.get_time_to_next_incr(), 1)
-            message_list.append(
-                f"It will be {rp.format_next_rp_incr_time()} in {next_rp_incr}, at <t:{next_incr_utc_timestamp}:f>."
+            parts.append(tail + f"\nIt will be {rp.format_next_rp_incr_time()} in ")
+            tail = f", at <t:{next_incr_utc_timestamp}:f>."
+        parts.append(tail)
+
+        return CachedResponse(parts)
+
+    @commands.hybrid_command()
+    @app_commands.describe(date='RP date, e.g. "1 March 1975", optionally followed by "in <RP name>"')
+    async def when(self, ctx: commands.Context, *, date: str):
+        """Shows when the RP will reach a given date.
+
+        Example: `rp!when 1 March 1975`. If the server has more than one RP,
+        add the RP name at the end, e.g. `rp!when 1 March 1975 in TheRP`.
+        """
+        name = None
+        if " in " in date:
+            date, name = (part.strip() for part in date.rsplit(" in ", 1))
+
+        rp = await self._get_rp(ctx, name)
+        if not rp:
+            return
+
+        rp_dt = rp.calendar.parse(date)
+        if not rp_dt:
+            await ctx.send(f"Sorry, I don't understand the date {date}.")
+            return
+
+        target_str = rp.format_rp_time(rp_dt)
+        try:
+            real_dt = rp.real_time_when(rp_dt)
+        except ValueError:
+            if rp_dt < rp.rp_datetime:
+                await ctx.send(f"{target_str} has already passed in {rp.name}.")
+            else:
+                await ctx.send(f"{target_str} is too far ahead in {rp.name}.")
+            return
+
+        time_until = real_dt - self.cidder.clock()
+        if time_until <= timedelta(0):
+            await ctx.send(f"{target_str} has already passed in {rp.name}.")
+            return
+
+        real_utc_timestamp = int(convert_datetime_to_utc_timestamp(real_dt))
+        await ctx.send(
+            f"It will be {target_str} in {rp.name} in {format_timedelta(time_until, 2, rp.locale)}, "
+            f"at <t:{real_utc_timestamp}:f>."
+        )
+
+    @commands.hybrid_command()
+    @commands.is_owner()
+    @app_commands.default_permissions()
+    async def overview(self, ctx: commands.Context):
+        """Shows the current date of every RP the bot is running. Owner only."""
+        store = self.cidder.clock_store
+        if not store:
+            await ctx.send("There are no RPs running.")
+            return
+
+        # computed for every RP at once
+        now = self.cidder.clock()
+        current_times = us_array_to_datetimes(store.current_unit_times(now))
+        next_unit_times = us_array_to_datetimes(store.next_unit_datetimes(now))
+
+        message_list = [f"### {len(store)} RPs running:"]
+        message_length = len(message_list[0])
+        for i, (rp, current_time, next_unit_time) in enumerate(
+            zip(store.handlers, current_times, next_unit_times)
+        ):
+            line = (
+                f"- {rp.name}: {rp.format_rp_time(current_time)}, "
+                f"next {rp.rp_datetime_unit.name.lower()} <t:{int(next_unit_time.timestamp())}:R>"
+            )
+            # stay under Discord's message length limit
+            message_length += len(line) + 1
+            if message_length > 1900:
+                message_list.append(f"...and {len(store) - i} more.")
+                break
+            message_list.append(line)
+
+        await ctx.send("\n".join(message_list))
+
+    @commands.hybrid_command()
+    @commands.is_owner()
+    @app_commands.default_permissions()
+    async def stats(self, ctx: commands.Context):
+        """Shows the bot's metrics. Owner only."""
+        lateness = self.cidder.get_lateness_stats()
+        cache = self.response_cache.get_stats()
+        dispatcher = self.dispatcher.get_stats()
+
+        lines = [
+            f"gateway latency: {self.bot.latency * 1000:.0f}ms",
+            f"scheduler: {lateness['fired']} fired in {lateness['batches']} batches, "
+            f"lateness mean {lateness['mean']:.3f}s, max {lateness['max']:.3f}s",
+            f"messages: {dispatcher['sent']} sent, {dispatcher['coalesced']} coalesced, "
+            f"{dispatcher['failed']} failed, {dispatcher['queue_depth']} queued, "
+            f"latency mean {dispatcher['mean_send_latency']:.3f}s",
+            f"response cache: {cache['hit_rate']:.0%} hit rate ({cache['hits']} hits, {cache['size']} cached)",
+            f"timers: {sum(len(scheduler) for scheduler in self.cidder.schedulers)} "
+            f"for {len(self.cidder.rps)} RPs, "
+            f"tasks: {', '.join(self.cidder.tasks.names()) or 'none'}",
+        ]
+        if self.cidder.worker_leases:
+            worker = self.cidder.worker_leases.get_stats()
+            lines.append(
+                f"worker {worker['worker_id']}: {worker['partitions']}/{worker['partition_count']} partitions, "
+                f"{worker['live_workers']} live workers, {worker['claimed']} claimed "
+                f"({worker['late_claimed']} late), {worker['lost_claims']} lost, "
+                f"{worker['failed_heartbeats']} failed heartbeats"
+            )
+        lines += [""] + self.cidder.metrics.summarize()
+
+        # stay under Discord's message length limit
+        message = "\n".join(lines)
+        if len(message) > 1900:
+            message = message[:1900] + "\n..."
+        await ctx.send(f"```\n{message}\n```")
+
+    @commands.hybrid_command()
+    @commands.is_owner()
+    @app_commands.default_permissions()
+    async def shards(self, ctx: commands.Context):
+        """Shows each shard's gateway latency, guilds and RPs. Owner only."""
+        latencies = self.get_shard_latencies()
+
+        lines = [f"{'shard':<6} {'latency':>9} {'guilds':>7} {'RPs':>5} {'timers':>7}"]
+        for shard_id, stats in self.cidder.get_shard_stats().items():
+            latency = latencies.get(shard_id)
+            latency_str = f"{latency * 1000:.0f}ms" if latency is not None else "-"
+            lines.append(
+                f"{shard_id:<6} {latency_str:>9} {stats['guilds']:>7} {stats['rps']:>5} {stats['scheduled']:>7}"
             )
 
-        message = "\n".join(message_list)
+        message = "\n".join(lines)
+        await ctx.send(f"```\n{message}\n```")
+
+    def get_shard_latencies(self) -> Dict[int, float]:
+        """Gateway latency per shard id, in seconds."""
+        # only sharded bots have per-shard latencies
+        latencies = getattr(self.bot, "latencies", None)
+        if latencies is None:
+            return {0: self.bot.latency}
+        return dict(latencies)
+
+    @commands.hybrid_command()
+    @commands.is_owner()
+    @app_commands.default_permissions()
+    async def memory(self, ctx: commands.Context):
+        """Compares the memory used by the guild/channel registry with discord.py's guild cache. Owner only."""
+        registry = self.cidder.entities.get_memory_stats()
+        # deep size, including members, roles and channels. Can take a moment on big bots.
+        discord_bytes = deep_sizeof(list(self.bot.guilds))
+
+        lines = [
+            f"registry: {registry['guilds']} guilds, {registry['channels']} channels, "
+            f"{format_bytes(registry['bytes'])}",
+            f"discord.py guild cache: {len(self.bot.guilds)} guilds, {format_bytes(discord_bytes)}",
+            f"users seen: {registry['users']}",
+        ]
+        message = "\n".join(lines)
+        await ctx.send(f"```\n{message}\n```")
+
+    @commands.hybrid_command()
+    @commands.is_owner()
+    @app_commands.default_permissions()
+    async def reload(self, ctx: commands.Context):
+        """Reloads this cog's code without restarting the bot. RPs and their schedule are kept. Owner only."""
+        start = time.perf_counter()
+        try:
+            await self.bot.reload_extension(__name__)
+        except commands.ExtensionError as e:
+            # discord.py puts the previous version back
+            logging.error("Could not reload %s: %s", __name__, e, exc_info=e)
+            await ctx.send(f"Reload failed, still running the previous version: {e}")
+            return
 
-        await ctx.send(message)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logging.info("Reloaded %s in %.1fms.", __name__, elapsed_ms)
+        await ctx.send(f"Reloaded in {elapsed_ms:.0f}ms.")
 
     # @commands.command()
     # async def test(self, ctx: commands.Context):
@@ -105,26 +355,111 @@ class Rp(commands.Cog):
 
     #     await ctx.send(message)
 
+    @commands.hybrid_command()
+    @commands.guild_only()
+    async def prefix(self, ctx: commands.Context):
+        """Shows this server's prefix for text commands."""
+        await ctx.send(f"The command prefix here is `{self.cidder.prefixes.get(ctx.guild.id)}`.")
+
+    @commands.hybrid_command()
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.describe(prefix="New prefix, e.g. !. Leave out to go back to the default.")
+    async def setprefix(self, ctx: commands.Context, prefix: Optional[str] = None):
+        """Changes this server's prefix for text commands. Needs Manage Server."""
+        if prefix is not None and not validate_command_prefix(prefix):
+            await ctx.send("Prefixes have to be 1-10 characters long, without spaces.")
+            return
+
+        saved = await self.cidder.set_guild_prefix(ctx.guild.id, prefix)
+        message = f"The command prefix here is now `{self.cidder.prefixes.get(ctx.guild.id)}`."
+        if not saved:
+            if self.cidder.is_database_connecting:
+                message += " It will be saved once the database is connected."
+            else:
+                message += " It could not be saved, so it only lasts until the bot restarts."
+        await ctx.send(message)
+
+    @date.autocomplete("name")
+    @info.autocomplete("name")
+    async def _autocomplete_rp_name(
+        self, interaction: discord.Interaction, current: str
+    ) -> List[app_commands.Choice[str]]:
+        current = current.lower()
+        return [
+            app_commands.Choice(name=rp.name, value=rp.name)
+            for rp in self.cidder.get_rps_for_guild(interaction.guild)
+            if current in rp.name.lower()
+        ][:25]  # Discord's limit
+
     # ====================== Commands END =======================================
 
-    async def initialize(self) -> None:
-        """Asynchronous initializations required for Rp."""
-        # load scheduling events for all RPs
-        for rp in self.cidder.rps:
-            await self.update_rp_regular_task(rp)
+    async def cog_unload(self) -> None:
+        # the scheduler keeps running, due RPs wait for the next loaded cog
+        self.cidder.set_update_handler(None)
+
+    async def cog_before_invoke(self, ctx: commands.Context) -> None:
+        ctx.started_at = time.perf_counter()
 
-    def _get_rp(self, ctx: commands.Context) -> "RpHandler":
-        # very advanced code :+1:
-        return self.cidder.get_rps_for_guild(ctx.guild)[0]
+    async def cog_after_invoke(self, ctx: commands.Context) -> None:
+        duration_ms = (time.perf_counter() - ctx.started_at) * 1000
+        command_name = ctx.command.qualified_name
+        self._command_seconds.labels(command_name).observe(duration_ms / 1000)
+        self._commands_total.labels(
+            command_name, "failed" if ctx.command_failed else "ok"
+        ).inc()
+
+        logging.info(
+            "Command %s ran in %.1fms.",
+            ctx.command,
+            duration_ms,
+            extra={
+                "command": ctx.command,
+                "guild": ctx.guild.id if ctx.guild else None,
+                "channel": ctx.channel.id,
+                "duration_ms": round(duration_ms, 3),
+            },
+        )
+
+    async def _get_rp(
+        self, ctx: commands.Context, name: Optional[str] = None
+    ) -> Optional["RpHandler"]:
+        """Gets the RP a command refers to. If there isn't exactly one, tells the user why.
+
+        Args:
+            ctx (commands.Context): Command context.
+            name (Optional[str], optional): RP name given with the command. Defaults to None.
+
+        Returns:
+            Optional[RpHandler]: The RP, or None if it could not be determined.
+        """
+        rp = self.cidder.get_rp_for_guild(ctx.guild, name)
+        if rp:
+            return rp
+
+        rps = self.cidder.get_rps_for_guild(ctx.guild)
+        if not rps:
+            await ctx.send("There are no RPs in this server.")
+        elif name is not None:
+            await ctx.send(f"There is no RP called {name} in this server.")
+        else:
+            rp_names = ", ".join(rp.name for rp in rps)
+            await ctx.send(
+                f"There is more than one RP in this server, please specify one of: {rp_names}."
+            )
+        return None
 
     def _get_custom_messages(self, rp: "RpHandler") -> str:
         custom_messages = []
 
         rp_dt = rp.get_current_rp_unit_time()
 
-        # april fools - only if the increment unit is DAY
+        # april fools - only if the increment unit is DAY, and only in the calendar that has an April
+        # (other calendars' dates are only meaningful to the calendar itself)
         if (
             rp.rp_datetime_incr_unit == TimeUnit.DAY
+            and isinstance(rp.calendar, GregorianCalendar)
             and rp_dt.day == 1
             and rp_dt.month == 4
         ):
@@ -132,33 +467,54 @@ class Rp(commands.Cog):
 
         return "\n".join(custom_messages)
 
-    async def update_rp(self, rp: "RpHandler") -> bool:
+    async def update_rp(self, rp: "RpHandler", advance: bool = True) -> bool:
         """Updates the RP by incrementing the date,
-        and sends a message to the update channel id specified in the rp instance.
+        and queues a message to every update channel specified in the rp instance.
 
         Args:
             rp (RpHandler): rp instance to be updated.
+            advance (bool, optional): Whether to increment the date. Defaults to True, False only announces it,
+                for increments that were already made (see `RpWorkerLeases`).
 
         Returns:
             bool: Success: True; Failure: False
         """
+        if advance:
+            self._update_lateness_seconds.observe(
+                max((self.cidder.clock() - rp.next_incr_datetime).total_seconds(), 0)
+            )
 
-        if not rp.channel_id:
+        if not rp.channel_ids:
             # TODO: this should continue to update, just without sending an update message
-            logging.warning("%s: invalid channel id. Update cancelled.", rp)
+            logging.warning(
+                "%s: invalid channel id. Update cancelled.", rp, extra={"rp": rp.name}
+            )
             return False
-        channel = self.bot.get_channel(rp.channel_id)
 
-        if not channel:
+        channels = []
+        for channel_id in rp.channel_ids:
+            channel = self.bot.get_channel(channel_id)
+            if channel:
+                channels.append(channel)
+            else:
+                logging.warning(
+                    "%s: channel with id %s cannot be retrieved.",
+                    rp,
+                    channel_id,
+                    extra={"rp": rp.name, "channel": channel_id},
+                )
+
+        if not channels:
             logging.warning(
-                "%s: channel with id %s cannot be retrieved. Update cancelled.",
+                "%s: no update channels can be retrieved. Update cancelled.",
                 rp,
-                rp.channel_id,
+                extra={"rp": rp.name},
             )
             return False
 
         # update
-        rp.update()
+        if advance:
+            rp.update()
 
         # send message
         message = f"Time in {rp.name} is now {rp.format_current_rp_time()}."
@@ -166,299 +522,31 @@ class Rp(commands.Cog):
         # append extra messages depending on the RP
         message += self._get_custom_messages(rp=rp)
 
-        await channel.send(message)
+        # sent in the background, merged with other updates to the same channel
+        self.dispatcher.send_many(channels, message)
 
         return True
 
-    async def update_rp_regular_task(self, rp: "RpHandler"):
-        await self.bot.wait_until_ready()
-
-        # schedule next update event
-        logging.info(
-            "%s: Next Update event is scheduled in: %s",
-            rp,
-            rp.format_time_to_next_incr(),
-        )
-        time_till_next_update = rp.get_time_to_next_incr()
-        await asyncio.sleep(time_till_next_update.total_seconds())
-        await self.update_rp(rp)  # note - continues even on failure
-
-        while not self.bot.is_closed():
-            await asyncio.sleep(rp.incr_interval.total_seconds())
-            await self.update_rp(rp)
-
-
-# required global function for bot.load_extension()
-def setup(bot):
-    bot.add_cog(Rp(bot))
-
-
-class RpHandler:
-    """Class that encapsulates an RP instance."""
-
-    def __init__(
-        self,
-        name: str,
-        guilds: List[discord.Guild],
-        rp_datetime_unit: TimeUnit,
-        rp_datetime_incr_unit: TimeUnit,
-        rp_datetime: datetime,
-        rp_datetime_incr_amount: int,
-        last_datetime: datetime,
-        incr_interval: timedelta,
-        channel_id: int = 0,
-    ) -> None:
-        """Creates a new RpHandler instance to wrap an RP.
-
-        #TODO: in future this will probably only handle date information.
-
-        Args:
-            name (str): Name of this RP.
-            guilds (List[discord.Guild]): List of Guilds (servers). Currently using `discord.Guild`,
-                but expected to change in future to own class.
-            rp_datetime_unit (TimeUnit): Smallest unit to be tracked and displayed in this RP.
-            rp_datetime (datetime): Current RP date/time.
-            rp_datetime_incr_amount (int): Amount to be used for regular RP date/time increments.
-            rp_datetime_incr_unit (TimeUnit): Unit to be used for regular RP date/time increments.
-            last_datetime (datetime): Last real-life date/time that the RP was incremented on.
-            incr_interval (timedelta): Real-life time interval between RP date/time increments.
-            channel_id (int, optional): Channel id to send RP date/time increment messages to.
-                Defaults to 0, which disables update messages.
-                #TODO: this should be a list of channels.
-        """
-        self.guilds = guilds
-        self.name = name
-        self.rp_datetime_unit = rp_datetime_unit
-        self.rp_datetime_incr_unit = rp_datetime_incr_unit
-        self.rp_datetime = rp_datetime
-        self.rp_datetime_incr_amount = rp_datetime_incr_amount
-        self.prev_incr_datetime = last_datetime
-        self.next_incr_datetime = last_datetime + incr_interval
-        self.incr_interval = incr_interval
-        self.channel_id = channel_id
-
-        # number of units in an increment interval
-        self.num_units_in_incr = rp_datetime_incr_amount * get_time_unit_mapping(
-            self.rp_datetime_incr_unit, rp_datetime_unit
-        )
-
-        # loaded parameters may be out of date, so update them to current.
-        self._update_date_to_current()
-
-        logging.info("%s loaded. Current time: %s", self, self.format_current_rp_time())
-
-    def __repr__(self) -> str:
-        return f"<RP: {self.name}>"
-
-    def _update_date_to_current(self) -> None:
-        """Updates the date of the rp to the correct current date based on how many update cycles may have passed
-        since the loaded start time.
-
-        Also updates prev and next incr_time
-
-        Accounts for incorrect start times.
-        """
-        duration_since_start = datetime.now(timezone.utc) - self.prev_incr_datetime
-        if duration_since_start < self.incr_interval:
-            return
-
-        update_count = math.floor(duration_since_start / self.incr_interval)
-
-        self.rp_datetime = self.add_to_datetime(
-            self.rp_datetime,
-            self.rp_datetime_incr_unit,
-            update_count * self.rp_datetime_incr_amount,
-        )
-
-        # update incr times
-        self.prev_incr_datetime += update_count * self.incr_interval
-        self.next_incr_datetime = self.prev_incr_datetime + self.incr_interval
-
-    def update(self) -> None:
-        """Updates the in-universe and real dates of this RP instance."""
-        prev_rp_dt = self.rp_datetime
-        self.rp_datetime = self.add_to_datetime(
-            self.rp_datetime,
-            self.rp_datetime_incr_unit,
-            self.rp_datetime_incr_amount,
-        )
-
-        self.prev_incr_datetime = self.next_incr_datetime
-        self.next_incr_datetime += self.incr_interval
-
-        logging.info(
-            "%s has been updated from %s to %s. Next update is in %s.",
-            self,
-            convert_time_unit_string(prev_rp_dt, self.rp_datetime_incr_unit),
-            self.format_current_rp_time(),
-            self.format_time_to_next_incr(),
-        )
-
-    def add_to_datetime(
-        self, initial: datetime, unit: TimeUnit, value: int
-    ) -> datetime:
-        """Add a given datetime by an amount value * unit.
+    async def update_rps(self, rps: List["RpHandler"], advance: bool = True) -> None:
+        """Updates a batch of RPs that are due at the same time. Called by the scheduler.
 
         Args:
-            initial (datetime): Initial datetime to add to.
-            unit (TimeUnit): Unit of time.
-            value (int): Amount of unit to add by. Accepts positive integer values only.
-
-        Returns:
-            datetime: Added datetime.
+            rps (List[RpHandler]): RPs to be updated.
+            advance (bool, optional): Whether to increment their dates, see `update_rp()`. Defaults to True.
         """
-        # negative check
-        if value < 0:
-            logging.warning("Tried to add a negative value %s. Not allowed.", value)
-            return initial
-
-        # Month and year need this kinda code to add, otherwise not necessary.
-        # Saying this is going to bite me in the ass because I think I missed out leap years' days.
-        if unit == TimeUnit.YEAR:
-            # temp = value + initial.year
-            new = initial.replace(year=value + initial.year)
-            return new
-        elif unit == TimeUnit.MONTH:
-            years, months = divmod(value, 12)
-            return initial.replace(
-                year=years + initial.year,
-                month=months + initial.month,
-            )
-
-        add_delta = timedelta(seconds=unit.value * value)
-
-        return initial + add_delta
-
-    # ================================ Time GETTERS =============================================
-
-    @property
-    def next_unit_datetime(self) -> datetime:
-        now = datetime.now(timezone.utc)
-        time_since_incr = now - self.prev_incr_datetime
-        fraction_elapsed = time_since_incr / self.incr_interval
-
-        num_units_next_unit_time = math.ceil(fraction_elapsed * self.num_units_in_incr)
-
-        # These are some variable names.
-        next_unit_time_irl_time_from_last_incr = (
-            num_units_next_unit_time / self.num_units_in_incr * self.incr_interval
+        results = await asyncio.gather(
+            *(self.update_rp(rp, advance) for rp in rps), return_exceptions=True
         )
+        for rp, result in zip(rps, results):
+            if isinstance(result, BaseException):
+                logging.error(
+                    "%s: update failed: %s", rp, result, extra={"rp": rp.name}
+                )
 
-        return next_unit_time_irl_time_from_last_incr + self.prev_incr_datetime
-
-    def get_time_to_next_incr(self) -> timedelta:
-        """Gets the real-life time until the next increment is scheduled.
-
-        Returns:
-            timedelta: Time until the next increment.
-        """
-        now = datetime.now(timezone.utc)
-        difference = self.next_incr_datetime - now
-        return difference
-
-    def get_time_to_next_rp_unit(self) -> timedelta:
-        """Gets the time until the next RP time based on the specified precision unit.
-
-        Returns:
-            timedelta: Time until the next RP time.
-        """
-        now = datetime.now(timezone.utc)
-        time_to_next_unit_time = self.next_unit_datetime - now
+        # queue the new dates to be saved, as one batch
+        self.cidder.notify_rps_updated(rps)
 
-        return time_to_next_unit_time
-
-    def get_current_rp_unit_time(self) -> datetime:
-        """Gets the current RP time, precision is the unit specified in the RP parameters.
-
-        Returns:
-            datetime: Current RP unit time.
-        """
-        now = datetime.now(timezone.utc)
-        time_since_incr = now - self.prev_incr_datetime
-        fraction_elapsed = time_since_incr / self.incr_interval
-
-        num_units_elapsed = math.floor(fraction_elapsed * self.num_units_in_incr)
-
-        new_dt = self.add_to_datetime(
-            initial=self.rp_datetime,
-            unit=self.rp_datetime_unit,
-            value=num_units_elapsed,
-        )
-
-        return new_dt
-
-    def get_next_rp_unit_time(self) -> datetime:
-        """Gets the next RP time, precision is the unit specified in the RP parameters.
-
-        Returns:
-            datetime: Next RP unit time.
-        """
-        now = datetime.now(timezone.utc)
-        time_since_incr = now - self.prev_incr_datetime
-        fraction_elapsed = time_since_incr / self.incr_interval
-
-        num_units_elapsed_next = math.ceil(fraction_elapsed * self.num_units_in_incr)
-
-        new_dt = self.add_to_datetime(
-            initial=self.rp_datetime,
-            unit=self.rp_datetime_unit,
-            value=num_units_elapsed_next,
-        )
-
-        return new_dt
-
-    # ================================ FORMATTED RETURNS =================================
-
-    def format_current_rp_time(self) -> str:
-        """Formats the current in-RP time, based on the unit used for the RP.
-
-        Returns:
-            str: Formatted time as a string.
-        """
-        return convert_time_unit_string(
-            self.get_current_rp_unit_time(), self.rp_datetime_unit
-        )
-
-    def format_current_rp_incr_time(self) -> str:
-        """Formats the current in-RP time, based on the increment unit used for the RP.
-
-        Returns:
-            str: Formatted time as a string.
-        """
-        return convert_time_unit_string(
-            self.get_current_rp_unit_time(), self.rp_datetime_incr_unit
-        )
-
-    def format_next_rp_time(self) -> str:
-        """Formats the in-RP time as of the next increment, based on the unit used for the RP.
-
-        Returns:
-            str: Formatted next unit time as a string.
-        """
-        return convert_time_unit_string(
-            self.get_next_rp_unit_time(), self.rp_datetime_unit
-        )
-
-    def format_next_rp_incr_time(self) -> str:
-        """Formats the in-RP time as of the next increment, based on the increment unit used for the RP.
-
-        Returns:
-            str: Formatted next increment time as a string.
-        """
-        return convert_time_unit_string(
-            dt=self.add_to_datetime(
-                initial=self.rp_datetime,
-                unit=self.rp_datetime_incr_unit,
-                value=self.rp_datetime_incr_amount,
-            ),
-            unit=self.rp_datetime_incr_unit,
-        )
-
-    def format_time_to_next_incr(self) -> str:
-        """Formats the real-life duration to the next increment
-
-        Returns:
-            str: Formatted duration to next increment.
-        """
 
-        return format_timedelta(self.get_time_to_next_incr())
+# entry point for bot.load_extension() / bot.reload_extension(), which needs `bot.cidder` to be set
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(Rp(bot, bot.cidder))
@@ -1,48 +1,206 @@
+import asyncio
 import logging
 import os
+import platform
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, List, Optional, Sequence
 
-import psycopg
-
+from cidderbot.database.db_exceptions import DatabaseNotConnectedException
 from cidderbot.utils.logging_utils.log_config import LogConfig
 
+# psycopg is only imported once the pool is opened, so starting without a database doesn't pay for it
+if TYPE_CHECKING:
+    import psycopg
+    from psycopg_pool import AsyncConnectionPool
+
 
 class Database:
-    """Class that handles communication with the PostgreSQL database."""
+    """Class that handles communication with the PostgreSQL database.
+
+    Connections come from a bounded async connection pool, so queries never block the event loop.
+    The pool is only created when `open()` is called (i.e. when the bot starts), not on construction.
+    """
 
-    def __init__(self, host: str = os.getenv("DB_HOST")) -> None:
-        """Initialises a connection to the database.
+    DEFAULT_PORT = 5432  # default PostgreSQL port
+    DEFAULT_MIN_SIZE = 1
+    DEFAULT_MAX_SIZE = 10
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        min_size: int = DEFAULT_MIN_SIZE,
+        max_size: int = DEFAULT_MAX_SIZE,
+        timeout: float = 10.0,
+    ) -> None:
+        """Creates an unconnected database handler. No I/O happens until `open()`.
 
         Args:
-            host (str): Host name override. Defaults to the host name supplied in the environment.
+            host (Optional[str], optional): Host name override. Defaults to None, in which case the host
+                name supplied in the environment (`DB_HOST`) is used when connecting.
+            min_size (int, optional): Minimum number of pooled connections. Defaults to 1.
+            max_size (int, optional): Maximum number of pooled connections. Defaults to 10.
+            timeout (float, optional): Maximum time in seconds to wait for a connection
+                from the pool before giving up. Defaults to 10.0.
         """
-
         self._logger = logging.getLogger()
-        self._conn = None
+        self._host = host
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self._pool: Optional["AsyncConnectionPool"] = None
+
+    @staticmethod
+    def is_configured() -> bool:
+        """Whether database settings are present in the environment."""
+        return bool(os.getenv("DB_HOST") or os.getenv("DB_NAME"))
+
+    @property
+    def is_open(self) -> bool:
+        return self._pool is not None and not self._pool.closed
+
+    def _get_conninfo(self) -> str:
+        from psycopg.conninfo import make_conninfo  # pylint: disable=import-outside-toplevel
+
+        # read the environment when connecting, as .env is only loaded on bot startup
+        return make_conninfo(
+            dbname=os.getenv("DB_NAME"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            host=self._host or os.getenv("DB_HOST"),
+            port=int(os.getenv("DB_PORT", str(self.DEFAULT_PORT))),
+        )
+
+    # ================================ Pool lifecycle ================================
+
+    async def open(
+        self,
+        retries: int = 5,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ) -> bool:
+        """Opens the connection pool, retrying with exponential backoff if the database is unreachable.
+
+        Once open, the pool checks connections before handing them out and reconnects
+        (again with backoff) in the background if connections are lost.
+
+        Args:
+            retries (int, optional): Number of attempts before giving up. Defaults to 5.
+            initial_backoff (float, optional): Seconds to wait after the first failure. Defaults to 1.0.
+            max_backoff (float, optional): Maximum seconds to wait between attempts. Defaults to 60.0.
+
+        Returns:
+            bool: Whether the pool was opened.
+        """
+        if self.is_open:
+            return True
 
-        # initiate connection
-        dbhost = host
-        dbname = os.getenv("DB_NAME")
-        dbuser = os.getenv("DB_USER")
-        dbpassword = os.getenv("DB_PASSWORD")
+        # pylint: disable=import-outside-toplevel
+        import psycopg
+        from psycopg_pool import AsyncConnectionPool, PoolTimeout
 
-        db_config = {
-            "dbname": dbname,
-            "user": dbuser,
-            "password": dbpassword,
-            "host": dbhost,
-            "port": 5432,  # default PostgreSQL port
-        }
+        backoff = initial_backoff
+        for attempt in range(1, retries + 1):
+            pool = AsyncConnectionPool(
+                self._get_conninfo(),
+                min_size=self.min_size,
+                max_size=self.max_size,
+                open=False,
+                check=AsyncConnectionPool.check_connection,
+                timeout=self.timeout,
+                name="cidder",
+            )
+            try:
+                await pool.open(wait=True, timeout=self.timeout)
+                self._pool = pool
+                self._logger.info(
+                    "Connected to the database (pool size %s-%s).",
+                    self.min_size,
+                    self.max_size,
+                )
+                return True
 
-        try:
-            conn = psycopg.connect(**db_config)
-            self._logger.info("Connected to the database.")
-            self._conn = conn
+            except (PoolTimeout, psycopg.Error) as e:
+                await pool.close()
+                self._logger.error(
+                    "Unable to connect to the database (attempt %s/%s): %s",
+                    attempt,
+                    retries,
+                    e,
+                )
 
-        except psycopg.Error as e:
-            self._logger.error("Unable to connect to the database: %s", e)
+            if attempt < retries:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max_backoff)
+
+        return False
+
+    async def close(self) -> None:
+        """Closes the connection pool."""
+        if self._pool:
+            await self._pool.close()
+            self._pool = None
+            self._logger.info("Database connection pool closed.")
+
+    # ================================ Queries ================================
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator["psycopg.AsyncConnection"]:
+        """Borrows a connection from the pool. The transaction is committed when the block exits
+        normally and rolled back on an exception.
+
+        Raises:
+            DatabaseNotConnectedException: If the pool is not open.
+
+        Yields:
+            psycopg.AsyncConnection: Pooled connection.
+        """
+        if not self.is_open:
+            raise DatabaseNotConnectedException("call open() first")
+
+        async with self._pool.connection(timeout=self.timeout) as conn:
+            yield conn
+
+    async def execute(self, query: str, params: Optional[Sequence[Any]] = None) -> None:
+        async with self.connection() as conn:
+            await conn.execute(query, params)
+
+    async def executemany(self, query: str, params_seq: List[Sequence[Any]]) -> None:
+        async with self.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(query, params_seq)
+
+    async def fetchone(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> Optional[tuple]:
+        async with self.connection() as conn:
+            cur = await conn.execute(query, params)
+            return await cur.fetchone()
+
+    async def fetchall(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[tuple]:
+        async with self.connection() as conn:
+            cur = await conn.execute(query, params)
+            return await cur.fetchall()
+
+    def get_stats(self) -> dict:
+        """Returns the pool's statistics (size, waiting requests, errors, etc.), or an empty dict if not open."""
+        if not self.is_open:
+            return {}
+        return self._pool.get_stats()
+
+
+async def _main():
+    db = Database()
+    if await db.open(retries=1):
+        await db.close()
 
 
 if __name__ == "__main__":
     LogConfig().setup(is_debug=True, filename="_DEV-database-log.txt")
 
-    db = Database()
+    if platform.system() == "Windows":
+        # psycopg's async connections don't work on the default Proactor event loop
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(_main())
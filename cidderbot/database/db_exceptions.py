@@ -0,0 +1,7 @@
+class DatabaseNotConnectedException(Exception):
+    def __init__(self, message=None):
+        # Call the base class constructor with the parameters it needs
+        if message:
+            super().__init__("Database is not connected: " + message)
+        else:
+            super().__init__("Database is not connected")
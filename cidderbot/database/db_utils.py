@@ -1,11 +1,11 @@
 import psycopg
 
 
-def table_exists(conn: psycopg.Connection, table_name: str) -> bool:
+async def table_exists(conn: psycopg.AsyncConnection, table_name: str) -> bool:
     """Check if a table exists in the database.
 
     Args:
-        conn (psycopg.Connection): Postgres connection.
+        conn (psycopg.AsyncConnection): Postgres connection.
         table_name (str): Table name to check.
 
     Returns:
@@ -20,6 +20,26 @@ def table_exists(conn: psycopg.Connection, table_name: str) -> bool:
         AND table_name = %s
     );
     """
-    with conn.cursor() as cur:
-        cur.execute(query, (table_name,))
-        return cur.fetchone()[0]
+    cur = await conn.execute(query, (table_name,))
+    row = await cur.fetchone()
+    return row[0]
+
+
+async def create_table_if_not_exists(
+    conn: psycopg.AsyncConnection, table_name: str, create_query: str
+) -> bool:
+    """Creates a table if it doesn't exist yet.
+
+    Args:
+        conn (psycopg.AsyncConnection): Postgres connection.
+        table_name (str): Table name to check.
+        create_query (str): `CREATE TABLE` statement to run if the table is missing.
+
+    Returns:
+        bool: Whether the table was created.
+    """
+    if await table_exists(conn, table_name):
+        return False
+
+    await conn.execute(create_query)
+    return True
@@ -0,0 +1,54 @@
+import logging
+from typing import Dict
+
+from cidderbot.database import db_utils
+from cidderbot.database.database import Database
+
+GUILD_PREFIX_TABLE = "guild_prefix"
+
+CREATE_GUILD_PREFIX_TABLE = f"""
+CREATE TABLE {GUILD_PREFIX_TABLE} (
+    guild_id BIGINT PRIMARY KEY,
+    prefix TEXT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+
+SELECT_GUILD_PREFIXES = f"SELECT guild_id, prefix FROM {GUILD_PREFIX_TABLE};"
+
+UPSERT_GUILD_PREFIX = f"""
+INSERT INTO {GUILD_PREFIX_TABLE} (guild_id, prefix) VALUES (%s, %s)
+ON CONFLICT (guild_id) DO UPDATE SET prefix = EXCLUDED.prefix, updated_at = now();
+"""
+
+DELETE_GUILD_PREFIX = f"DELETE FROM {GUILD_PREFIX_TABLE} WHERE guild_id = %s;"
+
+
+class PrefixRepository:
+    """Loads and saves guilds' command prefixes. Only guilds that changed their prefix have a row."""
+
+    def __init__(self, database: Database) -> None:
+        self.database = database
+
+    async def ensure_schema(self) -> None:
+        """Creates the guild prefix table if it does not exist."""
+        async with self.database.connection() as conn:
+            if await db_utils.create_table_if_not_exists(
+                conn, GUILD_PREFIX_TABLE, CREATE_GUILD_PREFIX_TABLE
+            ):
+                logging.info("Created table %s.", GUILD_PREFIX_TABLE)
+
+    async def load_all(self) -> Dict[int, str]:
+        """Loads every guild's prefix.
+
+        Returns:
+            Dict[int, str]: Guild id -> prefix.
+        """
+        rows = await self.database.fetchall(SELECT_GUILD_PREFIXES)
+        return dict(rows)
+
+    async def save(self, guild_id: int, prefix: str) -> None:
+        await self.database.execute(UPSERT_GUILD_PREFIX, (guild_id, prefix))
+
+    async def delete(self, guild_id: int) -> None:
+        await self.database.execute(DELETE_GUILD_PREFIX, (guild_id,))
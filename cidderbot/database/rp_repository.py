@@ -0,0 +1,304 @@
+import asyncio
+import logging
+from datetime import timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import discord
+import psycopg
+from psycopg_pool import PoolTimeout
+
+from cidderbot.calendars.registry import DEFAULT_CALENDAR, get_calendar
+from cidderbot.database import db_utils
+from cidderbot.database.database import Database
+from cidderbot.database.db_exceptions import DatabaseNotConnectedException
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.utils.time_formatters import DEFAULT_LOCALE, TimeUnit
+
+RP_STATE_TABLE = "rp_state"
+
+CREATE_RP_STATE_TABLE = f"""
+CREATE TABLE {RP_STATE_TABLE} (
+    name TEXT PRIMARY KEY,
+    guild_ids BIGINT[] NOT NULL DEFAULT '{{}}',
+    channel_id BIGINT NOT NULL DEFAULT 0,
+    rp_datetime_unit TEXT NOT NULL,
+    rp_datetime_incr_unit TEXT NOT NULL,
+    rp_datetime TIMESTAMPTZ NOT NULL,
+    rp_datetime_incr_amount INTEGER NOT NULL,
+    prev_incr_datetime TIMESTAMPTZ NOT NULL,
+    incr_interval_seconds BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    extra_channel_ids BIGINT[] NOT NULL DEFAULT '{{}}',
+    locale TEXT NOT NULL DEFAULT '{DEFAULT_LOCALE}',
+    calendar TEXT NOT NULL DEFAULT '{DEFAULT_CALENDAR}'
+);
+"""
+
+# for tables created before RPs could have more than one update channel
+ADD_EXTRA_CHANNEL_IDS_COLUMN = f"""
+ALTER TABLE {RP_STATE_TABLE} ADD COLUMN IF NOT EXISTS extra_channel_ids BIGINT[] NOT NULL DEFAULT '{{}}';
+"""
+
+# for tables created before RPs had a display language
+ADD_LOCALE_COLUMN = f"""
+ALTER TABLE {RP_STATE_TABLE} ADD COLUMN IF NOT EXISTS locale TEXT NOT NULL DEFAULT '{DEFAULT_LOCALE}';
+"""
+
+# for tables created before RPs could have their own calendar
+ADD_CALENDAR_COLUMN = f"""
+ALTER TABLE {RP_STATE_TABLE} ADD COLUMN IF NOT EXISTS calendar TEXT NOT NULL DEFAULT '{DEFAULT_CALENDAR}';
+"""
+
+RP_STATE_COLUMNS = (
+    "name",
+    "guild_ids",
+    "channel_id",
+    "rp_datetime_unit",
+    "rp_datetime_incr_unit",
+    "rp_datetime",
+    "rp_datetime_incr_amount",
+    "prev_incr_datetime",
+    "incr_interval_seconds",
+    "locale",
+    "calendar",
+    "extra_channel_ids",
+)
+
+SELECT_RP_STATES = f"SELECT {', '.join(RP_STATE_COLUMNS)} FROM {RP_STATE_TABLE} ORDER BY name;"
+
+# Every row is passed as one array per column and unnested server-side,
+# so any number of RPs is upserted in a single statement (and a single round trip).
+# guild_ids and extra_channel_ids are passed as array literals, as unnest() would flatten a 2D array.
+UPSERT_RP_STATES = f"""
+INSERT INTO {RP_STATE_TABLE} ({', '.join(RP_STATE_COLUMNS)})
+SELECT u.name, u.guild_ids::BIGINT[], u.channel_id, u.rp_datetime_unit, u.rp_datetime_incr_unit,
+    u.rp_datetime, u.rp_datetime_incr_amount, u.prev_incr_datetime, u.incr_interval_seconds, u.locale,
+    u.calendar, u.extra_channel_ids::BIGINT[]
+FROM unnest(
+    %s::TEXT[], %s::TEXT[], %s::BIGINT[], %s::TEXT[], %s::TEXT[],
+    %s::TIMESTAMPTZ[], %s::INTEGER[], %s::TIMESTAMPTZ[], %s::BIGINT[], %s::TEXT[], %s::TEXT[], %s::TEXT[]
+) AS u({', '.join(RP_STATE_COLUMNS)})
+ON CONFLICT (name) DO UPDATE SET
+    rp_datetime = EXCLUDED.rp_datetime,
+    prev_incr_datetime = EXCLUDED.prev_incr_datetime,
+    updated_at = now();
+"""
+
+
+def rp_to_row(rp: "RpHandler") -> tuple:
+    """Converts an RP into a row of the RP state table, in `RP_STATE_COLUMNS` order.
+
+    Args:
+        rp (RpHandler): RP to convert.
+
+    Returns:
+        tuple: Table row.
+    """
+    return (
+        rp.name,
+        "{" + ",".join(str(guild.id) for guild in rp.guilds) + "}",
+        rp.channel_id,
+        rp.rp_datetime_unit.name,
+        rp.rp_datetime_incr_unit.name,
+        rp.rp_datetime,
+        rp.rp_datetime_incr_amount,
+        rp.prev_incr_datetime,
+        int(rp.incr_interval.total_seconds()),
+        rp.locale,
+        rp.calendar.name,
+        "{" + ",".join(str(channel_id) for channel_id in rp.extra_channel_ids) + "}",
+    )
+
+
+def row_to_rp(row: tuple, guilds_by_id: Dict[int, discord.Guild]) -> "RpHandler":
+    """Creates an RP from a row of the RP state table.
+
+    Args:
+        row (tuple): Table row, in `RP_STATE_COLUMNS` order.
+        guilds_by_id (Dict[int, discord.Guild]): Guilds the bot is in. Guilds the bot is no longer in are skipped.
+
+    Raises:
+        ValueError: If the RP's calendar isn't loaded, rather than reading its dates as Gregorian ones.
+
+    Returns:
+        RpHandler: Loaded RP.
+    """
+    (
+        name,
+        guild_ids,
+        channel_id,
+        rp_datetime_unit,
+        rp_datetime_incr_unit,
+        rp_datetime,
+        rp_datetime_incr_amount,
+        prev_incr_datetime,
+        incr_interval_seconds,
+        locale,
+        calendar,
+        extra_channel_ids,
+    ) = row
+
+    guilds = [guilds_by_id[guild_id] for guild_id in guild_ids if guild_id in guilds_by_id]
+    if len(guilds) != len(guild_ids):
+        logging.warning("RP %s: some of its guilds %s are not available.", name, guild_ids)
+
+    return RpHandler(
+        name=name,
+        guilds=guilds,
+        rp_datetime_unit=TimeUnit[rp_datetime_unit],
+        rp_datetime_incr_unit=TimeUnit[rp_datetime_incr_unit],
+        # the database returns datetimes in the session's time zone
+        rp_datetime=rp_datetime.astimezone(timezone.utc),
+        rp_datetime_incr_amount=rp_datetime_incr_amount,
+        last_datetime=prev_incr_datetime.astimezone(timezone.utc),
+        incr_interval=timedelta(seconds=incr_interval_seconds),
+        channel_id=channel_id,
+        extra_channel_ids=extra_channel_ids,
+        locale=locale,
+        calendar=get_calendar(calendar),
+    )
+
+
+class RpRepository:
+    """Loads and saves RP clock state in the RP state table."""
+
+    def __init__(self, database: Database) -> None:
+        self.database = database
+
+    async def ensure_schema(self) -> None:
+        """Creates the RP state table if it does not exist."""
+        async with self.database.connection() as conn:
+            if await db_utils.create_table_if_not_exists(
+                conn, RP_STATE_TABLE, CREATE_RP_STATE_TABLE
+            ):
+                logging.info("Created table %s.", RP_STATE_TABLE)
+            else:
+                await conn.execute(ADD_EXTRA_CHANNEL_IDS_COLUMN)
+                await conn.execute(ADD_LOCALE_COLUMN)
+                await conn.execute(ADD_CALENDAR_COLUMN)
+
+    async def load_all(self, guilds: Iterable[discord.Guild]) -> List["RpHandler"]:
+        """Loads every RP with a single query.
+
+        Args:
+            guilds (Iterable[discord.Guild]): Guilds the bot is in.
+
+        Returns:
+            List[RpHandler]: Loaded RPs.
+        """
+        rows = await self.database.fetchall(SELECT_RP_STATES)
+        guilds_by_id = {guild.id: guild for guild in guilds}
+
+        return [row_to_rp(row, guilds_by_id) for row in rows]
+
+    async def upsert_many(self, rps: Iterable["RpHandler"]) -> int:
+        """Inserts or updates the state of several RPs in one statement.
+
+        Args:
+            rps (Iterable[RpHandler]): RPs to save.
+
+        Returns:
+            int: Number of RPs saved.
+        """
+        rows = [rp_to_row(rp) for rp in rps]
+        if not rows:
+            return 0
+
+        # transpose rows into one array per column
+        columns = [list(column) for column in zip(*rows)]
+        await self.database.execute(UPSERT_RP_STATES, columns)
+        return len(rows)
+
+
+class RpStateWriteBehind:
+    """Write-behind buffer for RP state.
+
+    Updated RPs are marked dirty, and are written out shortly afterwards as one batched upsert.
+    A burst of increments (e.g. every daily RP at midnight) therefore costs a single round trip,
+    and updates never wait on the database.
+    """
+
+    def __init__(self, repository: RpRepository, flush_delay: float = 1.0) -> None:
+        """Creates a write-behind buffer.
+
+        Args:
+            repository (RpRepository): Repository to write to.
+            flush_delay (float, optional): Seconds to wait after the first dirty RP before flushing,
+                so that RPs updated around the same time are batched together. Defaults to 1.0.
+        """
+        self.repository = repository
+        self.flush_delay = flush_delay
+
+        self._dirty: Dict[str, "RpHandler"] = {}
+        self._pending: Optional[asyncio.Event] = None
+        self._running = False
+
+        self.flush_count = 0
+        self.rows_written = 0
+        self.failed_flushes = 0
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+    def mark_dirty(self, rp: "RpHandler") -> None:
+        """Queues an RP to be saved. Only its latest state is written.
+
+        Args:
+            rp (RpHandler): Updated RP.
+        """
+        self._dirty[rp.name] = rp
+        if self._pending:
+            self._pending.set()
+
+    async def flush(self) -> int:
+        """Writes out all dirty RPs now. On failure they stay queued for the next flush.
+
+        Returns:
+            int: Number of RPs written.
+        """
+        if not self._dirty:
+            return 0
+
+        batch, self._dirty = self._dirty, {}
+        try:
+            written = await self.repository.upsert_many(batch.values())
+        except (psycopg.Error, PoolTimeout, DatabaseNotConnectedException) as e:
+            self.failed_flushes += 1
+            logging.error("Failed to save the state of %s RPs: %s", len(batch), e)
+
+            # requeue, without overwriting anything that was updated in the meantime
+            for name, rp in batch.items():
+                self._dirty.setdefault(name, rp)
+            return 0
+
+        self.flush_count += 1
+        self.rows_written += written
+        logging.debug("Saved the state of %s RPs.", written)
+        return written
+
+    async def run(self) -> None:
+        """Flushes dirty RPs in the background until `stop()` is called."""
+        self._running = True
+        self._pending = asyncio.Event()
+        if self._dirty:
+            self._pending.set()
+
+        try:
+            while self._running:
+                await self._pending.wait()
+                self._pending.clear()
+
+                # let other updates due around the same time join the batch
+                await asyncio.sleep(self.flush_delay)
+                if not await self.flush() and self._dirty:
+                    # failed, back off before trying again
+                    await asyncio.sleep(self.flush_delay * 10)
+                    self._pending.set()
+        finally:
+            # flush-on-stop, so a clean shutdown doesn't lose the last updates
+            await self.flush()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._pending:
+            self._pending.set()
@@ -0,0 +1,390 @@
+import asyncio
+import logging
+import time
+import zlib
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import psycopg
+from psycopg_pool import PoolTimeout
+
+from cidderbot.database import db_utils
+from cidderbot.database.database import Database
+from cidderbot.database.db_exceptions import DatabaseNotConnectedException
+from cidderbot.models.rp_handler import RpHandler
+
+WORKERS_TABLE = "rp_workers"
+LEASES_TABLE = "rp_worker_leases"
+CLAIMS_TABLE = "rp_increment_claims"
+
+CREATE_WORKERS_TABLE = f"""
+CREATE TABLE {WORKERS_TABLE} (
+    worker_id TEXT PRIMARY KEY,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+"""
+
+CREATE_LEASES_TABLE = f"""
+CREATE TABLE {LEASES_TABLE} (
+    partition_id INTEGER PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+"""
+
+CREATE_CLAIMS_TABLE = f"""
+CREATE TABLE {CLAIMS_TABLE} (
+    name TEXT NOT NULL,
+    due_at TIMESTAMPTZ NOT NULL,
+    worker_id TEXT NOT NULL,
+    claimed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (name, due_at)
+);
+"""
+
+# every expiry uses the database's clock, so workers' clocks don't have to agree
+UPSERT_WORKER = f"""
+INSERT INTO {WORKERS_TABLE} (worker_id, expires_at)
+VALUES (%s, now() + make_interval(secs => %s))
+ON CONFLICT (worker_id) DO UPDATE SET expires_at = EXCLUDED.expires_at;
+"""
+
+SELECT_LIVE_WORKERS = f"SELECT worker_id FROM {WORKERS_TABLE} WHERE expires_at > now() ORDER BY worker_id;"
+
+# Takes (or renews) the leases of the given partitions. A partition held by another worker is only
+# taken once that worker's lease has expired, so two workers never hold the same partition.
+ACQUIRE_LEASES = f"""
+INSERT INTO {LEASES_TABLE} (partition_id, worker_id, expires_at)
+SELECT p, %s, now() + make_interval(secs => %s) FROM unnest(%s::INTEGER[]) AS p
+ON CONFLICT (partition_id) DO UPDATE SET
+    worker_id = EXCLUDED.worker_id,
+    expires_at = EXCLUDED.expires_at
+WHERE {LEASES_TABLE}.worker_id = EXCLUDED.worker_id OR {LEASES_TABLE}.expires_at <= now()
+RETURNING partition_id;
+"""
+
+# gives up partitions that are now assigned to another worker, so it doesn't have to wait for them to expire
+RELEASE_LEASES = f"DELETE FROM {LEASES_TABLE} WHERE worker_id = %s AND NOT (partition_id = ANY(%s::INTEGER[]));"
+
+RELEASE_ALL_LEASES = f"DELETE FROM {LEASES_TABLE} WHERE worker_id = %s;"
+
+DELETE_WORKER = f"DELETE FROM {WORKERS_TABLE} WHERE worker_id = %s;"
+
+# One row per RP increment. Whoever inserts it fires the increment, but only while it still holds
+# the lease of the RP's partition - checked in the same statement, so an expired lease can't slip through.
+CLAIM_INCREMENTS = f"""
+INSERT INTO {CLAIMS_TABLE} (name, due_at, worker_id)
+SELECT u.name, u.due_at, %s
+FROM unnest(%s::TEXT[], %s::TIMESTAMPTZ[], %s::INTEGER[]) AS u(name, due_at, partition_id)
+WHERE EXISTS (
+    SELECT 1 FROM {LEASES_TABLE} l
+    WHERE l.partition_id = u.partition_id AND l.worker_id = %s AND l.expires_at > now()
+)
+ON CONFLICT (name, due_at) DO NOTHING
+RETURNING name, due_at;
+"""
+
+PRUNE_CLAIMS = f"DELETE FROM {CLAIMS_TABLE} WHERE due_at < now() - make_interval(days => %s);"
+
+
+def partition_for_rp(name: str, partition_count: int) -> int:
+    """Returns the partition an RP belongs to. Stable across processes (unlike `hash()`).
+
+    Args:
+        name (str): RP name.
+        partition_count (int): Total number of partitions.
+
+    Returns:
+        int: Partition id.
+    """
+    return zlib.crc32(name.encode()) % partition_count
+
+
+def assign_partitions(partition_count: int, workers: List[str], worker_id: str) -> List[int]:
+    """Returns the partitions a worker should hold. Every live worker computes the same assignment.
+
+    Args:
+        partition_count (int): Total number of partitions.
+        workers (List[str]): Ids of the live workers.
+        worker_id (str): This worker's id.
+
+    Returns:
+        List[int]: Partition ids, sorted.
+    """
+    workers = sorted(set(workers) | {worker_id})
+    return [p for p in range(partition_count) if workers[p % len(workers)] == worker_id]
+
+
+class RpWorkerLeases:
+    """Divides RP updates between several bot processes (workers) sharing one database.
+
+    RPs are hashed into a fixed number of partitions, which are split evenly between the live
+    workers. A worker holds a lease on each of its partitions and renews it every heartbeat; only
+    the holder announces increments of RPs in that partition, and each increment is also claimed
+    with a row of its own, so it's fired exactly once even if a worker stalls past its lease.
+
+    A worker that dies stops renewing, and its partitions are taken over once its leases expire,
+    i.e. within `lease_seconds` plus one heartbeat. A worker that shuts down cleanly releases them
+    straight away. Either way, for a while a partition has no holder (or a new one that hasn't taken it
+    yet): increments that fall due then are remembered by every worker, and claimed by whichever one
+    takes the partition, at its next heartbeat.
+    """
+
+    DEFAULT_PARTITION_COUNT = 16
+    DEFAULT_LEASE_SECONDS = 30.0
+    CLAIM_RETENTION_DAYS = 7
+
+    def __init__(
+        self,
+        database: Database,
+        worker_id: str,
+        partition_count: int = DEFAULT_PARTITION_COUNT,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        on_late_claims: Optional[Callable[[List[RpHandler]], None]] = None,
+    ) -> None:
+        """Creates a worker that holds no partitions yet.
+
+        Args:
+            database (Database): Database shared by every worker.
+            worker_id (str): Unique id of this worker.
+            partition_count (int, optional): Number of partitions. Must be the same on every worker. Defaults to 16.
+            lease_seconds (float, optional): How long a lease lasts without being renewed. Defaults to 30.0.
+            clock (Callable[[], float], optional): Monotonic clock in seconds, used to expire leases locally.
+                Defaults to `time.monotonic`.
+            on_late_claims (Optional[Callable[[List[RpHandler]], None]], optional): Called from `heartbeat()`
+                with RPs whose increments fell due while nobody held their partition, once this worker has
+                claimed them. They have already been advanced, and only need announcing and saving.
+                Must not block. Defaults to None.
+        """
+        self.database = database
+        self.worker_id = worker_id
+        self.partition_count = partition_count
+        self.lease_seconds = lease_seconds
+        self._clock = clock
+        self._on_late_claims = on_late_claims
+
+        self._held: Set[int] = set()
+        # local time the held leases run out at. Measured from *before* they were renewed,
+        # so it's always earlier than the expiry in the database.
+        self._held_until = 0.0
+        self.live_workers: List[str] = []
+        # (name, due at) -> RP and local time noted, for increments that were due in partitions this
+        # worker didn't hold. Claimed if it takes the partition before they're forgotten.
+        self._unclaimed: Dict[Tuple[str, datetime], Tuple[RpHandler, float]] = {}
+
+        self._stop: Optional[asyncio.Event] = None
+
+        self.heartbeat_count = 0
+        self.failed_heartbeats = 0
+        self.claimed_count = 0
+        self.lost_claims = 0
+        self.late_claimed_count = 0
+
+    def __repr__(self) -> str:
+        return f"<Worker {self.worker_id}: {len(self.held_partitions)}/{self.partition_count} partitions>"
+
+    @property
+    def heartbeat_interval(self) -> float:
+        return self.lease_seconds / 3
+
+    @property
+    def unclaimed_retention(self) -> float:
+        """Seconds an unclaimed increment is remembered for: long enough for a dead worker's leases to
+        expire and be taken over, with a couple of heartbeats to spare."""
+        return self.lease_seconds * 2
+
+    @property
+    def held_partitions(self) -> Set[int]:
+        """Partitions whose leases are held and have not run out."""
+        if self._clock() >= self._held_until:
+            return set()
+        return set(self._held)
+
+    def partition_for(self, rp: RpHandler) -> int:
+        return partition_for_rp(rp.name, self.partition_count)
+
+    def holds(self, rp: RpHandler) -> bool:
+        return self.partition_for(rp) in self.held_partitions
+
+    # ================================ Leases ================================
+
+    async def ensure_schema(self) -> None:
+        """Creates the worker, lease and claim tables if they do not exist."""
+        async with self.database.connection() as conn:
+            for table, create_query in (
+                (WORKERS_TABLE, CREATE_WORKERS_TABLE),
+                (LEASES_TABLE, CREATE_LEASES_TABLE),
+                (CLAIMS_TABLE, CREATE_CLAIMS_TABLE),
+            ):
+                if await db_utils.create_table_if_not_exists(conn, table, create_query):
+                    logging.info("Created table %s.", table)
+
+    async def heartbeat(self) -> Set[int]:
+        """Marks this worker as alive, then renews or takes the leases of its share of the partitions,
+        and releases any that now belong to another worker. Increments that were due in the partitions
+        it now holds, while it didn't, are claimed and passed to `on_late_claims`.
+
+        Returns:
+            Set[int]: Partitions held.
+        """
+        started = self._clock()
+        async with self.database.connection() as conn:
+            await conn.execute(UPSERT_WORKER, (self.worker_id, self.lease_seconds))
+            cur = await conn.execute(SELECT_LIVE_WORKERS)
+            self.live_workers = [row[0] for row in await cur.fetchall()]
+
+            wanted = assign_partitions(self.partition_count, self.live_workers, self.worker_id)
+            await conn.execute(RELEASE_LEASES, (self.worker_id, wanted))
+            cur = await conn.execute(ACQUIRE_LEASES, (self.worker_id, self.lease_seconds, wanted))
+            held = {row[0] for row in await cur.fetchall()}
+
+            late = self._get_unclaimed(held, started)
+            if late:
+                cur = await conn.execute(
+                    CLAIM_INCREMENTS,
+                    (
+                        self.worker_id,
+                        [name for name, _ in late],
+                        [due_at for _, due_at in late],
+                        [partition_for_rp(name, self.partition_count) for name, _ in late],
+                        self.worker_id,
+                    ),
+                )
+                late_claimed = {(row[0], row[1]) for row in await cur.fetchall()}
+
+        if held != self._held:
+            logging.info(
+                "Worker %s now holds %s/%s partitions (%s live workers).",
+                self.worker_id,
+                len(held),
+                self.partition_count,
+                len(self.live_workers),
+            )
+        self._held = held
+        self._held_until = started + self.lease_seconds
+        self.heartbeat_count += 1
+
+        if late:
+            # claimed now, by this worker or (if the claim conflicted) by the one that held the partition
+            for key in late:
+                self._unclaimed.pop(key, None)
+            # one announcement per RP, even if more than one of its increments was missed
+            rps = list({rp: None for key, rp in late.items() if key in late_claimed})
+            if rps:
+                logging.info(
+                    "Worker %s claimed %s increments that were due while their partitions had no holder.",
+                    self.worker_id,
+                    len(late_claimed),
+                )
+                self.late_claimed_count += len(late_claimed)
+                if self._on_late_claims:
+                    self._on_late_claims(rps)
+        return set(held)
+
+    def _get_unclaimed(self, held: Set[int], now: float) -> Dict[Tuple[str, datetime], RpHandler]:
+        """Forgets unclaimed increments that are too old, and returns those in the held partitions."""
+        unclaimed = {}
+        for key, (rp, noted_at) in list(self._unclaimed.items()):
+            if now - noted_at > self.unclaimed_retention:
+                del self._unclaimed[key]
+            elif partition_for_rp(key[0], self.partition_count) in held:
+                unclaimed[key] = rp
+        return unclaimed
+
+    async def release(self) -> None:
+        """Gives up every lease, so other workers take over without waiting for them to expire."""
+        self._held = set()
+        self._held_until = 0.0
+        async with self.database.connection() as conn:
+            await conn.execute(RELEASE_ALL_LEASES, (self.worker_id,))
+            await conn.execute(DELETE_WORKER, (self.worker_id,))
+        logging.info("Worker %s released its partitions.", self.worker_id)
+
+    async def run(self) -> None:
+        """Heartbeats in the background until `stop()` is called, then releases every lease."""
+        self._stop = asyncio.Event()
+        try:
+            while not self._stop.is_set():
+                try:
+                    await self.heartbeat()
+                    if self.heartbeat_count % 100 == 1:
+                        await self.database.execute(PRUNE_CLAIMS, (self.CLAIM_RETENTION_DAYS,))
+                except (psycopg.Error, PoolTimeout, DatabaseNotConnectedException) as e:
+                    # keep trying - the held leases run out on their own if this goes on for too long
+                    self.failed_heartbeats += 1
+                    logging.error("Worker %s: heartbeat failed: %s", self.worker_id, e)
+
+                try:
+                    await asyncio.wait_for(self._stop.wait(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            try:
+                await self.release()
+            except (psycopg.Error, PoolTimeout, DatabaseNotConnectedException) as e:
+                logging.error("Worker %s: could not release its partitions: %s", self.worker_id, e)
+
+    def stop(self) -> None:
+        if self._stop:
+            self._stop.set()
+
+    # ================================ Claims ================================
+
+    async def claim(self, rps: List[RpHandler]) -> List[RpHandler]:
+        """Claims the current increment of each due RP. Only RPs in partitions this worker holds can
+        be claimed, and each increment can only be claimed once, by any worker.
+
+        Args:
+            rps (List[RpHandler]): Due RPs, not yet updated.
+
+        Returns:
+            List[RpHandler]: The RPs this worker should update and announce.
+        """
+        candidates = []
+        for rp in rps:
+            if self.holds(rp):
+                candidates.append(rp)
+            else:
+                # whoever holds the partition claims it - unless nobody does right now, see heartbeat()
+                self._unclaimed.setdefault((rp.name, rp.next_incr_datetime), (rp, self._clock()))
+        if not candidates:
+            return []
+
+        try:
+            rows = await self.database.fetchall(
+                CLAIM_INCREMENTS,
+                (
+                    self.worker_id,
+                    [rp.name for rp in candidates],
+                    [rp.next_incr_datetime for rp in candidates],
+                    [self.partition_for(rp) for rp in candidates],
+                    self.worker_id,
+                ),
+            )
+        except (psycopg.Error, PoolTimeout, DatabaseNotConnectedException) as e:
+            # the local lease runs out before the one in the database, so nobody else can hold these
+            # partitions right now - fire them without claims rather than not at all
+            logging.error("Worker %s: could not claim increments, using the held leases: %s", self.worker_id, e)
+            claimed_names = {rp.name for rp in candidates if self.holds(rp)}
+        else:
+            claimed_names = {row[0] for row in rows}
+
+        claimed = [rp for rp in candidates if rp.name in claimed_names]
+        self.claimed_count += len(claimed)
+        self.lost_claims += len(candidates) - len(claimed)
+        return claimed
+
+    def get_stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "partitions": len(self.held_partitions),
+            "partition_count": self.partition_count,
+            "live_workers": len(self.live_workers),
+            "heartbeats": self.heartbeat_count,
+            "failed_heartbeats": self.failed_heartbeats,
+            "claimed": self.claimed_count,
+            "lost_claims": self.lost_claims,
+            "late_claimed": self.late_claimed_count,
+            "unclaimed": len(self._unclaimed),
+        }
@@ -1,10 +1,16 @@
+import asyncio
 import logging
+from typing import Optional
 
 import discord
 from discord.ext import commands
 
 from cidderbot.cidder import Cidder
-from cidderbot.cogs import rp
+from cidderbot.utils.startup_timeline import StartupTimeline
+
+
+# loaded with bot.load_extension(), so it can be reloaded
+RP_EXTENSION = "cidderbot.cogs.rp"
 
 
 class BotEvents:
@@ -12,10 +18,45 @@ class BotEvents:
 
     ### List of events:
     * on_ready() - Initialization event. Also includes proper Cidder startup.
-    * on_message() - Event when a message is sent."""
+    * on_message() - Event when a message is sent. Only with prefix commands.
+    * on_guild_join() / on_guild_remove() - Keeps Cidder's guild to RP index up to date.
+    * on_guild_channel_create() / on_guild_channel_delete() - Keeps Cidder's channels up to date."""
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        cidder: Cidder,
+        timeline: Optional[StartupTimeline] = None,
+        prefix_commands: bool = True,
+        sync_app_commands: bool = False,
+    ) -> None:
+        """Registers the events.
 
-    def __init__(self, bot: commands.Bot, cidder: Cidder) -> None:
+        Args:
+            bot (commands.Bot): Bot to register events on.
+            cidder (Cidder): Cidder handler instance.
+            timeline (Optional[StartupTimeline], optional): Startup timeline to record the gateway connect,
+                `on_ready` and cog load phases on, and report once ready. Defaults to None.
+            prefix_commands (bool, optional): Whether to handle `rp!` prefix commands in `on_message`. Without them,
+                no message handler is registered at all. Defaults to True.
+            sync_app_commands (bool, optional): Whether to sync the slash commands with Discord once the cogs are
+                loaded. Defaults to False.
+        """
         self.bot = bot
+        self.timeline = timeline
+        self.prefix_commands = prefix_commands
+        self.sync_app_commands = sync_app_commands
+
+        # for extensions' setup()
+        self.bot.cidder = cidder
+
+        # on_ready can fire again (after reconnects) while the first one is still initializing
+        self._ready_lock = asyncio.Lock()
+        self.ready_count = 0
+        # how far messages got in on_message - everything but "processed" skipped command parsing
+        self._messages_total = cidder.metrics.counter(
+            "cidder_incoming_messages_total", "Messages received, by how far they got.", ["result"]
+        )
         self._register_events(cidder)
         self._logger = logging.getLogger()
 
@@ -33,47 +74,104 @@ class BotEvents:
             Also handles startup procedures for Cidder's logic.
 
             Loads cogs.
+
+            discord.py fires this again after reconnecting. Cidder and the cogs are only set up once,
+            later calls just resync Cidder with the bot's guilds, channels and users.
             """
-            if self.bot.user:
-                self._logger.info(
-                    "Bot is ready. Logged in as %s | ID:%s",
-                    self.bot.user,
-                    self.bot.user.id,
-                )
-            else:
-                self._logger.warning("Bot is ready but not logged in.")
+            async with self._ready_lock:
+                await self._handle_ready(cidder)
 
-            # initialization code
-            guilds = self.bot.guilds
-            channels = self.bot.get_all_channels()
-            users = self.bot.users
+        @self.bot.event
+        async def on_guild_join(guild: discord.Guild) -> None:
+            self._logger.info("Joined guild %s.", guild)
+            cidder.add_guild(guild)
 
-            # logging.debug(self.bot.cogs)
-            # logging.debug(self.bot.command_prefix)
+        @self.bot.event
+        async def on_guild_remove(guild: discord.Guild) -> None:
+            self._logger.info("Removed from guild %s.", guild)
+            cidder.remove_guild(guild)
 
-            cidder.initialize(guilds, channels, users)
+        @self.bot.event
+        async def on_guild_channel_create(channel: discord.abc.GuildChannel) -> None:
+            cidder.add_channel(channel)
 
-            # load cogs
-            rp_cog = rp.Rp(self.bot, cidder)
-            # await rp_cog.initialize()
-            await self.bot.add_cog(rp_cog)
+        @self.bot.event
+        async def on_guild_channel_delete(channel: discord.abc.GuildChannel) -> None:
+            cidder.remove_channel(channel)
 
-            logging.info("Cog loading complete.")
-            logging.info("[SUCCESS] CiDder loading complete.")
+        if not self.prefix_commands:
+            # slash commands only - commands.Bot's own on_message is never called, as the
+            # intents don't include messages
+            return
 
         @self.bot.event
         async def on_message(message: discord.Message) -> None:
-            # Let
-            await self.bot.process_commands(message)
+            # cheap checks first: most messages aren't commands, and those shouldn't cost a full parse
+            if message.author.bot:
+                self._messages_total.labels("bot_author").inc()
+                return
+            if not cidder.prefixes.matches(message):
+                self._messages_total.labels("no_prefix").inc()
+                return
 
-            # Ref: https://github.com/GreatTaku/Discord-Bot-Examples/blob/master/async/on_message.py
-            content = message.content
-            user = message.author
-            channel = message.channel
-            guild = message.guild
+            self._messages_total.labels("processed").inc()
+            await self.bot.process_commands(message)
 
-            # ignore if message is from itself
-            if user == self.bot.user:
-                return
-            # log only if necessary
-            # self._logger.info("[%s in %s/%s]: %s", user, guild, channel, content)
+    async def _handle_ready(self, cidder: Cidder) -> None:
+        self._mark_startup("gateway connect")
+        self.ready_count += 1
+
+        if self.bot.user:
+            self._logger.info(
+                "Bot is ready. Logged in as %s | ID:%s",
+                self.bot.user,
+                self.bot.user.id,
+            )
+        else:
+            self._logger.warning("Bot is ready but not logged in.")
+
+        # initialization code
+        guilds = self.bot.guilds
+        channels = self.bot.get_all_channels()
+        users = self.bot.users
+
+        if cidder.is_initialized:
+            # reconnected - the RPs, their timer and the cogs are all still there
+            cidder.resync(guilds, channels, users)
+            self._logger.info("Reconnected (ready #%s).", self.ready_count)
+            return
+
+        # logging.debug(self.bot.cogs)
+        # logging.debug(self.bot.command_prefix)
+
+        # sharded bots have all their shards connected by now
+        await cidder.initialize(guilds, channels, users, shard_count=self.bot.shard_count or 1)
+        self._mark_startup("on_ready")
+
+        # load cogs
+        if RP_EXTENSION not in self.bot.extensions:
+            await self.bot.load_extension(RP_EXTENSION)
+
+        logging.info("Cog loading complete.")
+        self._mark_startup("cog load")
+
+        if self.sync_app_commands:
+            await self._sync_app_commands()
+        logging.info("[SUCCESS] CiDder loading complete.")
+
+        if self.timeline and self.timeline.finish():
+            self.timeline.log_report(self._logger)
+            self.timeline.record_metrics(cidder.metrics)
+
+    async def _sync_app_commands(self) -> None:
+        """Registers the slash commands with Discord. Global commands can take a while to show up everywhere."""
+        try:
+            synced = await self.bot.tree.sync()
+        except discord.HTTPException as e:
+            self._logger.error("Could not sync slash commands: %s", e)
+            return
+        self._logger.info("Synced %s slash commands.", len(synced))
+
+    def _mark_startup(self, phase: str) -> None:
+        if self.timeline:
+            self.timeline.mark(phase)
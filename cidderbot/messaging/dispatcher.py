@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+import discord
+
+from cidderbot.metrics.registry import MetricsRegistry
+
+# Discord's limits: 5 messages per 5 seconds per channel, 50 requests per second globally.
+DEFAULT_CHANNEL_RATE = 1.0
+DEFAULT_CHANNEL_BURST = 5
+DEFAULT_GLOBAL_RATE = 50.0
+DEFAULT_GLOBAL_BURST = 50
+MAX_MESSAGE_LENGTH = 2000
+
+# what channel.send() raises when a message can't be sent: Discord refusing it, or the connection
+# failing. Caught per message, so one failure doesn't take the channel's whole queue with it.
+SEND_ERRORS = (discord.HTTPException, aiohttp.ClientError, OSError, asyncio.TimeoutError)
+
+
+class TokenBucket:
+    """Token bucket rate limiter. Holds up to `capacity` tokens, refilled at `rate` tokens per second."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+
+        self.tokens = float(capacity)
+        self._last_refill = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def try_acquire(self) -> float:
+        """Takes a token if there is one.
+
+        Returns:
+            float: 0 if a token was taken, otherwise the seconds until one is available.
+        """
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Waits until a token is available, and takes it."""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class MessageDispatcher:
+    """Outbound message queue that stays within Discord's rate limits.
+
+    Every channel gets its own queue and token bucket, plus one global bucket shared by all channels,
+    so a burst of updates (e.g. every daily RP at midnight) is paced instead of piling up
+    behind discord.py's 429 retries. Messages for the same channel that are queued within
+    `coalesce_window` of each other are merged into as few messages as fit the length limit.
+
+    Channels are independent, so a slow channel never holds up the others.
+    """
+
+    def __init__(
+        self,
+        coalesce_window: float = 0.5,
+        channel_rate: float = DEFAULT_CHANNEL_RATE,
+        channel_burst: int = DEFAULT_CHANNEL_BURST,
+        global_rate: float = DEFAULT_GLOBAL_RATE,
+        global_burst: int = DEFAULT_GLOBAL_BURST,
+        max_length: int = MAX_MESSAGE_LENGTH,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
+        """Creates an empty dispatcher.
+
+        Args:
+            coalesce_window (float, optional): Seconds to wait for more messages to the same channel
+                before sending. Defaults to 0.5.
+            channel_rate (float, optional): Messages per second per channel. Defaults to 1.
+            channel_burst (int, optional): Messages a channel can send at once. Defaults to 5.
+            global_rate (float, optional): Messages per second across all channels. Defaults to 50.
+            global_burst (int, optional): Messages that can be sent at once across all channels. Defaults to 50.
+            max_length (int, optional): Maximum message length. Defaults to 2000.
+            clock (Callable[[], float], optional): Monotonic clock, in seconds. Defaults to `time.monotonic`.
+            metrics (Optional[MetricsRegistry], optional): Registry to record send latency and queue depth in.
+                Defaults to None.
+        """
+        self.coalesce_window = coalesce_window
+        self.channel_rate = channel_rate
+        self.channel_burst = channel_burst
+        self.max_length = max_length
+        self._clock = clock
+
+        self.global_bucket = TokenBucket(global_rate, global_burst, clock)
+        self._buckets: Dict[int, TokenBucket] = {}
+        # channel id -> queued (content, time queued)
+        self._queues: Dict[int, Deque[Tuple[str, float]]] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+
+        self.queued_count = 0
+        self.sent_count = 0
+        self.coalesced_count = 0
+        self.failed_count = 0
+        self.max_queue_depth = 0
+        self.last_send_latency = 0.0
+        self.max_send_latency = 0.0
+        self._total_send_latency = 0.0
+
+        self._send_seconds = self._queue_seconds = self._messages_total = None
+        if metrics:
+            self._send_seconds = metrics.histogram(
+                "cidder_message_send_seconds", "Time taken by channel.send."
+            )
+            self._queue_seconds = metrics.histogram(
+                "cidder_message_queue_seconds", "Time from queueing a message to it being sent."
+            )
+            self._messages_total = metrics.counter(
+                "cidder_messages_total", "Messages sent, by result.", ["result"]
+            )
+            metrics.gauge(
+                "cidder_message_queue_depth", "Messages waiting to be sent."
+            ).set_function(lambda: self.queue_depth)
+
+    # ================================ Queueing ================================
+
+    def send(self, channel: discord.abc.Messageable, content: str) -> None:
+        """Queues a message. Returns immediately, the message is sent in the background.
+
+        Args:
+            channel (discord.abc.Messageable): Channel to send to.
+            content (str): Message content.
+        """
+        queue = self._queues.setdefault(channel.id, deque())
+        queue.append((content, self._clock()))
+        self.queued_count += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        if channel.id not in self._workers:
+            self._workers[channel.id] = asyncio.create_task(self._run_channel(channel))
+
+    def send_many(self, channels: Iterable[discord.abc.Messageable], content: str) -> None:
+        """Queues the same message to several channels, which are sent to concurrently.
+
+        Args:
+            channels (Iterable[discord.abc.Messageable]): Channels to send to.
+            content (str): Message content.
+        """
+        for channel in channels:
+            self.send(channel, content)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of messages waiting to be sent, across all channels."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def get_queue_depths(self) -> Dict[int, int]:
+        return {channel_id: len(queue) for channel_id, queue in self._queues.items() if queue}
+
+    async def flush(self) -> None:
+        """Waits until every queued message has been sent (or has failed)."""
+        while self._workers:
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    async def stop(self) -> None:
+        """Sends everything that is still queued. Alias for `flush()`."""
+        await self.flush()
+
+    # ================================ Sending ================================
+
+    def _get_bucket(self, channel_id: int) -> TokenBucket:
+        bucket = self._buckets.get(channel_id)
+        if not bucket:
+            bucket = self._buckets[channel_id] = TokenBucket(
+                self.channel_rate, self.channel_burst, self._clock
+            )
+        return bucket
+
+    def _take_batch(self, queue: Deque[Tuple[str, float]]) -> Tuple[List[str], float]:
+        """Takes as many queued messages as fit in one message.
+
+        Returns:
+            Tuple[List[str], float]: Message contents, and the time the oldest one was queued.
+        """
+        contents = []
+        length = 0
+        queued_at = queue[0][1]
+
+        while queue:
+            content, _ = queue[0]
+            added = len(content) + (1 if contents else 0)
+            if contents and length + added > self.max_length:
+                break
+            queue.popleft()
+            contents.append(content)
+            length += added
+
+        return contents, queued_at
+
+    def _split(self, content: str) -> List[str]:
+        # only for single messages that are too long on their own
+        return [
+            content[i : i + self.max_length]
+            for i in range(0, len(content), self.max_length)
+        ] or [content]
+
+    async def _run_channel(self, channel: discord.abc.Messageable) -> None:
+        """Sends everything queued for one channel, then exits."""
+        queue = self._queues[channel.id]
+        bucket = self._get_bucket(channel.id)
+
+        try:
+            # let messages landing around the same time join this one.
+            # Anything queued while waiting on the rate limits is merged too.
+            if self.coalesce_window:
+                await asyncio.sleep(self.coalesce_window)
+
+            while queue:
+                contents, queued_at = self._take_batch(queue)
+                self.coalesced_count += len(contents) - 1
+
+                for part in self._split("\n".join(contents)):
+                    await bucket.acquire()
+                    await self.global_bucket.acquire()
+                    await self._send(channel, part, queued_at)
+        finally:
+            del self._workers[channel.id]
+            if not queue:
+                del self._queues[channel.id]
+
+    async def _send(self, channel: discord.abc.Messageable, content: str, queued_at: float) -> None:
+        started_at = self._clock()
+        try:
+            await channel.send(content)
+        except SEND_ERRORS as e:
+            self.failed_count += 1
+            if self._messages_total:
+                self._messages_total.labels("failed").inc()
+            logging.error(
+                "Failed to send a message to channel %s: %s",
+                channel.id,
+                e,
+                extra={"channel": channel.id},
+            )
+            return
+
+        sent_at = self._clock()
+        latency = sent_at - queued_at
+        if self._send_seconds:
+            self._send_seconds.observe(sent_at - started_at)
+            self._queue_seconds.observe(latency)
+            self._messages_total.labels("sent").inc()
+
+        self.sent_count += 1
+        self.last_send_latency = latency
+        self.max_send_latency = max(self.max_send_latency, latency)
+        self._total_send_latency += latency
+
+    # ================================ Metrics ================================
+
+    @property
+    def mean_send_latency(self) -> float:
+        if not self.sent_count:
+            return 0.0
+        return self._total_send_latency / self.sent_count
+
+    def get_stats(self) -> Dict[str, float]:
+        """Returns dispatcher counters. Send latency is from queueing to sent, in seconds.
+
+        Returns:
+            Dict[str, float]: Message counts, current and max queue depth, last, mean and max send latency.
+        """
+        return {
+            "queued": self.queued_count,
+            "sent": self.sent_count,
+            "coalesced": self.coalesced_count,
+            "failed": self.failed_count,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "last_send_latency": self.last_send_latency,
+            "mean_send_latency": self.mean_send_latency,
+            "max_send_latency": self.max_send_latency,
+        }
@@ -0,0 +1,87 @@
+from typing import Dict, Optional
+
+import discord
+from discord.ext import commands
+
+DEFAULT_PREFIX = "rp!"
+
+
+class PrefixCache:
+    """Command prefix of every guild, held in memory so looking one up never touches the database.
+
+    Guilds without their own prefix use the default one. Can be passed to the bot as its `command_prefix`.
+    """
+
+    def __init__(self, default_prefix: str = DEFAULT_PREFIX) -> None:
+        self.default_prefix = default_prefix
+        # guild id -> prefix, only for guilds that changed it
+        self._prefixes: Dict[int, str] = {}
+        # guild id -> new prefix (None for the default) of changes that aren't in the database yet
+        self._unsaved: Dict[int, Optional[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    def __call__(self, _bot: commands.Bot, message: discord.Message) -> str:
+        return self.get_for_message(message)
+
+    def load(self, prefixes: Dict[int, str]) -> None:
+        """Replaces the cached prefixes with the saved ones. Changes that aren't saved yet are kept."""
+        self._prefixes = dict(prefixes)
+        for guild_id, prefix in self._unsaved.items():
+            if prefix is None:
+                self._prefixes.pop(guild_id, None)
+            else:
+                self._prefixes[guild_id] = prefix
+
+    def get(self, guild_id: Optional[int]) -> str:
+        if guild_id is None:
+            return self.default_prefix
+        return self._prefixes.get(guild_id, self.default_prefix)
+
+    def get_for_message(self, message: discord.Message) -> str:
+        guild = message.guild
+        return self.get(guild.id if guild is not None else None)
+
+    def set(self, guild_id: int, prefix: str, saved: bool = True) -> None:
+        """Changes a guild's prefix.
+
+        Args:
+            guild_id (int): Guild id.
+            prefix (str): New prefix. The default prefix is the same as `reset()`.
+            saved (bool, optional): Whether the change is in the database. Defaults to True. Unsaved changes
+                survive `load()` until they're saved, see `get_unsaved()`.
+        """
+        if prefix == self.default_prefix:
+            self.reset(guild_id, saved)
+            return
+
+        self._prefixes[guild_id] = prefix
+        self._track_unsaved(guild_id, prefix, saved)
+
+    def reset(self, guild_id: int, saved: bool = True) -> bool:
+        """Changes a guild's prefix back to the default. Returns whether it had its own prefix."""
+        self._track_unsaved(guild_id, None, saved)
+        return self._prefixes.pop(guild_id, None) is not None
+
+    def _track_unsaved(self, guild_id: int, prefix: Optional[str], saved: bool) -> None:
+        if saved:
+            self._unsaved.pop(guild_id, None)
+        else:
+            self._unsaved[guild_id] = prefix
+
+    def get_unsaved(self) -> Dict[int, Optional[str]]:
+        """Changes that aren't in the database yet: guild id -> new prefix, or None for the default."""
+        return dict(self._unsaved)
+
+    def mark_saved(self, guild_id: int, prefix: Optional[str]) -> None:
+        """Called once a change from `get_unsaved()` is saved. Does nothing if the guild's prefix
+        was changed again in the meantime, as that change still needs saving."""
+        if guild_id in self._unsaved and self._unsaved[guild_id] == prefix:
+            del self._unsaved[guild_id]
+
+    def matches(self, message: discord.Message) -> bool:
+        """Whether a message starts with its guild's prefix, i.e. could be a command.
+        A dict lookup and a `startswith`, so it can run on every message.
+        """
+        return message.content.startswith(self.get_for_message(message))
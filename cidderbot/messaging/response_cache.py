@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from datetime import datetime
+from itertools import zip_longest
+from typing import TYPE_CHECKING, Callable, Dict, Sequence, Tuple
+
+from cidderbot.utils.time_formatters import utc_now
+
+if TYPE_CHECKING:
+    from cidderbot.models.rp_handler import RpHandler
+
+
+class CachedResponse:
+    """A rendered command response, with gaps for the parts that change every call (countdowns).
+
+    E.g. parts `("Next day is in ", ".")` rendered with `"3 hours"` gives `"Next day is in 3 hours."`
+    """
+
+    __slots__ = ("parts",)
+
+    def __init__(self, parts: Sequence[str]) -> None:
+        self.parts = tuple(parts)
+
+    def render(self, *values: str) -> str:
+        """Fills in the gaps between the parts, in order.
+
+        Args:
+            *values (str): One value per gap, i.e. one less than the number of parts.
+
+        Returns:
+            str: The full response.
+        """
+        return "".join(
+            part + value for part, value in zip_longest(self.parts, values, fillvalue="")
+        )
+
+
+class ResponseCache:
+    """LRU cache of rendered command responses per RP.
+
+    An RP's responses only change when it reaches its next unit, or when its dates are updated,
+    so entries are kept until either happens. Countdowns are left out of the cached text
+    and filled in on every call.
+    """
+
+    DEFAULT_MAX_SIZE = 256
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        clock: Callable[[], datetime] = utc_now,
+    ) -> None:
+        """Creates an empty cache.
+
+        Args:
+            max_size (int, optional): Maximum number of cached responses. Defaults to 256.
+            clock (Callable[[], datetime], optional): Returns the current (aware) time.
+                Defaults to the current UTC time.
+        """
+        self.max_size = max_size
+        self._clock = clock
+
+        # (command, RP name) -> (RP cache generation, valid until, response)
+        self._entries: OrderedDict[Tuple[str, str], Tuple[int, datetime, CachedResponse]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_build(
+        self,
+        command: str,
+        rp: "RpHandler",
+        build: Callable[[], CachedResponse],
+    ) -> CachedResponse:
+        """Returns the cached response of a command for an RP, building it if there isn't a current one.
+
+        Args:
+            command (str): Command name.
+            rp (RpHandler): RP the response is for.
+            build (Callable[[], CachedResponse]): Builds the response.
+
+        Returns:
+            CachedResponse: The response.
+        """
+        key = (command, rp.name)
+        entry = self._entries.get(key)
+        if entry:
+            generation, valid_until, response = entry
+            if generation == rp.cache_generation and self._clock() < valid_until:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return response
+
+        self.misses += 1
+        # read before building, so a unit boundary passed while building can't extend the entry
+        generation, valid_until = rp.cache_generation, rp.next_unit_datetime
+        response = build()
+
+        self._entries[key] = (generation, valid_until, response)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return response
+
+    def invalidate(self, rp: "RpHandler") -> None:
+        """Drops every cached response for an RP."""
+        for key in [key for key in self._entries if key[1] == rp.name]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Returns the cache's counters.
+
+        Returns:
+            Dict[str, float]: Hits, misses, hit rate, evictions and current size.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
@@ -0,0 +1,300 @@
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# in seconds, from 1ms to 10s
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (name suffix, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def format_value(value: float) -> str:
+    """Formats a sample value the way Prometheus expects."""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{name}="{_escape_label_value(str(value))}"' for name, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric:
+    """Base class for a metric family. Every combination of label values gets its own child."""
+
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str, **kwargs: str):
+        """Returns the child for a set of label values, creating it on first use.
+
+        Args:
+            *values (str): Label values, in `labelnames` order.
+            **kwargs (str): Label values by name, instead of by position.
+        """
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}.")
+
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        # metrics without labels have a single child
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def children(self) -> List[Tuple[Tuple[str, ...], object]]:
+        """Returns every (label values, child) pair."""
+        return list(self._children.items())
+
+    def samples(self) -> Iterator[Sample]:
+        for key, child in self.children():
+            labels = dict(zip(self.labelnames, key))
+            for suffix, extra_labels, value in child.samples():
+                yield suffix, {**labels, **extra_labels}, value
+
+
+class _CounterChild:
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only go up.")
+        self.value += amount
+
+    def samples(self) -> Iterator[Sample]:
+        yield "", {}, self.value
+
+
+class Counter(_Metric):
+    """Value that only goes up, e.g. number of commands run. Names should end in `_total`."""
+
+    TYPE = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Reads the value from a function whenever the gauge is collected, instead of storing it."""
+        self._function = function
+
+    def get(self) -> float:
+        if self._function:
+            return float(self._function())
+        return self.value
+
+    def samples(self) -> Iterator[Sample]:
+        yield "", {}, self.get()
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. queue depth."""
+
+    TYPE = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._default().set_function(function)
+
+    def get(self) -> float:
+        return self._default().get()
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # non-cumulative, the last one is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile from the buckets (the upper bound of the bucket it falls in).
+
+        Args:
+            q (float): Quantile, between 0 and 1.
+
+        Returns:
+            float: Estimated value. Infinite if it falls past the last bucket, 0 if nothing was observed.
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return math.inf
+
+    def samples(self) -> Iterator[Sample]:
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield "_bucket", {"le": format_value(bound)}, cumulative
+        yield "_bucket", {"le": "+Inf"}, self.count
+        yield "_sum", {}, self.sum
+        yield "_count", {}, self.count
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets, e.g. command latency."""
+
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+
+class MetricsRegistry:
+    """In-process registry of every metric. Metrics are created on first use, so any module
+    can ask for the same metric by name."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._metrics
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def _get_or_create(self, cls: type, name: str, *args, **kwargs) -> _Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, cls(name, *args, **kwargs))
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {metric.TYPE}.")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self) -> str:
+        """Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics, ready to be served at `/metrics`.
+        """
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def summarize(self) -> List[str]:
+        """Summarizes every metric in a human-readable form, one line per child.
+
+        Returns:
+            List[str]: Summary lines.
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            for key, child in metric.children():
+                name = metric.name + (f"[{', '.join(key)}]" if key else "")
+                if isinstance(child, _HistogramChild):
+                    lines.append(
+                        f"{name}: n={child.count}, mean={child.mean:.4g}, "
+                        f"p50<={child.quantile(0.5):.4g}, p95<={child.quantile(0.95):.4g}"
+                    )
+                elif isinstance(child, _GaugeChild):
+                    lines.append(f"{name}: {child.get():.4g}")
+                else:
+                    lines.append(f"{name}: {child.value:.4g}")
+        return lines
@@ -0,0 +1,74 @@
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from cidderbot.metrics.registry import MetricsRegistry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """Small local HTTP server that serves a metrics registry at `/metrics`, for Prometheus to scrape."""
+
+    DEFAULT_HOST = "127.0.0.1"
+    DEFAULT_PORT = 9108
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+    ) -> None:
+        """Creates a (stopped) metrics server.
+
+        Args:
+            registry (MetricsRegistry): Metrics to serve.
+            host (str, optional): Address to listen on. Defaults to localhost only.
+            port (int, optional): Port to listen on. Defaults to 9108.
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._runner is not None
+
+    async def _handle_metrics(self, _request: web.Request) -> web.Response:
+        return web.Response(
+            body=self.registry.render().encode("utf-8"),
+            headers={"Content-Type": PROMETHEUS_CONTENT_TYPE},
+        )
+
+    async def start(self) -> bool:
+        """Starts serving in the background.
+
+        Returns:
+            bool: Whether the server started.
+        """
+        if self._runner:
+            return True
+
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            logging.error("Could not start the metrics server on %s:%s: %s", self.host, self.port, e)
+            await runner.cleanup()
+            return False
+
+        self._runner = runner
+        logging.info("Serving metrics at http://%s:%s/metrics", self.host, self.port)
+        return True
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,145 @@
+import logging
+import sys
+from typing import Dict, Iterable, Optional, Tuple
+
+import discord
+
+from cidderbot.models.guild import CidderChannel, CidderGuild
+
+
+class EntityRegistry:
+    """The guilds and channels Cidder knows about, as compact `CidderGuild` / `CidderChannel` models keyed by id.
+
+    Filled once when the bot is first ready, then kept up to date one event at a time (guild join/remove,
+    channel create/delete) rather than rebuilt from the bot's caches. Users aren't used by anything yet,
+    so only their number is kept.
+    """
+
+    def __init__(self) -> None:
+        self.guilds: Dict[int, CidderGuild] = {}
+        self.channels: Dict[int, CidderChannel] = {}
+        self.user_count = 0
+
+    def __len__(self) -> int:
+        return len(self.guilds)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self.guilds
+
+    # ================================ Guilds ================================
+
+    def add_guild(self, guild: discord.Guild) -> CidderGuild:
+        """Adds a guild and its channels. A guild that is already known just has its name updated.
+
+        Args:
+            guild (discord.Guild): Guild from discord.py (or anything with an id, name and channels).
+
+        Returns:
+            CidderGuild: The registry's guild.
+        """
+        model = self.guilds.get(guild.id)
+        if model is None:
+            model = self.guilds[guild.id] = CidderGuild(guild.id, str(getattr(guild, "name", guild.id)))
+        else:
+            model.name = str(getattr(guild, "name", model.name))
+
+        for channel in getattr(guild, "channels", ()):
+            self.channels[channel.id] = model.add_channel(channel.id)
+        return model
+
+    def remove_guild(self, guild_id: int) -> Optional[CidderGuild]:
+        """Removes a guild and its channels.
+
+        Args:
+            guild_id (int): Guild id.
+
+        Returns:
+            Optional[CidderGuild]: The removed guild, or None if it wasn't known.
+        """
+        model = self.guilds.pop(guild_id, None)
+        if model is None:
+            return None
+
+        for channel in model.channels:
+            self.channels.pop(channel.id, None)
+        return model
+
+    def get_guild(self, guild_id: int) -> Optional[CidderGuild]:
+        return self.guilds.get(guild_id)
+
+    # ================================ Channels ================================
+
+    def add_channel(self, channel: discord.abc.GuildChannel) -> Optional[CidderChannel]:
+        """Adds a channel of a known guild.
+
+        Args:
+            channel (discord.abc.GuildChannel): Channel from discord.py.
+
+        Returns:
+            Optional[CidderChannel]: The registry's channel, or None if it isn't in a known guild (e.g. a DM).
+        """
+        guild = getattr(channel, "guild", None)
+        model = self.guilds.get(guild.id) if guild is not None else None
+        if model is None:
+            return None
+
+        self.channels[channel.id] = model.add_channel(channel.id)
+        return self.channels[channel.id]
+
+    def remove_channel(self, channel_id: int) -> bool:
+        channel = self.channels.pop(channel_id, None)
+        if channel is None:
+            return False
+
+        channel.guild.remove_channel(channel_id)
+        return True
+
+    def get_channel(self, channel_id: int) -> Optional[CidderChannel]:
+        return self.channels.get(channel_id)
+
+    def get_channel_guild_id(self, channel_id: int) -> Optional[int]:
+        channel = self.channels.get(channel_id)
+        return channel.guild.id if channel else None
+
+    def sync_channels(self, channels: Iterable[discord.abc.GuildChannel]) -> Tuple[int, int]:
+        """Adds channels that are missing and removes the ones that aren't in `channels`,
+        e.g. after reconnecting, when create/delete events may have been missed.
+
+        Args:
+            channels (Iterable[discord.abc.GuildChannel]): Every channel the bot can see. Iterated once,
+                so `bot.get_all_channels()` can be passed directly.
+
+        Returns:
+            Tuple[int, int]: Number of channels added and removed.
+        """
+        seen = set()
+        added = 0
+        for channel in channels:
+            seen.add(channel.id)
+            if channel.id not in self.channels and self.add_channel(channel):
+                added += 1
+
+        gone = [channel_id for channel_id in self.channels if channel_id not in seen]
+        for channel_id in gone:
+            self.remove_channel(channel_id)
+
+        if added or gone:
+            logging.debug("Channels synced: %s added, %s removed.", added, len(gone))
+        return added, len(gone)
+
+    # ================================ Memory ================================
+
+    def get_memory_bytes(self) -> int:
+        """Memory used by the registry: its dicts, models and guild names (ids not included)."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.guilds) + sys.getsizeof(self.channels)
+        size += sum(sys.getsizeof(guild) for guild in self.guilds.values())
+        size += sum(sys.getsizeof(channel) for channel in self.channels.values())
+        return size
+
+    def get_memory_stats(self) -> Dict[str, int]:
+        return {
+            "guilds": len(self.guilds),
+            "channels": len(self.channels),
+            "users": self.user_count,
+            "bytes": self.get_memory_bytes(),
+        }
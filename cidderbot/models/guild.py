@@ -1,29 +1,61 @@
-from typing import List
+import sys
+from typing import Dict, Iterable, List, Optional
 
 
-# Unkown whether these models are needed. Not used for the time being.
+# Compact stand-ins for discord.py's guild and channel objects, kept in the EntityRegistry.
+# Only what Cidder needs (ids, names, which guild a channel is in), in __slots__ to keep them small.
 class CidderGuild:
-    def __init__(self, guild_id: int, guild_name: str, channel_ids: List[int]) -> None:
+    __slots__ = ("_id", "_name", "_channels")
+
+    def __init__(self, guild_id: int, guild_name: str, channel_ids: Iterable[int] = ()) -> None:
         self._id = guild_id
         self._name = guild_name
-        self._channels = [CidderChannel(self, channel_id) for channel_id in channel_ids]
+        self._channels: Dict[int, CidderChannel] = {}
+        for channel_id in channel_ids:
+            self.add_channel(channel_id)
 
     def __repr__(self) -> str:
         return f"<Guild {self._id} ({self._name})>"
 
     def __str__(self) -> str:
-        return f"<Guild {self._id} ({self._name})>"
+        return self._name
+
+    def __sizeof__(self) -> int:
+        # counts the channel dict and the name, which belong to this guild alone
+        return object.__sizeof__(self) + sys.getsizeof(self._channels) + sys.getsizeof(self._name)
 
     @property
-    def id(self):
+    def id(self) -> int:
         return self._id
 
     @property
-    def name(self):
+    def name(self) -> str:
         return self._name
 
+    @name.setter
+    def name(self, name: str) -> None:
+        self._name = name
+
+    @property
+    def channels(self) -> List["CidderChannel"]:
+        return list(self._channels.values())
+
+    def get_channel(self, channel_id: int) -> Optional["CidderChannel"]:
+        return self._channels.get(channel_id)
+
+    def add_channel(self, channel_id: int) -> "CidderChannel":
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = self._channels[channel_id] = CidderChannel(self, channel_id)
+        return channel
+
+    def remove_channel(self, channel_id: int) -> bool:
+        return self._channels.pop(channel_id, None) is not None
+
 
 class CidderChannel:
+    __slots__ = ("_id", "_guild")
+
     def __init__(self, guild: CidderGuild, channel_id: int) -> None:
         self._id = channel_id
         self._guild = guild
@@ -35,5 +67,9 @@ class CidderChannel:
         return f"<Channel {self._id} in {self._guild}>"
 
     @property
-    def id(self):
+    def id(self) -> int:
         return self._id
+
+    @property
+    def guild(self) -> CidderGuild:
+        return self._guild
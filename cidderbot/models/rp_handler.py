@@ -0,0 +1,447 @@
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import discord
+
+from cidderbot.calendars.base import RpCalendar
+from cidderbot.calendars.gregorian import GREGORIAN
+from cidderbot.scheduling.boundary_index import IncrementBoundaryIndex
+from cidderbot.utils.time_formatters import DEFAULT_LOCALE, TimeUnit, format_timedelta, utc_now
+
+
+class RpHandler:
+    """Class that encapsulates an RP instance."""
+
+    def __init__(
+        self,
+        name: str,
+        guilds: List[discord.Guild],
+        rp_datetime_unit: TimeUnit,
+        rp_datetime_incr_unit: TimeUnit,
+        rp_datetime: datetime,
+        rp_datetime_incr_amount: int,
+        last_datetime: datetime,
+        incr_interval: timedelta,
+        channel_id: int = 0,
+        clock: Callable[[], datetime] = utc_now,
+        extra_channel_ids: Optional[List[int]] = None,
+        locale: str = DEFAULT_LOCALE,
+        calendar: RpCalendar = GREGORIAN,
+    ) -> None:
+        """Creates a new RpHandler instance to wrap an RP.
+
+        #TODO: in future this will probably only handle date information.
+
+        Args:
+            name (str): Name of this RP.
+            guilds (List[discord.Guild]): List of Guilds (servers). Currently using `discord.Guild`,
+                but expected to change in future to own class.
+            rp_datetime_unit (TimeUnit): Smallest unit to be tracked and displayed in this RP.
+            rp_datetime (datetime): Current RP date/time.
+            rp_datetime_incr_amount (int): Amount to be used for regular RP date/time increments.
+            rp_datetime_incr_unit (TimeUnit): Unit to be used for regular RP date/time increments.
+            last_datetime (datetime): Last real-life date/time that the RP was incremented on.
+            incr_interval (timedelta): Real-life time interval between RP date/time increments.
+            channel_id (int, optional): Channel id to send RP date/time increment messages to.
+                Defaults to 0, which disables update messages.
+            clock (Callable[[], datetime], optional): Returns the current real-life (aware) time.
+                Defaults to the current UTC time.
+            extra_channel_ids (Optional[List[int]], optional): More channel ids to also send update messages to.
+                Defaults to None.
+            locale (str, optional): Locale code for month and unit names in this RP's messages. Defaults to "en".
+            calendar (RpCalendar, optional): Calendar the RP's dates are in, used for all date arithmetic and
+                formatting. Defaults to the Gregorian calendar.
+        """
+        self.guilds = guilds
+        self.name = name
+        self.rp_datetime_unit = rp_datetime_unit
+        self.rp_datetime_incr_unit = rp_datetime_incr_unit
+        self.rp_datetime = rp_datetime
+        self.rp_datetime_incr_amount = rp_datetime_incr_amount
+        self.prev_incr_datetime = last_datetime
+        self.next_incr_datetime = last_datetime + incr_interval
+        self.incr_interval = incr_interval
+        self.channel_id = channel_id
+        self.extra_channel_ids = list(extra_channel_ids or [])
+        self.locale = locale
+        self.calendar = calendar
+        self._clock = clock
+
+        # Times (and their formatted strings) only change at unit boundaries,
+        # so they're cached until the next one.
+        self._unit_cache: Dict[str, Any] = {}
+        self._unit_cache_from: Optional[datetime] = None
+        self._unit_cache_until: Optional[datetime] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # bumped whenever the dates change, so anything built from them knows it's out of date
+        self.cache_generation = 0
+
+        # built on first use by rp_time_at() / real_time_when()
+        self._boundary_index: Optional[IncrementBoundaryIndex] = None
+
+        # number of units in an increment interval
+        self.num_units_in_incr = rp_datetime_incr_amount * calendar.units_in(
+            self.rp_datetime_incr_unit, rp_datetime_unit
+        )
+
+        # loaded parameters may be out of date, so update them to current.
+        self._update_date_to_current()
+
+        logging.info(
+            "%s loaded. Current time: %s",
+            self,
+            self.format_current_rp_time(),
+            extra={"rp": self.name},
+        )
+
+    def __repr__(self) -> str:
+        return f"<RP: {self.name}>"
+
+    @property
+    def channel_ids(self) -> List[int]:
+        """Every channel id to send update messages to, main channel first."""
+        channel_ids = [self.channel_id] if self.channel_id else []
+        channel_ids += [
+            channel_id for channel_id in self.extra_channel_ids if channel_id not in channel_ids
+        ]
+        return channel_ids
+
+    def _update_date_to_current(self) -> None:
+        """Updates the date of the rp to the correct current date based on how many update cycles may have passed
+        since the loaded start time.
+
+        Also updates prev and next incr_time
+
+        Accounts for incorrect start times.
+        """
+        duration_since_start = self._clock() - self.prev_incr_datetime
+        if duration_since_start < self.incr_interval:
+            return
+
+        update_count = math.floor(duration_since_start / self.incr_interval)
+
+        self.rp_datetime = self.add_to_datetime(
+            self.rp_datetime,
+            self.rp_datetime_incr_unit,
+            update_count * self.rp_datetime_incr_amount,
+        )
+
+        # update incr times
+        self.prev_incr_datetime += update_count * self.incr_interval
+        self.next_incr_datetime = self.prev_incr_datetime + self.incr_interval
+
+        self.invalidate_cache()
+
+    def update(self) -> None:
+        """Updates the in-universe and real dates of this RP instance."""
+        prev_rp_dt = self.rp_datetime
+        self.rp_datetime = self.add_to_datetime(
+            self.rp_datetime,
+            self.rp_datetime_incr_unit,
+            self.rp_datetime_incr_amount,
+        )
+
+        self.prev_incr_datetime = self.next_incr_datetime
+        self.next_incr_datetime += self.incr_interval
+
+        self.invalidate_cache()
+
+        logging.info(
+            "%s has been updated from %s to %s. Next update is in %s.",
+            self,
+            self.format_rp_time(prev_rp_dt, self.rp_datetime_incr_unit),
+            self.format_current_rp_time(),
+            self.format_time_to_next_incr(),
+            extra={"rp": self.name},
+        )
+
+    def add_to_datetime(
+        self, initial: datetime, unit: TimeUnit, value: int
+    ) -> datetime:
+        """Add a given datetime by an amount value * unit.
+
+        Args:
+            initial (datetime): Initial datetime to add to.
+            unit (TimeUnit): Unit of time.
+            value (int): Amount of unit to add by. Accepts positive integer values only.
+
+        Returns:
+            datetime: Added datetime.
+        """
+        # negative check
+        if value < 0:
+            logging.warning("Tried to add a negative value %s. Not allowed.", value)
+            return initial
+
+        # Months and years are added as calendar months/years (see `RpCalendar.add`).
+        return self.calendar.add(initial, unit, value)
+
+    # ================================ Cache =============================================
+
+    def invalidate_cache(self) -> None:
+        """Clears cached times and strings. Must be called whenever the RP's dates change."""
+        self._unit_cache = {}
+        self._unit_cache_from = None
+        self._unit_cache_until = None
+        self.cache_generation += 1
+
+    def _get_unit_cache(self) -> Dict[str, Any]:
+        """Returns the cached times for the current RP unit, recomputing them if a unit boundary has passed.
+
+        Returns:
+            Dict[str, Any]: Cache with `units_elapsed` and `next_unit_datetime`,
+                plus any other values computed since the last boundary.
+        """
+        now = self._clock()
+        if self._unit_cache and self._unit_cache_from <= now < self._unit_cache_until:
+            self.cache_hits += 1
+            return self._unit_cache
+
+        self.cache_misses += 1
+
+        time_since_incr = now - self.prev_incr_datetime
+        fraction_elapsed = time_since_incr / self.incr_interval
+        num_units_elapsed = math.floor(fraction_elapsed * self.num_units_in_incr)
+
+        # These are some variable names.
+        next_unit_time_irl_time_from_last_incr = (
+            (num_units_elapsed + 1) / self.num_units_in_incr * self.incr_interval
+        )
+
+        # RP times are only computed when first asked for
+        self._unit_cache = {
+            "units_elapsed": num_units_elapsed,
+            "next_unit_datetime": next_unit_time_irl_time_from_last_incr
+            + self.prev_incr_datetime,
+        }
+        self._unit_cache_from = now
+        self._unit_cache_until = self._unit_cache["next_unit_datetime"]
+
+        return self._unit_cache
+
+    def _get_cached(self, key: str, compute: Callable[[], Any]) -> Any:
+        cache = self._get_unit_cache()
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+
+    def get_cache_stats(self) -> Dict[str, float]:
+        """Returns the time cache's hit/miss counters.
+
+        Returns:
+            Dict[str, float]: Hits, misses and hit rate.
+        """
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / total if total else 0.0,
+        }
+
+    # ================================ Time GETTERS =============================================
+
+    @property
+    def next_unit_datetime(self) -> datetime:
+        """Real-life time at which the RP reaches its next unit.
+
+        Always after now: exactly on a unit boundary, the RP has just reached that unit, so the next one
+        is a whole unit later (and `get_next_rp_unit_time()` is one unit after the current time).
+        """
+        return self._get_unit_cache()["next_unit_datetime"]
+
+    def get_time_to_next_incr(self) -> timedelta:
+        """Gets the real-life time until the next increment is scheduled.
+
+        Returns:
+            timedelta: Time until the next increment.
+        """
+        now = self._clock()
+        difference = self.next_incr_datetime - now
+        return difference
+
+    def get_time_to_next_rp_unit(self) -> timedelta:
+        """Gets the time until the next RP time based on the specified precision unit.
+
+        Returns:
+            timedelta: Time until the next RP time.
+        """
+        now = self._clock()
+        time_to_next_unit_time = self.next_unit_datetime - now
+
+        return time_to_next_unit_time
+
+    def get_current_rp_unit_time(self) -> datetime:
+        """Gets the current RP time, precision is the unit specified in the RP parameters.
+
+        Returns:
+            datetime: Current RP unit time.
+        """
+        return self._get_cached(
+            "current",
+            lambda: self.add_to_datetime(
+                initial=self.rp_datetime,
+                unit=self.rp_datetime_unit,
+                value=self._unit_cache["units_elapsed"],
+            ),
+        )
+
+    def get_next_rp_unit_time(self) -> datetime:
+        """Gets the next RP time, precision is the unit specified in the RP parameters.
+
+        Returns:
+            datetime: Next RP unit time.
+        """
+        return self._get_cached(
+            "next",
+            lambda: self.add_to_datetime(
+                initial=self.rp_datetime,
+                unit=self.rp_datetime_unit,
+                value=self._unit_cache["units_elapsed"] + 1,
+            ),
+        )
+
+    # ================================ Real time <-> RP time =================================
+
+    def _get_boundary_index(self) -> IncrementBoundaryIndex:
+        """Returns the increment boundary index, starting at the current increment."""
+        index = self._boundary_index
+        if index is None or not index.rebase(self.prev_incr_datetime, self.rp_datetime):
+            index = IncrementBoundaryIndex(
+                origin_real=self.prev_incr_datetime,
+                origin_rp=self.rp_datetime,
+                interval=self.incr_interval,
+                incr_unit=self.rp_datetime_incr_unit,
+                incr_amount=self.rp_datetime_incr_amount,
+                calendar=self.calendar,
+            )
+            self._boundary_index = index
+        return index
+
+    def rp_time_at(self, real_dt: datetime) -> datetime:
+        """Gets the RP time at a given real-life time, precision is the unit specified in the RP parameters.
+
+        Args:
+            real_dt (datetime): Real-life time. Must not be before the previous increment.
+
+        Raises:
+            ValueError: If `real_dt` is before the previous increment, or too far ahead.
+
+        Returns:
+            datetime: RP unit time at `real_dt`.
+        """
+        index = self._get_boundary_index()
+        k = index.boundary_at_real_time(real_dt)
+
+        fraction_elapsed = (real_dt - index.real_time(k)) / self.incr_interval
+        num_units_elapsed = math.floor(fraction_elapsed * self.num_units_in_incr)
+        rp_dt = self.add_to_datetime(
+            index.rp_time(k), self.rp_datetime_unit, num_units_elapsed
+        )
+
+        # units are an approximation (e.g. 30 days a month), never run past the next increment
+        next_incr_rp_dt = index.rp_time(k + 1)
+        if rp_dt >= next_incr_rp_dt:
+            rp_dt = max(
+                self.calendar.add(next_incr_rp_dt, self.rp_datetime_unit, -1),
+                index.rp_time(k),
+            )
+        return rp_dt
+
+    def real_time_when(self, rp_dt: datetime) -> datetime:
+        """Gets the real-life time at which the RP reaches a given RP time.
+
+        Args:
+            rp_dt (datetime): RP time. Must not be before the RP's last increment.
+
+        Raises:
+            ValueError: If `rp_dt` is before the RP's last increment, or too far ahead.
+
+        Returns:
+            datetime: Real-life time.
+        """
+        index = self._get_boundary_index()
+        k = index.boundary_at_rp_time(rp_dt)
+
+        num_units = self.calendar.count_until(index.rp_time(k), rp_dt, self.rp_datetime_unit)
+        if num_units >= self.num_units_in_incr:
+            # only reached by the next increment
+            return index.real_time(k + 1)
+
+        return index.real_time(k) + num_units / self.num_units_in_incr * self.incr_interval
+
+    # ================================ FORMATTED RETURNS =================================
+
+    def format_rp_time(self, rp_dt: datetime, unit: Optional[TimeUnit] = None) -> str:
+        """Formats an RP time in this RP's calendar and locale.
+
+        Args:
+            rp_dt (datetime): RP time.
+            unit (Optional[TimeUnit], optional): Precision to format to. Defaults to the unit used for the RP.
+
+        Returns:
+            str: Formatted time as a string.
+        """
+        return self.calendar.format(rp_dt, unit or self.rp_datetime_unit, self.locale)
+
+    def format_current_rp_time(self) -> str:
+        """Formats the current in-RP time, based on the unit used for the RP.
+
+        Returns:
+            str: Formatted time as a string.
+        """
+        return self._get_cached(
+            "current_str",
+            lambda: self.format_rp_time(self.get_current_rp_unit_time()),
+        )
+
+    def format_current_rp_incr_time(self) -> str:
+        """Formats the current in-RP time, based on the increment unit used for the RP.
+
+        Returns:
+            str: Formatted time as a string.
+        """
+        return self._get_cached(
+            "current_incr_str",
+            lambda: self.format_rp_time(self.get_current_rp_unit_time(), self.rp_datetime_incr_unit),
+        )
+
+    def format_next_rp_time(self) -> str:
+        """Formats the in-RP time as of the next increment, based on the unit used for the RP.
+
+        Returns:
+            str: Formatted next unit time as a string.
+        """
+        return self._get_cached(
+            "next_str",
+            lambda: self.format_rp_time(self.get_next_rp_unit_time()),
+        )
+
+    def format_next_rp_incr_time(self) -> str:
+        """Formats the in-RP time as of the next increment, based on the increment unit used for the RP.
+
+        Returns:
+            str: Formatted next increment time as a string.
+        """
+        return self._get_cached(
+            "next_incr_str",
+            lambda: self.format_rp_time(
+                self.add_to_datetime(
+                    initial=self.rp_datetime,
+                    unit=self.rp_datetime_incr_unit,
+                    value=self.rp_datetime_incr_amount,
+                ),
+                self.rp_datetime_incr_unit,
+            ),
+        )
+
+    def format_time_to_next_incr(self) -> str:
+        """Formats the real-life duration to the next increment
+
+        Returns:
+            str: Formatted duration to next increment.
+        """
+
+        return format_timedelta(self.get_time_to_next_incr(), locale=self.locale)
@@ -0,0 +1,172 @@
+import bisect
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from cidderbot.calendars.base import RpCalendar
+from cidderbot.calendars.gregorian import GREGORIAN
+from cidderbot.utils.time_formatters import TimeUnit
+
+
+class IncrementBoundaryIndex:
+    """RP times at an RP's increment boundaries, so real time <-> RP time mapping doesn't simulate
+    every increment from the RP's start.
+
+    Boundary k is the k-th increment after the origin. It happens at real time
+    `origin_real + k * interval`, and the RP time becomes `rp_time(k)`, i.e. `rp_time(k - 1)` plus one
+    increment. Real times are a closed formula. So are RP times when the increment unit is a fixed length
+    of time. Increments in months or years have to be added one at a time (day clamping accumulates), so
+    their RP times are precomputed lazily into the sorted `rp_times`, and mapping an RP time back to its
+    increment is a binary search.
+    """
+
+    # precomputing past this many boundaries means something is very wrong
+    MAX_BOUNDARIES = 1_000_000
+    # boundaries a single lookup may precompute - further ahead than that is "too far ahead"
+    MAX_BOUNDARIES_PER_CALL = 10_000
+
+    def __init__(
+        self,
+        origin_real: datetime,
+        origin_rp: datetime,
+        interval: timedelta,
+        incr_unit: TimeUnit,
+        incr_amount: int,
+        calendar: RpCalendar = GREGORIAN,
+    ) -> None:
+        """Creates an index starting at one increment boundary.
+
+        Args:
+            origin_real (datetime): Real time of the first boundary.
+            origin_rp (datetime): RP time at the first boundary.
+            interval (timedelta): Real time between increments.
+            incr_unit (TimeUnit): Unit of each increment.
+            incr_amount (int): Amount of `incr_unit` in each increment.
+            calendar (RpCalendar, optional): Calendar the RP times are in. Defaults to the Gregorian calendar.
+        """
+        self.origin_real = origin_real
+        self.origin_rp = origin_rp
+        self.interval = interval
+        self.incr_unit = incr_unit
+        self.incr_amount = incr_amount
+        self.calendar = calendar
+
+        # boundaries before _offset have been dropped by rebase()
+        self._offset = 0
+        # only the first boundary for fixed-length increments, which rp_time() computes directly
+        self.rp_times: List[datetime] = [origin_rp]
+        seconds = calendar.unit_seconds(incr_unit) * incr_amount
+        self._fixed_step: Optional[timedelta] = timedelta(seconds=seconds) if seconds else None
+
+    def __len__(self) -> int:
+        return len(self.rp_times)
+
+    def _extend_to(self, count: int, limit: int) -> None:
+        """Makes sure at least `count` boundaries are precomputed, growing geometrically.
+
+        Args:
+            count (int): Number of boundaries needed.
+            limit (int): Don't grow past this many boundaries, the per-call cap of the lookup.
+
+        Raises:
+            ValueError: If `count` is past `limit` or `MAX_BOUNDARIES`.
+        """
+        if count <= len(self.rp_times):
+            return
+        if count > min(limit, self.MAX_BOUNDARIES):
+            raise ValueError("Too far ahead to project.")
+
+        target = min(max(count, len(self.rp_times) * 2), limit, self.MAX_BOUNDARIES)
+        # one increment at a time from the previous boundary, like `RpHandler.update()` - month day
+        # clamping accumulates there (Jan 31 -> Feb 28 -> Mar 28), so it has to here as well
+        rp_dt = self.rp_times[-1]
+        for _ in range(len(self.rp_times), target):
+            rp_dt = self.calendar.add(rp_dt, self.incr_unit, self.incr_amount)
+            self.rp_times.append(rp_dt)
+
+    def _call_limit(self) -> int:
+        return len(self.rp_times) + self.MAX_BOUNDARIES_PER_CALL
+
+    def real_time(self, k: int) -> datetime:
+        """Real time of boundary k.
+
+        Raises:
+            ValueError: If boundary k is too far ahead.
+        """
+        try:
+            return self.origin_real + (self._offset + k) * self.interval
+        except OverflowError as e:
+            raise ValueError("Too far ahead to project.") from e
+
+    def rp_time(self, k: int) -> datetime:
+        """RP time at boundary k.
+
+        Raises:
+            ValueError: If boundary k is too far ahead.
+        """
+        if self._fixed_step is not None:
+            try:
+                return self.rp_times[0] + k * self._fixed_step
+            except OverflowError as e:
+                raise ValueError("Too far ahead to project.") from e
+
+        self._extend_to(k + 1, self._call_limit())
+        return self.rp_times[k]
+
+    def boundary_at_real_time(self, real_dt: datetime) -> int:
+        """Returns the last boundary at or before a real time.
+
+        Raises:
+            ValueError: If the time is before the first boundary.
+        """
+        k = (real_dt - self.real_time(0)) // self.interval
+        if k < 0:
+            raise ValueError("Time is before the start of the index.")
+        return k
+
+    def boundary_at_rp_time(self, rp_dt: datetime) -> int:
+        """Returns the last boundary whose RP time is at or before an RP time.
+
+        Raises:
+            ValueError: If the RP time is before the first boundary, or too far ahead.
+        """
+        if self._fixed_step is not None:
+            k = (rp_dt - self.rp_times[0]) // self._fixed_step
+        else:
+            limit = self._call_limit()
+            while self.rp_times[-1] <= rp_dt:
+                self._extend_to(len(self.rp_times) + 1, limit)
+            k = bisect.bisect_right(self.rp_times, rp_dt) - 1
+
+        if k < 0:
+            raise ValueError("RP time is before the start of the index.")
+        return k
+
+    def rebase(self, real_dt: datetime, rp_dt: datetime) -> bool:
+        """Moves the first boundary forward to an existing boundary, e.g. after the RP is incremented,
+        keeping everything that has already been computed past it.
+
+        Args:
+            real_dt (datetime): Real time of the new first boundary.
+            rp_dt (datetime): RP time at the new first boundary.
+
+        Returns:
+            bool: Whether (real_dt, rp_dt) is a boundary of this index. If not, the index must be rebuilt.
+        """
+        k, remainder = divmod(real_dt - self.real_time(0), self.interval)
+        if k < 0 or remainder or k >= self.MAX_BOUNDARIES:
+            return False
+        if k == 0:
+            return self.rp_times[0] == rp_dt
+
+        try:
+            if self.rp_time(k) != rp_dt:
+                return False
+        except ValueError:
+            return False
+
+        if self._fixed_step is not None:
+            self.rp_times[0] = rp_dt
+        else:
+            del self.rp_times[:k]
+        self._offset += k
+        return True
@@ -0,0 +1,252 @@
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from cidderbot.calendars.base import RpCalendar
+    from cidderbot.models.rp_handler import RpHandler
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+US_PER_SECOND = 1_000_000
+
+
+def datetime_to_us(dt: datetime) -> int:
+    """Converts an aware datetime into integer microseconds since the Unix epoch."""
+    delta = dt - EPOCH
+    return (delta.days * 86400 + delta.seconds) * US_PER_SECOND + delta.microseconds
+
+
+def us_array_to_datetimes(values: np.ndarray) -> List[datetime]:
+    """Converts an array of `datetime64[us]` into a list of aware UTC datetimes."""
+    return [dt.replace(tzinfo=timezone.utc) for dt in values.astype(datetime)]
+
+
+class RpClockStore:
+    """Struct-of-arrays store of RP clocks, used to compute the times of many RPs in one vectorized pass.
+
+    Every RP is a row across a set of int64 arrays (times in microseconds since the Unix epoch),
+    so computing e.g. the current RP time of thousands of RPs costs a handful of NumPy operations
+    instead of a Python loop.
+
+    Rows are not updated automatically - call `update()` after an RP changes.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        """Creates an empty store.
+
+        Args:
+            capacity (int, optional): Initial number of rows to allocate. Grows as required. Defaults to 64.
+        """
+        self._size = 0
+        self._handlers: List["RpHandler"] = []
+        self._rows: Dict["RpHandler", int] = {}
+
+        self.prev_incr_us = np.zeros(capacity, dtype=np.int64)
+        self.interval_us = np.ones(capacity, dtype=np.int64)
+        self.units_per_incr = np.ones(capacity, dtype=np.int64)
+        self.base_rp_us = np.zeros(capacity, dtype=np.int64)
+        # length of the RP's unit - 0 for calendar units
+        self.unit_us = np.zeros(capacity, dtype=np.int64)
+        # months in the RP's unit - 0 for fixed-length units
+        self.unit_months = np.zeros(capacity, dtype=np.int64)
+        # the RP's calendar, as an index into _calendars
+        self.calendar_ids = np.zeros(capacity, dtype=np.int64)
+        self._calendars: List["RpCalendar"] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, rp: "RpHandler") -> bool:
+        return rp in self._rows
+
+    @property
+    def handlers(self) -> List["RpHandler"]:
+        """RPs in row order, i.e. matching the order of every returned array."""
+        return list(self._handlers)
+
+    _ARRAYS = (
+        "prev_incr_us",
+        "interval_us",
+        "units_per_incr",
+        "base_rp_us",
+        "unit_us",
+        "unit_months",
+        "calendar_ids",
+    )
+
+    # ================================ Rows ================================
+
+    def add(self, rp: "RpHandler") -> None:
+        """Adds an RP to the store. If it is already in the store, its row is updated instead.
+
+        Args:
+            rp (RpHandler): RP to add.
+        """
+        if rp in self._rows:
+            self.update(rp)
+            return
+
+        if self._size == len(self.prev_incr_us):
+            self._grow()
+
+        row = self._size
+        self._size += 1
+        self._handlers.append(rp)
+        self._rows[rp] = row
+        self._write_row(row, rp)
+
+    def update(self, rp: "RpHandler") -> None:
+        """Refreshes an RP's row from the RP, e.g. after an increment.
+
+        Args:
+            rp (RpHandler): RP to refresh.
+        """
+        self._write_row(self._rows[rp], rp)
+
+    def remove(self, rp: "RpHandler") -> bool:
+        """Removes an RP. The last row is moved into its place, so row order is not preserved.
+
+        Args:
+            rp (RpHandler): RP to remove.
+
+        Returns:
+            bool: Whether the RP was in the store.
+        """
+        row = self._rows.pop(rp, None)
+        if row is None:
+            return False
+
+        last = self._size - 1
+        if row != last:
+            for name in self._ARRAYS:
+                array = getattr(self, name)
+                array[row] = array[last]
+            moved = self._handlers[last]
+            self._handlers[row] = moved
+            self._rows[moved] = row
+
+        self._handlers.pop()
+        self._size -= 1
+        return True
+
+    def _write_row(self, row: int, rp: "RpHandler") -> None:
+        self.prev_incr_us[row] = datetime_to_us(rp.prev_incr_datetime)
+        self.interval_us[row] = rp.incr_interval // timedelta(microseconds=1)
+        self.units_per_incr[row] = max(rp.num_units_in_incr, 1)
+        self.base_rp_us[row] = datetime_to_us(rp.rp_datetime)
+
+        # months and years aren't a fixed number of seconds, they're added as calendar months instead
+        self.unit_months[row] = rp.calendar.unit_months(rp.rp_datetime_unit)
+        self.unit_us[row] = rp.calendar.unit_seconds(rp.rp_datetime_unit) * US_PER_SECOND
+
+        if rp.calendar not in self._calendars:
+            self._calendars.append(rp.calendar)
+        self.calendar_ids[row] = self._calendars.index(rp.calendar)
+
+    def _grow(self) -> None:
+        for name in self._ARRAYS:
+            array = getattr(self, name)
+            grown = np.ones(len(array) * 2, dtype=np.int64)
+            grown[: len(array)] = array
+            setattr(self, name, grown)
+
+    # ================================ Computation ================================
+
+    def _view(self, name: str) -> np.ndarray:
+        return getattr(self, name)[: self._size]
+
+    def _elapsed_units(self, now: Optional[datetime]):
+        """Whole increments elapsed, plus the fraction of the current increment elapsed, in units."""
+        now_us = datetime_to_us(now or datetime.now(timezone.utc))
+        interval = self._view("interval_us")
+        units = self._view("units_per_incr")
+
+        incrs, remainder = np.divmod(now_us - self._view("prev_incr_us"), interval)
+        # float is only used within a single increment, to keep int64 products from overflowing
+        fraction_units = remainder / interval * units
+        return incrs, units, fraction_units
+
+    def _add_units(self, counts: np.ndarray) -> np.ndarray:
+        """Adds a number of units to each RP's base RP time.
+
+        Args:
+            counts (np.ndarray): Number of units to add, per RP.
+
+        Returns:
+            np.ndarray: RP times as `datetime64[us]`.
+        """
+        base = self._view("base_rp_us")
+        unit_months = self._view("unit_months")
+
+        result = base + counts * self._view("unit_us")
+
+        # calendar units: add whole months, one vectorized call per calendar
+        calendar_ids = self._view("calendar_ids")
+        for calendar_id in np.unique(calendar_ids[unit_months > 0]):
+            rows = (unit_months > 0) & (calendar_ids == calendar_id)
+            result[rows] = self._calendars[calendar_id].add_months_us(base[rows], counts[rows] * unit_months[rows])
+
+        return result.astype("datetime64[us]")
+
+    def current_unit_times(self, now: Optional[datetime] = None) -> np.ndarray:
+        """Current RP time of every RP, to the precision of each RP's unit.
+        Vectorized equivalent of `RpHandler.get_current_rp_unit_time()`.
+
+        Args:
+            now (Optional[datetime], optional): Real time to compute at. Defaults to the current time.
+
+        Returns:
+            np.ndarray: RP times as `datetime64[us]`, in row order.
+        """
+        incrs, units, fraction_units = self._elapsed_units(now)
+        counts = incrs * units + np.floor(fraction_units).astype(np.int64)
+        return self._add_units(counts)
+
+    def next_unit_times(self, now: Optional[datetime] = None) -> np.ndarray:
+        """Next RP time of every RP, to the precision of each RP's unit.
+        Vectorized equivalent of `RpHandler.get_next_rp_unit_time()`.
+
+        Args:
+            now (Optional[datetime], optional): Real time to compute at. Defaults to the current time.
+
+        Returns:
+            np.ndarray: RP times as `datetime64[us]`, in row order.
+        """
+        incrs, units, fraction_units = self._elapsed_units(now)
+        counts = incrs * units + np.floor(fraction_units).astype(np.int64) + 1
+        return self._add_units(counts)
+
+    def next_unit_datetimes(self, now: Optional[datetime] = None) -> np.ndarray:
+        """Real time at which each RP reaches its next unit.
+        Vectorized equivalent of `RpHandler.next_unit_datetime`.
+
+        Args:
+            now (Optional[datetime], optional): Real time to compute at. Defaults to the current time.
+
+        Returns:
+            np.ndarray: Real times as `datetime64[us]`, in row order.
+        """
+        incrs, units, fraction_units = self._elapsed_units(now)
+        interval = self._view("interval_us")
+
+        within_incr = np.rint((np.floor(fraction_units) + 1) / units * interval).astype(np.int64)
+        real_us = self._view("prev_incr_us") + incrs * interval + within_incr
+        return real_us.astype("datetime64[us]")
+
+    def next_incr_datetimes(self) -> np.ndarray:
+        """Real time of each RP's next increment, as `datetime64[us]` in row order."""
+        return (self._view("prev_incr_us") + self._view("interval_us")).astype("datetime64[us]")
+
+    def due(self, now: Optional[datetime] = None) -> List["RpHandler"]:
+        """RPs whose next increment is due as of `now`.
+
+        Args:
+            now (Optional[datetime], optional): Real time to check against. Defaults to the current time.
+
+        Returns:
+            List[RpHandler]: Due RPs.
+        """
+        now_us = datetime_to_us(now or datetime.now(timezone.utc))
+        mask = self._view("prev_incr_us") + self._view("interval_us") <= now_us
+        return [self._handlers[row] for row in np.flatnonzero(mask)]
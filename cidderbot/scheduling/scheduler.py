@@ -0,0 +1,286 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional
+
+from cidderbot.utils.time_formatters import utc_now
+
+if TYPE_CHECKING:
+    from cidderbot.models.rp_handler import RpHandler
+
+
+class _HeapEntry:
+    """Entry in the scheduler heap. Entries are never removed from the heap directly,
+    they are marked as cancelled instead and skipped when popped (lazy deletion)."""
+
+    __slots__ = ("deadline", "seq", "rp", "cancelled")
+
+    def __init__(self, deadline: datetime, seq: int, rp: "RpHandler") -> None:
+        self.deadline = deadline
+        self.seq = seq
+        self.rp = rp
+        self.cancelled = False
+
+    def __lt__(self, other: "_HeapEntry") -> bool:
+        # seq breaks ties so RpHandlers themselves never get compared
+        return (self.deadline, self.seq) < (other.deadline, other.seq)
+
+
+class RpScheduler:
+    """Single scheduler for all RP increments.
+
+    Keeps a min-heap keyed on each RP's absolute `next_incr_datetime`, sleeps only until the
+    earliest deadline and then fires every RP that is due in one batch. As deadlines are absolute,
+    slow updates do not push later updates back (unlike sleeping `incr_interval` after each update).
+
+    RPs can be added, removed and rescheduled at any time, including while `run()` is running.
+    """
+
+    def __init__(
+        self,
+        on_due: Callable[[List["RpHandler"]], Awaitable[None]],
+        clock: Callable[[], datetime] = utc_now,
+    ) -> None:
+        """Creates an empty scheduler.
+
+        Args:
+            on_due (Callable[[List[RpHandler]], Awaitable[None]]): Coroutine function called with
+                the batch of RPs that are due. RPs are expected to have advanced their
+                `next_incr_datetime` once it returns.
+            clock (Callable[[], datetime], optional): Returns the current (aware) time.
+                Defaults to the current UTC time.
+        """
+        self._on_due = on_due
+        self._clock = clock
+
+        self._heap: List[_HeapEntry] = []
+        self._entries: Dict["RpHandler", _HeapEntry] = {}
+        # entries popped for the batch currently being fired
+        self._firing: Dict["RpHandler", _HeapEntry] = {}
+        self._counter = itertools.count()
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+
+        # lateness = how long after its deadline an RP actually fired
+        self.fired_count = 0
+        self.batch_count = 0
+        self.last_lateness = timedelta(0)
+        self.max_lateness = timedelta(0)
+        self._total_lateness = timedelta(0)
+        self.lateness_by_rp: Dict[str, timedelta] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, rp: "RpHandler") -> bool:
+        return rp in self._entries
+
+    # ================================ Heap management ================================
+
+    def add(self, rp: "RpHandler", deadline: Optional[datetime] = None) -> None:
+        """Schedules an RP. If the RP is already scheduled, it is rescheduled instead.
+
+        Args:
+            rp (RpHandler): RP to schedule.
+            deadline (Optional[datetime], optional): Absolute time to fire the RP at.
+                Defaults to the RP's `next_incr_datetime`.
+        """
+        if deadline is None:
+            deadline = rp.next_incr_datetime
+
+        existing = self._entries.get(rp)
+        if existing:
+            existing.cancelled = True
+
+        entry = _HeapEntry(deadline, next(self._counter), rp)
+        self._entries[rp] = entry
+        heapq.heappush(self._heap, entry)
+
+        logging.debug("%s: scheduled for %s.", rp, deadline)
+
+        # the earliest deadline may have changed
+        self._notify()
+
+    def reschedule(self, rp: "RpHandler", deadline: Optional[datetime] = None) -> None:
+        """Moves an already scheduled RP to a new deadline. Alias for `add()`.
+
+        Args:
+            rp (RpHandler): RP to reschedule.
+            deadline (Optional[datetime], optional): New deadline. Defaults to the RP's `next_incr_datetime`.
+        """
+        self.add(rp, deadline)
+
+    def remove(self, rp: "RpHandler") -> bool:
+        """Unschedules an RP.
+
+        Args:
+            rp (RpHandler): RP to remove.
+
+        Returns:
+            bool: Whether the RP was scheduled.
+        """
+        entry = self._entries.pop(rp, None) or self._firing.pop(rp, None)
+        if not entry:
+            return False
+
+        entry.cancelled = True
+        self._notify()
+        return True
+
+    @property
+    def next_deadline(self) -> Optional[datetime]:
+        """Earliest deadline in the scheduler, or None if nothing is scheduled."""
+        self._discard_cancelled()
+        if not self._heap:
+            return None
+        return self._heap[0].deadline
+
+    def get_deadline(self, rp: "RpHandler") -> Optional[datetime]:
+        entry = self._entries.get(rp)
+        return entry.deadline if entry else None
+
+    def _discard_cancelled(self) -> None:
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: datetime) -> List[_HeapEntry]:
+        due = []
+        self._discard_cancelled()
+        while self._heap and self._heap[0].deadline <= now:
+            entry = heapq.heappop(self._heap)
+            del self._entries[entry.rp]
+            due.append(entry)
+            self._discard_cancelled()
+        return due
+
+    # ================================ Running ================================
+
+    async def run_pending(self, now: Optional[datetime] = None) -> List["RpHandler"]:
+        """Fires every RP that is due as of `now` in a single batch, then reschedules them
+        at their new `next_incr_datetime`.
+
+        Args:
+            now (Optional[datetime], optional): Time to check deadlines against. Defaults to the clock time.
+
+        Returns:
+            List[RpHandler]: RPs that were fired.
+        """
+        if now is None:
+            now = self._clock()
+
+        due = self._pop_due(now)
+        if not due:
+            return []
+
+        rps = [entry.rp for entry in due]
+        for entry in due:
+            self._record_lateness(entry.rp, now - entry.deadline)
+            self._firing[entry.rp] = entry
+        self.batch_count += 1
+
+        try:
+            await self._on_due(rps)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # note - continues even on failure
+            logging.exception("Scheduled update failed for %s.", rps)
+
+        for entry in due:
+            self._firing.pop(entry.rp, None)
+            # the RP may have been removed or rescheduled from within the callback
+            if entry.cancelled or entry.rp in self._entries:
+                continue
+
+            next_deadline = entry.rp.next_incr_datetime
+            if next_deadline <= entry.deadline:
+                # RP was not advanced, don't fire it again straight away
+                logging.warning(
+                    "%s: was not advanced past %s, skipping to the next interval.",
+                    entry.rp,
+                    entry.deadline,
+                    extra={"rp": entry.rp.name},
+                )
+                next_deadline = entry.deadline + entry.rp.incr_interval
+            self.add(entry.rp, next_deadline)
+
+        return rps
+
+    async def run(self) -> None:
+        """Runs the scheduler until `stop()` is called. Only wakes up for the earliest deadline,
+        or when the heap is changed."""
+        if self._running:
+            logging.warning("Scheduler is already running.")
+            return
+
+        self._running = True
+        self._wakeup = asyncio.Event()
+        logging.info("RP scheduler started with %s RPs.", len(self))
+
+        try:
+            while self._running:
+                self._wakeup.clear()
+                await self.run_pending()
+
+                deadline = self.next_deadline
+                timeout = None
+                if deadline is not None:
+                    timeout = max((deadline - self._clock()).total_seconds(), 0)
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._running = False
+            logging.info("RP scheduler stopped.")
+
+    def stop(self) -> None:
+        """Stops `run()` after the current iteration."""
+        self._running = False
+        self._notify()
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def _notify(self) -> None:
+        if self._wakeup:
+            self._wakeup.set()
+
+    # ================================ Lateness ================================
+
+    def _record_lateness(self, rp: "RpHandler", lateness: timedelta) -> None:
+        self.fired_count += 1
+        self.last_lateness = lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        self._total_lateness += lateness
+        self.lateness_by_rp[rp.name] = lateness
+
+        logging.debug(
+            "%s: fired %.3fs after its deadline.",
+            rp,
+            lateness.total_seconds(),
+            extra={"rp": rp.name},
+        )
+
+    @property
+    def mean_lateness(self) -> timedelta:
+        if not self.fired_count:
+            return timedelta(0)
+        return self._total_lateness / self.fired_count
+
+    def get_lateness_stats(self) -> Dict[str, float]:
+        """Returns scheduling lateness statistics, in seconds.
+
+        Returns:
+            Dict[str, float]: Fired and batch counts, last, mean and max lateness.
+        """
+        return {
+            "fired": self.fired_count,
+            "batches": self.batch_count,
+            "last": self.last_lateness.total_seconds(),
+            "mean": self.mean_lateness.total_seconds(),
+            "max": self.max_lateness.total_seconds(),
+        }
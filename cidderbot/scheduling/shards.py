@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List
+
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.scheduling.scheduler import RpScheduler
+
+
+def shard_id_for_guild(guild_id: int, shard_count: int) -> int:
+    """Returns the shard a guild is on, using the same formula as Discord.
+
+    Args:
+        guild_id (int): Guild id.
+        shard_count (int): Total number of shards.
+
+    Returns:
+        int: Shard id.
+    """
+    return (guild_id >> 22) % shard_count
+
+
+class ShardPartition:
+    """The part of Cidder's state that belongs to one shard.
+
+    Each RP is owned by exactly one shard (the one with the guild of its update channel), whose
+    scheduler runs its timer. The guild index holds every RP that is in one of this shard's guilds,
+    including RPs owned by other shards.
+    """
+
+    def __init__(
+        self,
+        shard_id: int,
+        on_due: Callable[[List[RpHandler]], Awaitable[None]],
+        clock: Callable[[], datetime],
+    ) -> None:
+        """Creates an empty partition.
+
+        Args:
+            shard_id (int): Shard id.
+            on_due (Callable[[List[RpHandler]], Awaitable[None]]): Called with this shard's RPs that are due.
+            clock (Callable[[], datetime]): Returns the current (aware) time.
+        """
+        self.shard_id = shard_id
+        self.scheduler = RpScheduler(on_due, clock=clock)
+
+        # RPs whose timers this shard runs
+        self.rps: List[RpHandler] = []
+
+        # guild id -> RPs in that guild, so lookups don't have to scan every RP
+        self.rps_by_guild: Dict[int, List[RpHandler]] = {}
+
+    def __repr__(self) -> str:
+        return f"<Shard {self.shard_id}: {len(self.rps)} RPs>"
+
+    # ==== Owned RPs ====
+
+    def own(self, rp: RpHandler) -> None:
+        if rp not in self.rps:
+            self.rps.append(rp)
+        self.scheduler.add(rp)
+
+    def disown(self, rp: RpHandler) -> bool:
+        if rp not in self.rps:
+            return False
+
+        self.rps.remove(rp)
+        self.scheduler.remove(rp)
+        return True
+
+    # ==== Guild index ====
+
+    def index(self, guild_id: int, rp: RpHandler) -> None:
+        guild_rps = self.rps_by_guild.setdefault(guild_id, [])
+        if rp not in guild_rps:
+            guild_rps.append(rp)
+
+    def unindex(self, guild_id: int, rp: RpHandler) -> None:
+        guild_rps = self.rps_by_guild.get(guild_id)
+        if not guild_rps or rp not in guild_rps:
+            return
+
+        guild_rps.remove(rp)
+        if not guild_rps:
+            del self.rps_by_guild[guild_id]
+
+    def get_rps_for_guild(self, guild_id: int) -> List[RpHandler]:
+        return list(self.rps_by_guild.get(guild_id, ()))
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from typing import Coroutine, Dict, List, Optional
+
+
+class TaskRegistry:
+    """Named background tasks (the RP scheduler, the state writer, etc.).
+
+    Only one task can run under a name, so setup code that runs again (e.g. `on_ready` after a
+    gateway reconnect) can never start a second copy of a timer. Finished tasks remove themselves,
+    and their exceptions are logged instead of being lost.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        self.started_count = 0
+        # starts that were refused because the task was already running
+        self.duplicate_count = 0
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, name: str) -> bool:
+        return self.is_running(name)
+
+    def start(self, name: str, coro: Coroutine) -> asyncio.Task:
+        """Starts a task, unless one is already running under the same name.
+
+        Args:
+            name (str): Unique task name.
+            coro (Coroutine): Coroutine to run. Closed without running if the task is already running.
+
+        Returns:
+            asyncio.Task: The new task, or the one that was already running.
+        """
+        existing = self.get(name)
+        if existing:
+            coro.close()
+            self.duplicate_count += 1
+            logging.warning("Task %s is already running, not starting another.", name)
+            return existing
+
+        task = asyncio.get_running_loop().create_task(coro, name=name)
+        self._tasks[name] = task
+        self.started_count += 1
+        task.add_done_callback(lambda t: self._on_done(name, t))
+        return task
+
+    def _on_done(self, name: str, task: asyncio.Task) -> None:
+        if self._tasks.get(name) is task:
+            del self._tasks[name]
+
+        if not task.cancelled() and task.exception():
+            logging.error("Task %s failed: %s", name, task.exception(), exc_info=task.exception())
+
+    def get(self, name: str) -> Optional[asyncio.Task]:
+        task = self._tasks.get(name)
+        if task and not task.done():
+            return task
+        return None
+
+    def is_running(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def names(self) -> List[str]:
+        """Names of the running tasks, sorted."""
+        return sorted(name for name, task in self._tasks.items() if not task.done())
+
+    async def cancel(self, name: str) -> bool:
+        """Cancels a task and waits for it to finish.
+
+        Args:
+            name (str): Task name.
+
+        Returns:
+            bool: Whether the task was running.
+        """
+        task = self._tasks.pop(name, None)
+        if not task or task.done():
+            return False
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return True
+
+    async def cancel_all(self) -> None:
+        for name in list(self._tasks):
+            await self.cancel(name)
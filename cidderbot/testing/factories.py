@@ -0,0 +1,76 @@
+"""Small test doubles shared by the tests, the benchmarks and `fake_discord`: a clock that only moves
+when told to, a guild that's nothing but an id, RPs with defaults for everything a test doesn't
+care about, and exceptions with a real traceback. Kept free of discord.py and the cogs, so importing
+it is cheap.
+"""
+
+from datetime import datetime, timedelta, timezone
+from types import TracebackType
+from typing import Any, Generic, Iterable, Tuple, Type, TypeVar
+
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.utils.time_formatters import TimeUnit
+
+T = TypeVar("T")
+
+# the RP date `make_rp` starts at
+RP_START = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class VirtualClock(Generic[T]):
+    """Returns `now` until it's changed. Holds an aware datetime for the clocks RPs and the scheduler
+    use, or seconds for the monotonic clocks of the dispatcher, worker leases, startup timeline, etc."""
+
+    def __init__(self, now: T) -> None:
+        self.now = now
+
+    def __call__(self) -> T:
+        return self.now
+
+
+class StubGuild:
+    """A guild with just an id - all that RPs, Cidder's index and the repository look at."""
+
+    def __init__(self, guild_id: int) -> None:
+        self.id = guild_id
+
+
+def make_rp(name: str = "Sagrea", guilds: Iterable[Any] = (), **kwargs: Any) -> RpHandler:
+    """Creates an RP where 1 day of real time is 1 RP month of 30 RP days, dated 1 January 1970 and
+    last incremented just now (by its clock, if it has one).
+
+    Args:
+        name (str, optional): RP name. Defaults to "Sagrea".
+        guilds (Iterable[Any], optional): Guilds the RP is in. Defaults to none.
+        **kwargs: Any other `RpHandler` arguments, overriding the defaults.
+
+    Returns:
+        RpHandler: The RP.
+    """
+    clock = kwargs.get("clock")
+    options = {
+        "rp_datetime_unit": TimeUnit.DAY,
+        "rp_datetime_incr_unit": TimeUnit.MONTH,
+        "rp_datetime": RP_START,
+        "rp_datetime_incr_amount": 1,
+        "last_datetime": clock() if clock else datetime.now(timezone.utc),
+        "incr_interval": timedelta(days=1),
+    }
+    options.update(kwargs)
+    return RpHandler(name=name, guilds=list(guilds), **options)
+
+
+def raised(error: BaseException) -> Tuple[Type[BaseException], BaseException, TracebackType]:
+    """Raises and catches an exception, e.g. for the `exc_info` of a log record.
+
+    Args:
+        error (BaseException): Exception to raise.
+
+    Returns:
+        Tuple[Type[BaseException], BaseException, TracebackType]: Its exc_info, traceback included.
+    """
+    try:
+        raise error
+    except BaseException:  # pylint: disable=broad-exception-caught
+        pass
+    return type(error), error, error.__traceback__
@@ -0,0 +1,381 @@
+"""Offline stand-in for the parts of Discord the bot uses, for end-to-end load testing without
+a token or a gateway connection.
+
+`FakeBot` is a real `commands.Bot` (so `BotEvents`, the `Rp` cog and command processing all run
+unchanged), with the gateway-backed surface replaced: its user, guilds, channels and owner are fake,
+and `Context.send` / `channel.send` just record messages. `FakeDiscordHarness` wires it up with a
+`Cidder` holding synthetic RPs, drives `rp!` messages through `on_message`, and increments RPs
+on a virtual clock.
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import discord
+from discord.ext import commands
+
+from cidderbot.cidder import Cidder
+from cidderbot.cogs.rp import Rp
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.models.guild import CidderGuild
+from cidderbot.events.events import BotEvents
+from cidderbot.messaging.dispatcher import MessageDispatcher
+from cidderbot.messaging.prefixes import DEFAULT_PREFIX, PrefixCache
+from cidderbot.testing.factories import VirtualClock
+from cidderbot.utils.time_formatters import TimeUnit
+
+COMMAND_PREFIX = DEFAULT_PREFIX
+BOT_USER_ID = 1
+OWNER_ID = 2
+
+# snowflake-like, so guilds are spread over shards like real ones: (id >> 22) % shard_count
+_ids = (n << 22 for n in itertools.count(1000))
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str, bot: bool = False) -> None:
+        self.id = user_id
+        self.name = name
+        self.bot = bot
+        self.mention = f"<@{user_id}>"
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeChannel:
+    """Text channel that records sent messages instead of sending them."""
+
+    def __init__(self, channel_id: int, guild: "FakeGuild", name: str) -> None:
+        self.id = channel_id
+        self.guild = guild
+        self.name = name
+        self.type = discord.ChannelType.text
+        self.sent: List[str] = []
+        # called with each sent message, e.g. to measure latency
+        self.on_send: Optional[Callable[["FakeChannel", str], None]] = None
+
+    def __str__(self) -> str:
+        return self.name
+
+    async def send(self, content: Optional[str] = None, **_kwargs) -> None:
+        self.sent.append(content)
+        on_send = self.on_send
+        if on_send is not None:
+            on_send(self, content)
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, name: str, channel_count: int = 2) -> None:
+        self.id = guild_id
+        self.name = name
+        self.channels = [
+            FakeChannel(next(_ids), self, f"{name}-channel-{i}") for i in range(channel_count)
+        ]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeMessage:
+    def __init__(self, content: str, author: FakeUser, channel: FakeChannel) -> None:
+        self.id = next(_ids)
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.attachments = []
+        self.mentions = []
+        self._state = None
+
+
+class FakeContext(commands.Context):
+    """Context whose replies go straight to the fake channel."""
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> None:
+        await self.channel.send(content, **kwargs)
+
+
+class FakeBot(commands.Bot):
+    """`commands.Bot` without a gateway. Call `setup_offline()` from a running event loop before use."""
+
+    def __init__(
+        self,
+        guilds: List[FakeGuild],
+        command_prefix: Union[str, PrefixCache] = COMMAND_PREFIX,
+        shard_count: int = 1,
+    ) -> None:
+        super().__init__(
+            command_prefix=command_prefix,
+            intents=discord.Intents.default(),
+            owner_id=OWNER_ID,
+        )
+        # like AutoShardedBot, but all shards are fake too
+        self.shard_count = shard_count if shard_count > 1 else None
+        self._fake_user = FakeUser(BOT_USER_ID, "Cidder", bot=True)
+        self._fake_guilds = guilds
+        self._fake_channels: Dict[int, FakeChannel] = {
+            channel.id: channel for guild in guilds for channel in guild.channels
+        }
+        self._fake_ready: Optional[asyncio.Event] = None
+        self._fake_closed = False
+        self.fake_latency = 0.05
+
+    async def setup_offline(self) -> None:
+        """Sets up the event loop dependent parts a gateway login would."""
+        await self._async_setup_hook()
+        self._fake_ready = asyncio.Event()
+
+    def set_ready(self) -> None:
+        """Releases `wait_until_ready()`, e.g. to let the cog's scheduler run on real time."""
+        self._fake_ready.set()
+
+    # ==== gateway-backed surface ====
+
+    @property
+    def user(self) -> FakeUser:
+        return self._fake_user
+
+    @property
+    def guilds(self) -> List[FakeGuild]:
+        return self._fake_guilds
+
+    @property
+    def users(self) -> List[FakeUser]:
+        return [self._fake_user]
+
+    @property
+    def latency(self) -> float:
+        return self.fake_latency
+
+    @property
+    def latencies(self) -> List[Tuple[int, float]]:
+        return [(shard_id, self.fake_latency) for shard_id in range(self.shard_count or 1)]
+
+    def get_channel(self, channel_id: int, /) -> Optional[FakeChannel]:
+        return self._fake_channels.get(channel_id)
+
+    def get_all_channels(self) -> Iterable[FakeChannel]:
+        return iter(self._fake_channels.values())
+
+    def is_ready(self) -> bool:
+        return bool(self._fake_ready and self._fake_ready.is_set())
+
+    async def wait_until_ready(self) -> None:
+        await self._fake_ready.wait()
+
+    def is_closed(self) -> bool:
+        return self._fake_closed
+
+    async def close(self) -> None:
+        self._fake_closed = True
+        for cog_name in list(self.cogs):
+            await self.remove_cog(cog_name)
+
+    async def get_context(self, origin, /, *, cls=FakeContext):
+        return await super().get_context(origin, cls=cls)
+
+
+class SyntheticCidder(Cidder):
+    """Cidder that loads generated RPs instead of reading the database or env vars."""
+
+    def __init__(
+        self,
+        make_rps: Callable[[List[CidderGuild]], List[RpHandler]],
+        clock: Callable[[], datetime],
+    ) -> None:
+        super().__init__(database=None, clock=clock)
+        self._make_rps = make_rps
+
+    async def _load_rps(self) -> List[RpHandler]:
+        return self._make_rps(self.guilds)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+class FakeDiscordHarness:
+    """Runs the whole bot (events, Cidder, Rp cog) against `FakeBot`.
+
+    The cog's scheduler is not started - RP increments only happen when `advance()` moves the
+    virtual clock, so runs are deterministic and don't wait on real time.
+    """
+
+    START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    INTERVALS = (timedelta(minutes=30), timedelta(hours=1), timedelta(hours=6), timedelta(days=1))
+
+    def __init__(
+        self,
+        rp_count: int = 100,
+        guild_count: int = 50,
+        seed: int = 0,
+        real_rate_limits: bool = False,
+        shard_count: int = 1,
+    ) -> None:
+        """Creates the fake guilds. Call `start()` to run the bot's startup, or use `async with`.
+
+        Args:
+            rp_count (int, optional): Number of synthetic RPs. Defaults to 100.
+            guild_count (int, optional): Number of fake guilds the RPs are spread over. Defaults to 50.
+            seed (int, optional): Random seed. Defaults to 0.
+            real_rate_limits (bool, optional): Whether update messages keep to Discord's rate limits
+                (and coalescing window) in real time. Defaults to False, which sends them immediately.
+            shard_count (int, optional): Number of (fake) shards the bot runs. Defaults to 1, i.e. not sharded.
+        """
+        self.rp_count = rp_count
+        self.real_rate_limits = real_rate_limits
+        self.rng = random.Random(seed)
+        self.clock = VirtualClock(self.START)
+
+        self.guilds = [FakeGuild(next(_ids), f"guild{i}") for i in range(guild_count)]
+        self._guilds_by_id = {guild.id: guild for guild in self.guilds}
+        self.player = FakeUser(next(_ids), "player")
+        self.owner = FakeUser(OWNER_ID, "owner")
+
+        self.cidder = SyntheticCidder(self._make_rps, self.clock)
+        self.bot = FakeBot(self.guilds, command_prefix=self.cidder.prefixes, shard_count=shard_count)
+        self.cog: Optional[Rp] = None
+
+    def _make_rps(self, guilds: List[CidderGuild]) -> List[RpHandler]:
+        rps = []
+        for i in range(self.rp_count):
+            guild = guilds[i % len(guilds)]
+            interval = self.rng.choice(self.INTERVALS)
+            rps.append(
+                RpHandler(
+                    name=f"rp{i}",
+                    guilds=[guild],
+                    rp_datetime_unit=TimeUnit.DAY,
+                    rp_datetime_incr_unit=TimeUnit.MONTH,
+                    rp_datetime=datetime(1970, 1, 1, tzinfo=timezone.utc),
+                    rp_datetime_incr_amount=1,
+                    last_datetime=self.START - self.rng.random() * interval,
+                    incr_interval=interval,
+                    channel_id=guild.channels[0].id,
+                    clock=self.clock,
+                )
+            )
+        return rps
+
+    async def start(self) -> None:
+        """Registers the bot's events and runs `on_ready`, exactly like a real login would."""
+        await self.bot.setup_offline()
+        if not self.real_rate_limits:
+            unlimited = 1e12
+            self.cidder.dispatcher = MessageDispatcher(
+                coalesce_window=0,
+                channel_rate=unlimited,
+                channel_burst=unlimited,
+                global_rate=unlimited,
+                global_burst=unlimited,
+                metrics=self.cidder.metrics,
+            )
+
+        BotEvents(self.bot, self.cidder)
+        await self.bot.on_ready()  # pylint: disable=no-member
+        self.cog = self.bot.get_cog("Rp")
+
+    async def close(self) -> None:
+        # in the same order as the real bot, see CidderBotMixin
+        await self.cidder.shutdown()
+        await self.bot.close()
+
+    async def __aenter__(self) -> "FakeDiscordHarness":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_exc_info) -> None:
+        await self.close()
+
+    # ================================ Load ================================
+
+    def make_commands(self, count: int) -> List[FakeMessage]:
+        """Generates a mix of `rp!date`, `rp!info` and `rp!when` messages for random RPs."""
+        messages = []
+        for _ in range(count):
+            rp = self.rng.choice(self.cidder.rps)
+            # RPs hold the registry's guilds, which don't have channels to send to
+            guild = self._guilds_by_id[rp.guilds[0].id]
+            content = self.rng.choice(
+                (
+                    f"{COMMAND_PREFIX}date {rp.name}",
+                    f"{COMMAND_PREFIX}date {rp.name}",
+                    f"{COMMAND_PREFIX}info {rp.name}",
+                    f"{COMMAND_PREFIX}when 1 March 1975 in {rp.name}",
+                )
+            )
+            channel = self.rng.choice(guild.channels[1:] or guild.channels)
+            messages.append(FakeMessage(content, self.player, channel))
+        return messages
+
+    async def run_commands(self, messages: List[FakeMessage], concurrency: int = 32) -> Dict[str, float]:
+        """Sends messages through `on_message`, `concurrency` at a time, and times each one
+        until its handling (including the reply) is done.
+
+        Returns:
+            Dict[str, float]: Message and reply counts, throughput, and latency percentiles in ms.
+        """
+        replies_before = self.count_sent()
+        latencies: List[float] = []
+        queue = iter(messages)
+
+        async def worker():
+            for message in queue:
+                start = time.perf_counter()
+                await self.bot.on_message(message)  # pylint: disable=no-member
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            "messages": len(messages),
+            "replies": self.count_sent() - replies_before,
+            "seconds": elapsed,
+            "messages_per_s": len(messages) / elapsed if elapsed else float("inf"),
+            "p50_ms": percentile(latencies, 0.5) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        }
+
+    # ================================ Increments ================================
+
+    async def advance(self, duration: timedelta) -> Dict[str, float]:
+        """Moves the virtual clock forward, firing every RP increment on the way, in deadline order.
+
+        Returns:
+            Dict[str, float]: Increments fired, update messages sent, and real time taken.
+        """
+        cidder = self.cidder
+        end = self.clock.now + duration
+        sent_before = self.count_sent()
+        fired_before = cidder.get_lateness_stats()["fired"]
+
+        start = time.perf_counter()
+        while cidder.next_deadline and cidder.next_deadline <= end:
+            self.clock.now = cidder.next_deadline
+            await cidder.run_pending(self.clock.now)
+        self.clock.now = end
+        await cidder.dispatcher.flush()
+        elapsed = time.perf_counter() - start
+
+        fired = cidder.get_lateness_stats()["fired"] - fired_before
+        return {
+            "increments": fired,
+            "update_messages": self.count_sent() - sent_before,
+            "seconds": elapsed,
+            "increments_per_s": fired / elapsed if elapsed else float("inf"),
+        }
+
+    def count_sent(self) -> int:
+        return sum(len(channel.sent) for guild in self.guilds for channel in guild.channels)
@@ -0,0 +1,173 @@
+import atexit
+import logging
+import queue
+import threading
+from enum import Enum
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Tuple
+
+
+class OverflowPolicy(Enum):
+    """What to do with a record when the log queue is full."""
+
+    DROP_NEWEST = "drop_newest"  # discard the new record
+    DROP_OLDEST = "drop_oldest"  # discard the oldest queued record to make room
+    BLOCK = "block"  # wait for room, up to a timeout, then discard the new record
+
+
+class AsyncLogPipeline:
+    """Non-blocking logging pipeline.
+
+    Loggers get cheap `QueueHandler`s that only put records on an in-memory queue,
+    and a single background listener thread owns every real (file/console) handler.
+    Records are routed, so handlers attached to different loggers stay separate.
+
+    Records are flushed to the real handlers when the pipeline is stopped,
+    which also happens automatically on interpreter exit.
+    """
+
+    DEFAULT_QUEUE_SIZE = 10000
+
+    def __init__(
+        self,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_NEWEST,
+        block_timeout: float = 0.1,
+    ) -> None:
+        """Creates a pipeline. Call `start()` once all routes are added.
+
+        Args:
+            queue_size (int, optional): Maximum number of queued records. Defaults to 10000.
+            overflow_policy (OverflowPolicy, optional): What to do when the queue is full. Defaults to DROP_NEWEST.
+            block_timeout (float, optional): Seconds to wait for room with the BLOCK policy. Defaults to 0.1.
+        """
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+
+        self._routes: Dict[str, List[logging.Handler]] = {}
+        self._listener = _RoutingQueueListener(self.queue, self._routes)
+        self._lock = threading.Lock()
+        self._started = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.max_queue_depth = 0
+
+    def add_route(self, name: str, handlers: List[logging.Handler]) -> logging.Handler:
+        """Registers a set of handlers to be run on the listener thread.
+
+        Args:
+            name (str): Route name.
+            handlers (List[logging.Handler]): Handlers records sent to this route are passed to.
+                Handler levels are respected.
+
+        Returns:
+            logging.Handler: Queue handler to attach to a logger in place of `handlers`.
+        """
+        self._routes[name] = list(handlers)
+        return _PipelineQueueHandler(self, name)
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        self._listener.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Processes every queued record, then stops the listener thread and flushes all handlers."""
+        if not self._started:
+            return
+        self._started = False
+        atexit.unregister(self.stop)
+
+        self._listener.stop()
+        for handlers in self._routes.values():
+            for handler in handlers:
+                handler.flush()
+
+    def put(self, route: str, record: logging.LogRecord) -> None:
+        """Queues a record, applying the overflow policy if the queue is full.
+
+        Args:
+            route (str): Route to send the record to.
+            record (logging.LogRecord): Prepared record.
+        """
+        item = (route, record)
+        try:
+            if self.overflow_policy == OverflowPolicy.BLOCK:
+                self.queue.put(item, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(item)
+        except queue.Full:
+            if self.overflow_policy != OverflowPolicy.DROP_OLDEST:
+                self.dropped += 1
+                return
+
+            with self._lock:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                except queue.Empty:
+                    pass
+                self.dropped += 1
+                try:
+                    self.queue.put_nowait(item)
+                except queue.Full:
+                    self.dropped += 1
+                    return
+
+        self.enqueued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def get_stats(self) -> Dict[str, int]:
+        """Returns queue counters.
+
+        Returns:
+            Dict[str, int]: Enqueued and dropped record counts, current and maximum queue depth.
+        """
+        return {
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+class _PipelineQueueHandler(QueueHandler):
+    """Queue handler for one route of an `AsyncLogPipeline`."""
+
+    def __init__(self, pipeline: AsyncLogPipeline, route: str) -> None:
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+        self.route = route
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the message and args, as they may change after this call returns.
+        # Formatting is left to the real handlers on the listener thread.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.pipeline.put(self.route, record)
+
+
+class _RoutingQueueListener(QueueListener):
+    """Queue listener that passes each record to the handlers of its route only."""
+
+    def __init__(self, log_queue: queue.Queue, routes: Dict[str, List[logging.Handler]]) -> None:
+        super().__init__(log_queue, respect_handler_level=True)
+        self.routes = routes
+
+    def handle(self, record: Tuple[str, logging.LogRecord]) -> None:
+        route, record = record  # queue items are (route, record)
+        for handler in self.routes.get(route, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # the queue may be full - wait for the listener to make room instead of failing
+        self.queue.put(self._sentinel)
@@ -0,0 +1,38 @@
+import json
+import logging
+from datetime import datetime, timezone
+
+# Optional context fields, passed with `extra=`, e.g.
+# logging.info("Updated.", extra={"rp": rp.name})
+CONTEXT_FIELDS = ("rp", "guild", "channel", "command", "duration_ms")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects, for the structured (`.jsonl`) log file.
+
+    Every line has `ts` (Unix time), `time`, `level`, `logger` and `message`, plus any context
+    fields in `CONTEXT_FIELDS` that were set on the record, and `exc` for exceptions.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value if isinstance(value, (int, float)) else str(value)
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+
+        return json.dumps(entry, ensure_ascii=False)
@@ -1,20 +1,39 @@
 import logging
 import os
 import re
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
-import discord
 from concurrent_log_handler import ConcurrentRotatingFileHandler
 
+from cidderbot.utils.logging_utils.async_logging import (
+    AsyncLogPipeline,
+    OverflowPolicy,
+)
+from cidderbot.utils.logging_utils.json_logging import JsonLinesFormatter
 from cidderbot.utils.string_utils.colors import Colors, colorize_string
-
-LOG_LEVEL_COLORS = {
-    logging.CRITICAL: Colors.RED,
-    logging.ERROR: Colors.ORANGE,
-    logging.WARNING: Colors.YELLOW,
-    logging.INFO: Colors.RESET,
-    logging.DEBUG: Colors.GRAY,
+from cidderbot.utils.string_utils.validators import validate_ansi_color_code
+
+# names of the Colors used per level, looked up on use so importing this module doesn't check for a terminal
+_LOG_LEVEL_COLOR_NAMES = {
+    logging.CRITICAL: "RED",
+    logging.ERROR: "ORANGE",
+    logging.WARNING: "YELLOW",
+    logging.INFO: "RESET",
+    logging.DEBUG: "GRAY",
 }
+_DEFAULT_COLOR_NAME = "PURPLE"
+
+
+def get_log_level_colors() -> Dict[int, str]:
+    """Returns the color code used for each log level."""
+    return {level: getattr(Colors, name) for level, name in _LOG_LEVEL_COLOR_NAMES.items()}
+
+
+def __getattr__(name: str):
+    # LOG_LEVEL_COLORS is built on access
+    if name == "LOG_LEVEL_COLORS":
+        return get_log_level_colors()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class LogConfig:
@@ -24,6 +43,7 @@ class LogConfig:
     DEFAULT_LOG_FILE = "cidder.log"
     DEFAULT_DISCORD_SUFFIX = "_discord"
     DEFAULT_PLAINTEXT_SUFFIX = "_plaintext"
+    JSON_EXTENSION = ".jsonl"
 
     def __init__(self) -> None:
         self._logger: logging.Logger
@@ -31,7 +51,18 @@ class LogConfig:
         # this is needed because I need to get this handler later
         self.discord_handler = None
 
-    def setup(self, filename: Optional[str] = None, is_debug: bool = False) -> None:
+        # only used in async mode
+        self.async_pipeline: Optional[AsyncLogPipeline] = None
+
+    def setup(
+        self,
+        filename: Optional[str] = None,
+        is_debug: bool = False,
+        use_async: bool = False,
+        queue_size: int = AsyncLogPipeline.DEFAULT_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_NEWEST,
+        json_logs: bool = False,
+    ) -> None:
         """Sets up the discord logger, used internally by the discord Python module, and
         the root logger, which can be called by `logging.getLogger()`
 
@@ -40,11 +71,22 @@ class LogConfig:
         - cidder_plaintext.log: main logger (level), discord (WARNING) - but with no color/ANSI formatting
         - cidder_discord.log: discord (level)
 
+        With `json_logs`, a structured cidder.jsonl (main logger (level), one JSON object per line)
+        is written too, which can be searched with `log_query`.
+
         Note: in a running environment that is not attached to a terminal, all colored outputs are disabled.
 
+        In async mode, loggers only put records on a queue, and a background thread
+        runs every file and console handler (see `AsyncLogPipeline`).
+
         Args:
             filename (Optional[str], optional): _description_. Defaults to None.
             is_debug (bool, optional): _description_. Defaults to False.
+            use_async (bool, optional): Whether to write logs from a background thread. Defaults to False.
+            queue_size (int, optional): Maximum number of queued records in async mode. Defaults to 10000.
+            overflow_policy (OverflowPolicy, optional): What to do when the queue is full in async mode.
+                Defaults to dropping new records.
+            json_logs (bool, optional): Whether to also write structured JSON-lines logs. Defaults to False.
         """
 
         # set logging min level
@@ -61,7 +103,8 @@ class LogConfig:
         # Bummer for you I guess
 
         # ======== FORMATTERS ========
-        formatter_full = logging.Formatter(
+        # the plaintext and colored file formatters share one render per record
+        formatter_full = RenderedFormatter(
             fmt="[%(asctime)s %(levelname)s] %(message)s"
         )
         formatter_full_color = ColoredFormatter(
@@ -77,7 +120,6 @@ class LogConfig:
         ch.setFormatter(formatter_shorttime_color)
 
         # logger_discord.addHandler(ch) #duplicates messages, I think
-        logger.addHandler(ch)
 
         # ======== FILE HANDLERS ===================
         if not filename:
@@ -110,11 +152,43 @@ class LogConfig:
         )
         self.discord_handler = fh_discordfile
 
-        logger.addHandler(fh)
-        logger.addHandler(fh_plain)
-        logger_discord.addHandler(fh_discord)
-        logger_discord.addHandler(fh_plain_discord)
-        # logger_discord.addHandler(fh_discordfile)
+        # STRUCTURED LOG FILE
+        json_handlers = []
+        if json_logs:
+            json_handlers.append(
+                self._create_default_filehandler(
+                    self._get_json_filename(filename), level, JsonLinesFormatter()
+                )
+            )
+
+        if use_async:
+            # move every handler onto the background thread
+            self.async_pipeline = AsyncLogPipeline(
+                queue_size=queue_size, overflow_policy=overflow_policy
+            )
+            main_handlers = [ch, fh, fh_plain] + json_handlers
+            if logger_discord is logger:
+                main_handlers += [fh_discord, fh_plain_discord]
+            else:
+                logger_discord.addHandler(
+                    self.async_pipeline.add_route(
+                        "main_discord", [fh_discord, fh_plain_discord]
+                    )
+                )
+            logger.addHandler(self.async_pipeline.add_route("main", main_handlers))
+            self.discord_handler = self.async_pipeline.add_route(
+                "discord", [fh_discordfile]
+            )
+            self.async_pipeline.start()
+        else:
+            logger.addHandler(ch)
+            logger.addHandler(fh)
+            logger.addHandler(fh_plain)
+            for handler in json_handlers:
+                logger.addHandler(handler)
+            logger_discord.addHandler(fh_discord)
+            logger_discord.addHandler(fh_plain_discord)
+            # logger_discord.addHandler(fh_discordfile)
 
         # add a new line to all log files
         # FUCK YOU WHY IS MAP LAZY
@@ -129,6 +203,11 @@ class LogConfig:
         # self._set_discord_logger_configs(fh_discordfile)
 
     # ==== Public methods ====
+    def shutdown(self) -> None:
+        """Flushes any queued log records (async mode only). Also happens automatically on exit."""
+        if self.async_pipeline:
+            self.async_pipeline.stop()
+
     def get_discord_logging_handler(self) -> logging.Handler | None:
         if not self.discord_handler:
             logging.warning("Discord handler is not yet initialised.")
@@ -149,6 +228,9 @@ class LogConfig:
 
     def _set_discord_logger_configs(self, handler: logging.Handler) -> None:
         """Configures the Discord logger, I have to do this for... reasons??"""
+        # discord is slow to import and not needed for the rest of logging setup
+        import discord  # pylint: disable=import-outside-toplevel
+
         discord.utils.setup_logging(handler=handler, level=logging.WARNING)
 
     # ==== Handlers ====
@@ -203,6 +285,10 @@ class LogConfig:
         replaced = re.sub(r"(\.[A-Za-z0-9]{3,4}$)", suffix + r"\1", filename)
         return replaced
 
+    def _get_json_filename(self, filename: str) -> str:
+        """Gets the structured log filename for a log filename, e.g. cidder.log -> cidder.jsonl"""
+        return os.path.splitext(filename)[0] + self.JSON_EXTENSION
+
     # ==== File System ====
 
     def _setup_log_directory(self) -> None:
@@ -227,34 +313,97 @@ class LogConfig:
 
 
 def format_message_from_level(message: str, level: int) -> str:
-    return colorize_string(message, LOG_LEVEL_COLORS.get(level, Colors.PURPLE))
+    return colorize_string(
+        message, getattr(Colors, _LOG_LEVEL_COLOR_NAMES.get(level, _DEFAULT_COLOR_NAME))
+    )
 
 
-class ColoredFormatter(logging.Formatter):
-    DEFAULT_FORMAT = "[%(asctime)s %(levelname)s]: %(message)s"
+class RenderedFormatter(logging.Formatter):
+    """Formatter that renders each record only once per format.
+
+    The rendered line is stored on the record, so every other `RenderedFormatter` with the same
+    format and date format (e.g. the colored and plaintext file handlers) reuses it instead of
+    formatting the record again. The message itself is only built once per record.
+    """
+
+    _RENDER_ATTR = "_cidder_renders"
 
     def __init__(self, *args, **kwargs):
-        if "fmt" in kwargs:
-            self.used_format = kwargs["fmt"]
-        else:
-            self.used_format = self.DEFAULT_FORMAT
+        super().__init__(*args, **kwargs)
+        self._render_key = (self._fmt, self.datefmt)
+
+    def render(self, record: logging.LogRecord) -> Tuple[str, str]:
+        """Renders a record, or returns its existing render.
+
+        Args:
+            record (logging.LogRecord): Record to render.
+
+        Returns:
+            Tuple[str, str]: The formatted line, and the exception/stack text that follows it (may be empty).
+        """
+        renders = record.__dict__.get(self._RENDER_ATTR)
+        if renders is None:
+            renders = {}
+            setattr(record, self._RENDER_ATTR, renders)
+            # message body is built once per record
+            record.message = record.getMessage()
+
+        rendered = renders.get(self._render_key)
+        if rendered is not None:
+            return rendered
+
+        if self.usesTime():
+            record.asctime = self.formatTime(record, self.datefmt)
+        line = self.formatMessage(record)
+
+        tail = ""
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            tail += "\n" + record.exc_text
+        if record.stack_info:
+            tail += "\n" + self.formatStack(record.stack_info)
 
-        self.kwargs = kwargs
-        self.args = args
+        rendered = renders[self._render_key] = (line, tail)
+        return rendered
+
+    def format(self, record: logging.LogRecord) -> str:
+        line, tail = self.render(record)
+        return line + tail
+
+
+class ColoredFormatter(RenderedFormatter):
+    """Formatter that colors the whole line by level. Derived from the shared plain render,
+    so a record logged to both colored and plaintext files is only formatted once."""
+
+    DEFAULT_FORMAT = "[%(asctime)s %(levelname)s]: %(message)s"
+
+    def __init__(self, *args, **kwargs):
+        if not args and "fmt" not in kwargs:
+            kwargs["fmt"] = self.DEFAULT_FORMAT
 
         super().__init__(*args, **kwargs)
 
-    def format(self, record):
-        color_appended_format = format_message_from_level(
-            self.used_format, record.levelno
-        )
-        self.kwargs["fmt"] = color_appended_format
-        colored_formatter = logging.Formatter(*self.args, **self.kwargs)
+        # precompiled per-level (prefix, suffix), nothing is built per record
+        self._level_colors = {
+            level: self._get_color_codes(color)
+            for level, color in get_log_level_colors().items()
+        }
+        self._default_colors = self._get_color_codes(getattr(Colors, _DEFAULT_COLOR_NAME))
+
+    @staticmethod
+    def _get_color_codes(color_code: str) -> Tuple[str, str]:
+        # same rules as colorize_string
+        if validate_ansi_color_code(color_code):
+            return color_code, Colors.RESET
+        return "", ""
 
-        return colored_formatter.format(record)
+    def format(self, record: logging.LogRecord) -> str:
+        line, tail = self.render(record)
+        prefix, suffix = self._level_colors.get(record.levelno, self._default_colors)
+        return f"{prefix}{line}{suffix}{tail}"
 
 
-# For manual testing
 def main():
     # setup
     # note that filename is always this random testing file
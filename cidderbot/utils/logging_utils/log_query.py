@@ -0,0 +1,304 @@
+"""Query tool for the structured (`.jsonl`) log files.
+
+Keeps a sidecar index (`<log file>.idx`) of fixed-size blocks of records, with each block's byte range,
+time range, levels and RP names. Queries only read the blocks that can contain matches,
+so e.g. all WARNINGs for one RP in the last hour doesn't scan the whole file.
+
+Usage:
+    python -m cidderbot.utils.logging_utils.log_query index [files...]
+    python -m cidderbot.utils.logging_utils.log_query query --level WARNING --rp Sagrea --since 1h [files...]
+"""
+
+import argparse
+import bisect
+import json
+import logging
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+DEFAULT_LOG_FILE = os.path.join("logs", "cidder.jsonl")
+DEFAULT_BLOCK_RECORDS = 256
+
+LEVEL_BITS = {
+    "DEBUG": 1,
+    "INFO": 2,
+    "WARNING": 4,
+    "ERROR": 8,
+    "CRITICAL": 16,
+}
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def level_mask_at_least(level: str) -> int:
+    """Returns the bitmask of every level at or above `level`."""
+    minimum = logging.getLevelName(level.upper())
+    return sum(
+        bit for name, bit in LEVEL_BITS.items() if logging.getLevelName(name) >= minimum
+    )
+
+
+def parse_since(string: str, now: Optional[float] = None) -> float:
+    """Parses a relative duration like `90s`, `15m`, `1h` or `2d` into a Unix time that long ago."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw])", string.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid duration: {string}")
+    now = time.time() if now is None else now
+    return now - float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+class LogIndex:
+    """Sidecar index of a JSON-lines log file.
+
+    Each block is `[start offset, end offset, min ts, max ts, level mask, rp names]`.
+    Max ts is cumulative (never lower than an earlier block's), so blocks can be binary searched by time.
+    """
+
+    def __init__(self, log_path: str, block_records: int = DEFAULT_BLOCK_RECORDS) -> None:
+        self.log_path = log_path
+        self.index_path = log_path + INDEX_SUFFIX
+        self.block_records = block_records
+
+        self.inode = 0
+        self.indexed_bytes = 0
+        self.blocks: List[list] = []
+
+    # ================================ Building ================================
+
+    def load(self) -> None:
+        """Loads the index from disk, if it exists and is readable."""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != INDEX_VERSION:
+            return
+        self.inode = data["inode"]
+        self.indexed_bytes = data["indexed_bytes"]
+        self.block_records = data["block_records"]
+        self.blocks = data["blocks"]
+
+    def save(self) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "inode": self.inode,
+            "indexed_bytes": self.indexed_bytes,
+            "block_records": self.block_records,
+            "blocks": self.blocks,
+        }
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    def update(self) -> int:
+        """Indexes anything appended to the log file since the last update.
+        Rebuilds from scratch if the file was rotated or truncated.
+
+        Returns:
+            int: Number of new blocks.
+        """
+        stat = os.stat(self.log_path)
+        if stat.st_ino != self.inode or stat.st_size < self.indexed_bytes:
+            self.inode = stat.st_ino
+            self.indexed_bytes = 0
+            self.blocks = []
+
+        new_blocks = 0
+        with open(self.log_path, "rb") as f:
+            f.seek(self.indexed_bytes)
+            offset = self.indexed_bytes
+            block = None
+            count = 0
+
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # still being written
+                    break
+                start, offset = offset, offset + len(line)
+
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+
+                if block is None:
+                    block = self._new_block(start)
+                self._add_to_block(block, entry, offset)
+                count += 1
+
+                if count == self.block_records:
+                    self.blocks.append(block)
+                    new_blocks += 1
+                    self.indexed_bytes = offset
+                    block, count = None, 0
+
+            # the last block may be short, the next update just starts a new one
+            if block is not None:
+                self.blocks.append(block)
+                new_blocks += 1
+            self.indexed_bytes = offset
+
+        return new_blocks
+
+    def _new_block(self, start: int) -> list:
+        previous_max = self.blocks[-1][3] if self.blocks else 0.0
+        return [start, start, float("inf"), previous_max, 0, []]
+
+    @staticmethod
+    def _add_to_block(block: list, entry: Dict, end: int) -> None:
+        ts = entry.get("ts", 0.0)
+        block[1] = end
+        block[2] = min(block[2], ts)
+        block[3] = max(block[3], ts)
+        block[4] |= LEVEL_BITS.get(entry.get("level"), 0)
+        rp = entry.get("rp")
+        if rp is not None and rp not in block[5]:
+            block[5].append(rp)
+
+    # ================================ Querying ================================
+
+    def candidate_blocks(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        level_mask: Optional[int] = None,
+        rp: Optional[str] = None,
+    ) -> Iterator[list]:
+        """Yields blocks that may contain matching records."""
+        start = 0
+        if since is not None:
+            start = bisect.bisect_left([block[3] for block in self.blocks], since)
+
+        for block in self.blocks[start:]:
+            if until is not None and block[2] > until:
+                # min ts isn't cumulative, so keep going
+                continue
+            if level_mask is not None and not block[4] & level_mask:
+                continue
+            if rp is not None and rp not in block[5]:
+                continue
+            yield block
+
+    def query(
+        self,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        level: Optional[str] = None,
+        rp: Optional[str] = None,
+        guild: Optional[str] = None,
+        command: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """Yields log entries matching every given filter.
+
+        Args:
+            since (Optional[float], optional): Earliest Unix time. Defaults to None.
+            until (Optional[float], optional): Latest Unix time. Defaults to None.
+            level (Optional[str], optional): Minimum level name. Defaults to None.
+            rp (Optional[str], optional): RP name. Defaults to None.
+            guild (Optional[str], optional): Guild. Defaults to None.
+            command (Optional[str], optional): Command name. Defaults to None.
+
+        Yields:
+            Dict: Matching entries, in file order.
+        """
+        level_mask = level_mask_at_least(level) if level else None
+
+        with open(self.log_path, "rb") as f:
+            for block in self.candidate_blocks(since, until, level_mask, rp):
+                f.seek(block[0])
+                data = f.read(block[1] - block[0])
+
+                for line in data.splitlines():
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+
+                    ts = entry.get("ts", 0.0)
+                    if since is not None and ts < since:
+                        continue
+                    if until is not None and ts > until:
+                        continue
+                    if level_mask is not None and not LEVEL_BITS.get(entry.get("level"), 0) & level_mask:
+                        continue
+                    if rp is not None and entry.get("rp") != rp:
+                        continue
+                    # ids are logged as numbers, but given as strings
+                    if guild is not None and str(entry.get("guild")) != guild:
+                        continue
+                    if command is not None and entry.get("command") != command:
+                        continue
+                    yield entry
+
+
+def open_index(log_path: str) -> LogIndex:
+    """Loads a log file's index and brings it up to date."""
+    index = LogIndex(log_path)
+    index.load()
+    if index.update():
+        index.save()
+    return index
+
+
+def format_entry(entry: Dict) -> str:
+    context = " ".join(
+        f"{field}={entry[field]}"
+        for field in ("rp", "guild", "channel", "command", "duration_ms")
+        if field in entry
+    )
+    line = f"[{entry.get('time')} {entry.get('level')}] {entry.get('message')}"
+    return f"{line} ({context})" if context else line
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Query Cidder's structured logs.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    index_parser = subparsers.add_parser("index", help="build or update the sidecar index")
+    index_parser.add_argument("files", nargs="*", default=[DEFAULT_LOG_FILE])
+
+    query_parser = subparsers.add_parser("query", help="print matching log entries")
+    query_parser.add_argument("files", nargs="*", default=[DEFAULT_LOG_FILE])
+    query_parser.add_argument("--level", help="minimum level, e.g. WARNING")
+    query_parser.add_argument("--rp", help="RP name")
+    query_parser.add_argument("--guild", help="guild")
+    query_parser.add_argument("--command", help="command name")
+    query_parser.add_argument("--since", type=parse_since, help="e.g. 30m, 1h, 2d")
+    query_parser.add_argument("--until", type=parse_since, help="e.g. 10m")
+    query_parser.add_argument("--raw", action="store_true", help="print JSON lines")
+
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        if not os.path.exists(path):
+            print(f"{path} does not exist.", file=sys.stderr)
+            return 1
+
+        index = open_index(path)
+        if args.action == "index":
+            print(f"{path}: {len(index.blocks)} blocks, {index.indexed_bytes} bytes indexed.")
+            continue
+
+        for entry in index.query(
+            since=args.since,
+            until=args.until,
+            level=args.level,
+            rp=args.rp,
+            guild=args.guild,
+            command=args.command,
+        ):
+            print(json.dumps(entry, ensure_ascii=False) if args.raw else format_entry(entry))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
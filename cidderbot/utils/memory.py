@@ -0,0 +1,54 @@
+import sys
+from typing import Any, Iterable, Optional, Set
+
+# discord.py objects all point back at the connection state, which holds every cache at once
+DEFAULT_SKIP_ATTRS = ("_state",)
+
+
+def deep_sizeof(obj: Any, skip_attrs: Iterable[str] = DEFAULT_SKIP_ATTRS, _seen: Optional[Set[int]] = None) -> int:
+    """Estimates the memory used by an object and everything it references, counting shared objects once.
+
+    Follows containers, `__dict__` and `__slots__`. Classes, modules and functions are not counted.
+
+    Args:
+        obj (Any): Object to measure.
+        skip_attrs (Iterable[str], optional): Attributes not to follow. Defaults to `("_state",)`.
+
+    Returns:
+        int: Size in bytes.
+    """
+    seen = set() if _seen is None else _seen
+    skip_attrs = tuple(skip_attrs)
+
+    size = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, (type, type(sys))) or callable(current):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+
+        attrs = getattr(current, "__dict__", None)
+        if isinstance(attrs, dict):
+            stack.extend(value for name, value in attrs.items() if name not in skip_attrs)
+        for cls in type(current).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if name not in skip_attrs and name not in ("__dict__", "__weakref__") and hasattr(current, name):
+                    stack.append(getattr(current, name))
+
+    return size
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GiB"
@@ -0,0 +1,99 @@
+"""Per-phase timings for bot startup (imports, logging setup, token load, gateway connect,
+`on_ready`, cog load), reported once the bot is fully up."""
+
+import logging
+import time
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+from cidderbot import IMPORT_STARTED_AT
+
+if TYPE_CHECKING:
+    from cidderbot.metrics.registry import MetricsRegistry
+
+
+class StartupTimeline:
+    """Records consecutive startup phases. Each `mark()` ends a phase that started when the
+    previous one ended (or when the timeline started), so the phases add up to the total."""
+
+    def __init__(
+        self,
+        started_at: Optional[float] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        """Creates a timeline.
+
+        Args:
+            started_at (Optional[float], optional): Clock value startup began at. Defaults to now.
+            clock (Callable[[], float], optional): Monotonic clock in seconds. Defaults to `time.perf_counter`.
+        """
+        self._clock = clock
+        self.started_at = clock() if started_at is None else started_at
+        self._last_mark = self.started_at
+
+        # (phase name, start, end)
+        self._phases: List[Tuple[str, float, float]] = []
+        self.finished = False
+
+    def mark(self, name: str) -> float:
+        """Ends the current phase. Does nothing once the timeline is finished.
+
+        Args:
+            name (str): Name of the phase that just finished.
+
+        Returns:
+            float: Seconds the phase took.
+        """
+        if self.finished:
+            return 0.0
+
+        now = self._clock()
+        start, self._last_mark = self._last_mark, now
+        self._phases.append((name, start, now))
+        return now - start
+
+    @property
+    def phases(self) -> List[Tuple[str, float]]:
+        """(phase name, seconds) for every recorded phase, in order."""
+        return [(name, end - start) for name, start, end in self._phases]
+
+    @property
+    def total(self) -> float:
+        if not self._phases:
+            return 0.0
+        return self._phases[-1][2] - self.started_at
+
+    def finish(self) -> bool:
+        """Stops recording. Later marks (e.g. from `on_ready` after a reconnect) are ignored.
+
+        Returns:
+            bool: Whether this call finished the timeline, i.e. False if it was already finished.
+        """
+        if self.finished:
+            return False
+        self.finished = True
+        return True
+
+    def format_report(self) -> str:
+        total = self.total
+        lines = [f"Startup took {total:.3f}s:"]
+        for name, seconds in self.phases:
+            share = seconds / total * 100 if total else 0.0
+            lines.append(f"  {name:<18} {seconds:>8.3f}s {share:>5.1f}%")
+        return "\n".join(lines)
+
+    def log_report(self, logger: Optional[logging.Logger] = None) -> None:
+        (logger or logging.getLogger()).info(self.format_report())
+
+    def record_metrics(self, metrics: "MetricsRegistry") -> None:
+        """Exports the phases as the `cidder_startup_phase_seconds{phase}` gauge."""
+        gauge = metrics.gauge(
+            "cidder_startup_phase_seconds",
+            "Time taken by each phase of the last startup.",
+            ("phase",),
+        )
+        for name, seconds in self.phases:
+            gauge.labels(name).set(seconds)
+
+
+# the bot's own startup, timed from the first `cidderbot` import
+STARTUP_TIMELINE = StartupTimeline(started_at=IMPORT_STARTED_AT)
@@ -1,54 +1,90 @@
 import logging
+import platform
+import sys
+from typing import Optional
 
 from cidderbot.utils.string_utils.validators import validate_ansi_color_code
 
 
-class Colors:
+class _LazyColors(type):
+    """Resolves the color codes on first access, instead of when the class is defined (i.e. on import).
+
+    By then logging is set up and stdout is what the bot actually writes to. Afterwards the codes are
+    plain class attributes.
+    """
+
+    def __getattr__(cls, name: str) -> str:
+        codes = cls.__dict__["_CODES"]
+        if name not in codes:
+            raise AttributeError(name)
+
+        cls.resolve()  # pylint: disable=no-value-for-parameter
+        return type.__getattribute__(cls, name)
+
+    def resolve(cls, enabled: Optional[bool] = None) -> None:
+        """Sets the color codes, or clears them all if colors are disabled.
+
+        Args:
+            enabled (Optional[bool], optional): Whether to use colors. Defaults to None,
+                which enables them only if stdout is a terminal.
+        """
+        if enabled is None:
+            enabled = _enable_terminal_colors()
+
+        for name, code in cls.__dict__["_CODES"].items():
+            setattr(cls, name, code if enabled else "")
+
+
+def _enable_terminal_colors() -> bool:
+    # cancel SGR codes if we don't write to a terminal
+    if not sys.stdout.isatty():
+        return False
+
+    # set Windows console in VT mode
+    if platform.system() == "Windows":
+        kernel32 = __import__("ctypes").windll.kernel32
+        kernel32.SetConsoleMode(kernel32.GetStdHandle(-11), 7)
+    return True
+
+
+class Colors(metaclass=_LazyColors):
     """
     ANSI color codes.
     Credit to https://gist.github.com/rene-d/9e584a7dd2935d0f461904b9f2950007
 
     For 256 colors https://gist.github.com/JBlond/2fea43a3049b38287e5e9cefc87b2124
-    """
 
-    BLACK = "\033[0;30m"
-    RED = "\033[0;31m"
-    GREEN = "\033[0;32m"
-    BROWN = "\033[0;33m"
-    BLUE = "\033[0;34m"
-    PURPLE = "\033[0;35m"
-    CYAN = "\033[0;36m"
-    LIGHT_GRAY = "\033[0;37m"
-    DARK_GRAY = "\033[1;30m"
-    LIGHT_RED = "\033[1;31m"
-    LIGHT_GREEN = "\033[1;32m"
-    YELLOW = "\033[1;33m"
-    LIGHT_BLUE = "\033[1;34m"
-    LIGHT_PURPLE = "\033[1;35m"
-    LIGHT_CYAN = "\033[1;36m"
-    LIGHT_WHITE = "\033[1;37m"
-    ORANGE = "\033[38;5;202m"
-    GRAY = "\033[38;5;234m"
-    BOLD = "\033[1m"
-    FAINT = "\033[2m"
-    ITALIC = "\033[3m"
-    UNDERLINE = "\033[4m"
-    BLINK = "\033[5m"
-    NEGATIVE = "\033[7m"
-    CROSSED = "\033[9m"
-    RESET = "\033[0m"
+    Codes are empty strings if stdout is not a terminal (checked on first use).
+    """
 
-    # cancel SGR codes if we don't write to a terminal
-    if not __import__("sys").stdout.isatty():
-        for _ in dir():
-            if isinstance(_, str) and _[0] != "_":
-                locals()[_] = ""
-    else:
-        # set Windows console in VT mode
-        if __import__("platform").system() == "Windows":
-            kernel32 = __import__("ctypes").windll.kernel32
-            kernel32.SetConsoleMode(kernel32.GetStdHandle(-11), 7)
-            del kernel32
+    _CODES = {
+        "BLACK": "\033[0;30m",
+        "RED": "\033[0;31m",
+        "GREEN": "\033[0;32m",
+        "BROWN": "\033[0;33m",
+        "BLUE": "\033[0;34m",
+        "PURPLE": "\033[0;35m",
+        "CYAN": "\033[0;36m",
+        "LIGHT_GRAY": "\033[0;37m",
+        "DARK_GRAY": "\033[1;30m",
+        "LIGHT_RED": "\033[1;31m",
+        "LIGHT_GREEN": "\033[1;32m",
+        "YELLOW": "\033[1;33m",
+        "LIGHT_BLUE": "\033[1;34m",
+        "LIGHT_PURPLE": "\033[1;35m",
+        "LIGHT_CYAN": "\033[1;36m",
+        "LIGHT_WHITE": "\033[1;37m",
+        "ORANGE": "\033[38;5;202m",
+        "GRAY": "\033[38;5;234m",
+        "BOLD": "\033[1m",
+        "FAINT": "\033[2m",
+        "ITALIC": "\033[3m",
+        "UNDERLINE": "\033[4m",
+        "BLINK": "\033[5m",
+        "NEGATIVE": "\033[7m",
+        "CROSSED": "\033[9m",
+        "RESET": "\033[0m",
+    }
 
 
 def colorize_string(string: str, color_code: str) -> str:
@@ -66,7 +102,7 @@ def colorize_string(string: str, color_code: str) -> str:
     if validate_ansi_color_code(color_code):
         return f"{color_code}{string}{Colors.RESET}"
 
-    if not __import__("sys").stdout.isatty():
+    if not sys.stdout.isatty():
         # Not a terminal!
         return string
 
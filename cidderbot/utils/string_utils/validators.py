@@ -13,3 +13,17 @@ def validate_ansi_color_code(string: str) -> bool:
 
     is_valid = re.search(r"\x1b\[[0-9;]+m", string) is not None
     return is_valid
+
+
+def validate_command_prefix(string: str, max_length: int = 10) -> bool:
+    """Checks whether the supplied string can be used as a command prefix:
+    not empty, at most `max_length` characters and without whitespace.
+
+    Args:
+        string (str): String to be validated.
+        max_length (int, optional): Maximum prefix length. Defaults to 10.
+
+    Returns:
+        bool: Whether string is a valid command prefix.
+    """
+    return 0 < len(string) <= max_length and not any(char.isspace() for char in string)
@@ -1,5 +1,8 @@
+import calendar
+import math
 from datetime import datetime, timedelta, timezone
 from enum import Enum
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 
 class TimeUnit(Enum):
@@ -71,125 +74,434 @@ def get_time_unit_mapping(time_unit_a: TimeUnit, time_unit_b: TimeUnit) -> int:
     return TIMEUNIT_MAPPING[time_unit_a][time_unit_b]
 
 
+def add_time_units(dt: datetime, unit: TimeUnit, value: int) -> datetime:
+    """Adds `value` of a time unit to a datetime. Months and years are added as calendar months/years,
+    with the day clamped to the length of the resulting month (e.g. 31 January + 1 month = 28 February).
+
+    Args:
+        dt (datetime): Datetime to add to.
+        unit (TimeUnit): Unit of time.
+        value (int): Amount of unit to add. May be negative.
+
+    Returns:
+        datetime: Added datetime.
+    """
+    if unit in (TimeUnit.MONTH, TimeUnit.YEAR):
+        months = value * 12 if unit == TimeUnit.YEAR else value
+        year, month_index = divmod(dt.year * 12 + dt.month - 1 + months, 12)
+        day = min(dt.day, calendar.monthrange(year, month_index + 1)[1])
+        return dt.replace(year=year, month=month_index + 1, day=day)
+
+    return dt + timedelta(seconds=unit.value * value)
+
+
+def count_time_units_until(start: datetime, end: datetime, unit: TimeUnit) -> int:
+    """Returns the smallest number n of a time unit such that `add_time_units(start, unit, n) >= end`.
+
+    Args:
+        start (datetime): Datetime to count from.
+        end (datetime): Datetime to reach. Must not be before `start`.
+        unit (TimeUnit): Unit of time.
+
+    Returns:
+        int: Number of units.
+    """
+    if end <= start:
+        return 0
+
+    if unit not in (TimeUnit.MONTH, TimeUnit.YEAR):
+        return math.ceil((end - start) / timedelta(seconds=unit.value))
+
+    # estimate from the calendar difference, then correct by at most a unit either way
+    months = (end.year - start.year) * 12 + end.month - start.month
+    count = months // 12 if unit == TimeUnit.YEAR else months
+    if add_time_units(start, unit, count) < end:
+        count += 1
+    elif count > 0 and add_time_units(start, unit, count - 1) >= end:
+        count -= 1
+    return count
+
+
+def utc_now() -> datetime:
+    """Returns the current time as an aware UTC datetime."""
+    return datetime.now(timezone.utc)
+
+
 def convert_datetime_to_utc_timestamp(dt: datetime) -> float:
     # return dt.replace(tzinfo=timezone.utc).timestamp() # idk this is bugged
     return dt.timestamp()
 
 
-def convert_time_unit_string(dt: datetime, unit: TimeUnit) -> str:
-    """Converts a `datetime.datetime` into a formatted string, based on a given unit.
+# ================================ Locales ================================
+
+
+class LocaleNames:
+    """Names used when formatting dates and durations in one language.
+
+    Taken from these tables rather than from the process locale (which `strftime("%B")` uses),
+    so every RP can be shown in its own language.
+    """
+
+    __slots__ = ("code", "months", "week", "duration_units", "and_word", "now")
+
+    def __init__(
+        self,
+        code: str,
+        months: Sequence[str],
+        week: str,
+        duration_units: Sequence[Tuple[str, str]],
+        and_word: str,
+        now: str,
+    ) -> None:
+        """Creates a set of names.
+
+        Args:
+            code (str): Locale code, e.g. "en".
+            months (Sequence[str]): The 12 month names, January first.
+            week (str): Word used before week numbers, e.g. "Week 09, 1970".
+            duration_units (Sequence[Tuple[str, str]]): Singular and plural of week, day, hour, minute, second.
+            and_word (str): Joins the last two parts of a duration.
+            now (str): Duration of zero.
+        """
+        self.code = code
+        self.months = tuple(months)
+        self.week = week
+        self.duration_units = tuple(duration_units)
+        self.and_word = and_word
+        self.now = now
+
+
+DEFAULT_LOCALE = "en"
+
+LOCALES: Dict[str, LocaleNames] = {
+    locale.code: locale
+    for locale in (
+        LocaleNames(
+            "en",
+            (  # the same as the C locale's
+                "January", "February", "March", "April", "May", "June",
+                "July", "August", "September", "October", "November", "December",
+            ),
+            "Week",
+            (("week", "weeks"), ("day", "days"), ("hour", "hours"), ("minute", "minutes"), ("second", "seconds")),
+            "and",
+            "now",
+        ),
+        LocaleNames(
+            "fr",
+            (
+                "janvier", "février", "mars", "avril", "mai", "juin",
+                "juillet", "août", "septembre", "octobre", "novembre", "décembre",
+            ),
+            "Semaine",
+            (
+                ("semaine", "semaines"), ("jour", "jours"), ("heure", "heures"),
+                ("minute", "minutes"), ("seconde", "secondes"),
+            ),
+            "et",
+            "maintenant",
+        ),
+        LocaleNames(
+            "de",
+            (
+                "Januar", "Februar", "März", "April", "Mai", "Juni",
+                "Juli", "August", "September", "Oktober", "November", "Dezember",
+            ),
+            "Woche",
+            (
+                ("Woche", "Wochen"), ("Tag", "Tage"), ("Stunde", "Stunden"),
+                ("Minute", "Minuten"), ("Sekunde", "Sekunden"),
+            ),
+            "und",
+            "jetzt",
+        ),
+        LocaleNames(
+            "es",
+            (
+                "enero", "febrero", "marzo", "abril", "mayo", "junio",
+                "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+            ),
+            "Semana",
+            (("semana", "semanas"), ("día", "días"), ("hora", "horas"), ("minuto", "minutos"), ("segundo", "segundos")),
+            "y",
+            "ahora",
+        ),
+    )
+}
+
+
+def get_locale_names(locale: str) -> LocaleNames:
+    """Returns the names for a locale.
 
     Args:
-        dt (datetime.datetime): Datetime to be converted.
-        unit (TimeUnit): Unit of measurement for the date.
+        locale (str): Locale code, e.g. "en".
+
+    Raises:
+        ValueError: If the locale isn't supported.
 
     Returns:
-        str: Formatted time as a string.
+        LocaleNames: Names.
     """
+    names = LOCALES.get(locale)
+    if names is None:
+        raise ValueError(f"Unsupported locale {locale!r}, expected one of: {', '.join(LOCALES)}")
+    return names
 
-    # https://docs.python.org/3/library/datetime.html#strftime-strptime-behavior
 
+# ================================ Date formatting ================================
+
+
+def _week_of_year(dt: datetime) -> int:
+    # strftime's %W: weeks start on Monday, days before the first Monday are in week 0
+    return (dt.timetuple().tm_yday + 6 - dt.weekday()) // 7
+
+
+def _compile_format_plan(unit: TimeUnit, names: LocaleNames) -> Callable[[datetime], str]:
+    """Builds the function that formats datetimes for a unit and locale. The "en" output
+    is the same as the strftime formats (on Linux) used before: e.g. "%d %B %Y" for days."""
+    months = names.months
+    week = names.week
+
+    # %-formatting with the names bound in, rather than strftime's format string parsing
+    # (also a bit faster than the same f-strings)
+    # pylint: disable=consider-using-f-string
     if unit == TimeUnit.YEAR:
-        return dt.strftime("%Y")  # 1970
+        return lambda dt: "%d" % dt.year  # 1970
     if unit == TimeUnit.MONTH:
-        return dt.strftime("%B %Y")  # January 1970
+        return lambda dt: "%s %d" % (months[dt.month - 1], dt.year)  # January 1970
     if unit == TimeUnit.WEEK:
-        return dt.strftime("Week %W, %Y")  # Week 00, 1970
+        return lambda dt: "%s %02d, %d" % (week, _week_of_year(dt), dt.year)  # Week 00, 1970
     if unit == TimeUnit.DAY:
-        return dt.strftime("%d %B %Y")  # 1 January 1970
+        return lambda dt: "%02d %s %d" % (dt.day, months[dt.month - 1], dt.year)  # 01 January 1970
     if unit == TimeUnit.HOUR:
-        return dt.strftime("%d %B %Y, %H:00")  # 1 January 1970, 12:00
+        return lambda dt: "%02d %s %d, %02d:00" % (
+            dt.day, months[dt.month - 1], dt.year, dt.hour
+        )  # 01 January 1970, 12:00
     if unit == TimeUnit.MINUTE:
-        return dt.strftime("%d %B %Y, %H:%M")  # 1 January 1970, 12:42
-    return dt.strftime("%d %B %Y, %H:%M:%S")  # 1 January 1970, 12:42:00
+        return lambda dt: "%02d %s %d, %02d:%02d" % (
+            dt.day, months[dt.month - 1], dt.year, dt.hour, dt.minute
+        )  # 01 January 1970, 12:42
+    return lambda dt: "%02d %s %d, %02d:%02d:%02d" % (
+        dt.day, months[dt.month - 1], dt.year, dt.hour, dt.minute, dt.second
+    )  # 01 January 1970, 12:42:00
 
 
-def format_timedelta(td: timedelta, length_limit: int = 3) -> str:
-    """Formats a `datetime.timedelta` duration into a readable string.
+class TimeFormatterRegistry:
+    """Format plans per `(TimeUnit, locale)`, and duration plans per locale, each compiled once on first use."""
 
-    Largest time unit output is weeks.
+    def __init__(self) -> None:
+        self._plans: Dict[Tuple[TimeUnit, str], Callable[[datetime], str]] = {}
+        self._duration_plans: Dict[str, Callable[[timedelta, int], str]] = {}
 
-    Args:
-        td (timedelta): Duration to be formatted.
-        length_limit (int, optional): Limit for number of components in the time string.
-            Must be a positive integer. Defaults to 3.
+    def __len__(self) -> int:
+        return len(self._plans)
 
-    Returns:
-        str: Formatted string
-    """
+    def get_plan(self, unit: TimeUnit, locale: str = DEFAULT_LOCALE) -> Callable[[datetime], str]:
+        """Returns the function that formats datetimes for a unit and locale.
+
+        Args:
+            unit (TimeUnit): Unit of measurement for the date.
+            locale (str, optional): Locale code. Defaults to "en".
+
+        Raises:
+            ValueError: If the locale isn't supported.
+
+        Returns:
+            Callable[[datetime], str]: Formatting function.
+        """
+        key = (unit, locale)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = _compile_format_plan(unit, get_locale_names(locale))
+        return plan
+
+    def format_many(
+        self, dts: Iterable[datetime], unit: TimeUnit, locale: str = DEFAULT_LOCALE
+    ) -> List[str]:
+        """Formats many datetimes with the same unit and locale, looking the plan up only once.
+
+        Args:
+            dts (Iterable[datetime]): Datetimes to be converted.
+            unit (TimeUnit): Unit of measurement for the dates.
+            locale (str, optional): Locale code. Defaults to "en".
+
+        Returns:
+            List[str]: Formatted times, in the same order.
+        """
+        return list(map(self.get_plan(unit, locale), dts))
+
+    def get_duration_plan(self, locale: str = DEFAULT_LOCALE) -> Callable[[timedelta, int], str]:
+        """Returns the function that formats durations for a locale, taking the duration and a length limit.
 
-    # Originally prompted from Deepseek R1, significantly modified.
-    part_length_limit = length_limit
+        Args:
+            locale (str, optional): Locale code. Defaults to "en".
 
-    # Extract days, hours, minutes, seconds from the timedelta
-    total_seconds = int(td.total_seconds())
-    days, remainder = divmod(total_seconds, 86400)
-    hours, remainder = divmod(remainder, 3600)
-    minutes, seconds = divmod(remainder, 60)
+        Raises:
+            ValueError: If the locale isn't supported.
+
+        Returns:
+            Callable[[timedelta, int], str]: Formatting function.
+        """
+        plan = self._duration_plans.get(locale)
+        if plan is None:
+            plan = self._duration_plans[locale] = _compile_duration_plan(get_locale_names(locale))
+        return plan
+
+
+FORMATTERS = TimeFormatterRegistry()
+
+
+def convert_time_unit_string(dt: datetime, unit: TimeUnit, locale: str = DEFAULT_LOCALE) -> str:
+    """Converts a `datetime.datetime` into a formatted string, based on a given unit.
+
+    Args:
+        dt (datetime.datetime): Datetime to be converted.
+        unit (TimeUnit): Unit of measurement for the date.
+        locale (str, optional): Locale code for month names etc. Defaults to "en".
 
-    weeks, days = divmod(days, 7)
+    Returns:
+        str: Formatted time as a string.
+    """
+    return FORMATTERS.get_plan(unit, locale)(dt)
 
-    # Create a list of formatted strings for each unit
-    parts = []
 
-    # oh gosh the repetition in this segment hurts me.
-    # But if I parameterized it into a loop, it'll be painful to read...
-    while True:
+def convert_time_unit_strings(
+    dts: Iterable[datetime], unit: TimeUnit, locale: str = DEFAULT_LOCALE
+) -> List[str]:
+    """Batch version of `convert_time_unit_string()`, for many datetimes with the same unit and locale.
 
-        if weeks > 0:
-            if days >= 4 and part_length_limit == 1:
-                weeks += 1
+    Args:
+        dts (Iterable[datetime]): Datetimes to be converted.
+        unit (TimeUnit): Unit of measurement for the dates.
+        locale (str, optional): Locale code. Defaults to "en".
 
-            parts.append(f"{weeks} {'week' if weeks == 1 else 'weeks'}")
-            part_length_limit -= 1
+    Returns:
+        List[str]: Formatted times, in the same order.
+    """
+    return FORMATTERS.format_many(dts, unit, locale)
 
-        if part_length_limit == 0:
-            break
 
-        if days > 0:
-            if hours >= 12 and part_length_limit == 1:
-                days += 1
+# formats accepted by parse_time_string, most specific first
+PARSE_FORMATS = (
+    "%d %B %Y, %H:%M:%S",
+    "%d %B %Y, %H:%M",
+    "%d %B %Y",
+    "%d %b %Y",
+    "%B %Y",
+    "%b %Y",
+    "%Y",
+)
 
-            parts.append(f"{days} {'day' if days == 1 else 'days'}")
-            part_length_limit -= 1
 
-        if part_length_limit == 0:
-            break
+def parse_time_string(string: str) -> Optional[datetime]:
+    """Parses a user supplied date/time, either in ISO format or in any of the formats
+    produced by `convert_time_unit_string` (e.g. "1 January 1970", "January 1970", "1970").
 
-        if hours > 0:
-            if minutes >= 30 and part_length_limit == 1:
-                hours += 1
+    Args:
+        string (str): Date/time string.
 
-            parts.append(f"{hours} {'hour' if hours == 1 else 'hours'}")
-            part_length_limit -= 1
+    Returns:
+        Optional[datetime]: Parsed UTC datetime, or None if the string could not be parsed.
+    """
+    string = string.strip()
+
+    for fmt in PARSE_FORMATS:
+        try:
+            return datetime.strptime(string, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+
+    try:
+        dt = datetime.fromisoformat(string)
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+# seconds in a week, day, hour, minute and second, the units durations are made of
+_DURATION_UNIT_SECONDS = (604800, 86400, 3600, 60, 1)
+# a part that's the last one shown is rounded up if what's left after it is at least this
+# (e.g. 1 week and 4 days -> "2 weeks"). Seconds are never rounded.
+_DURATION_ROUND_UP_AT = (4 * 86400, 12 * 3600, 30 * 60, 30, 0)
+
+
+def _compile_duration_plan(names: LocaleNames) -> Callable[[timedelta, int], str]:
+    """Builds the function that formats durations in a locale, with the unit formats baked in."""
+    steps = tuple(
+        (unit_seconds, round_up_at, f"%d {singular}", f"%d {plural}")
+        for unit_seconds, round_up_at, (singular, plural) in zip(
+            _DURATION_UNIT_SECONDS, _DURATION_ROUND_UP_AT, names.duration_units
+        )
+    )
+    and_word = f" {names.and_word} "
+    now = names.now
+
+    def plan(td: timedelta, length_limit: int) -> str:
+        remainder = int(td.total_seconds())
+        parts = []
+        remaining = length_limit
+        for unit_seconds, round_up_at, singular, plural in steps:
+            value, remainder = divmod(remainder, unit_seconds)
+            if value > 0:
+                if remaining == 1 and round_up_at and remainder >= round_up_at:
+                    value += 1
+                parts.append((singular if value == 1 else plural) % value)
+                remaining -= 1
+
+            if remaining == 0:
+                break
+
+        # Join the parts with commas and 'and' for the last part
+        if not parts:
+            return now
+        if len(parts) == 1:
+            return parts[0]
+        return ", ".join(parts[:-1]) + and_word + parts[-1]
+
+    return plan
+
+
+def format_timedelta(td: timedelta, length_limit: int = 3, locale: str = DEFAULT_LOCALE) -> str:
+    """Formats a `datetime.timedelta` duration into a readable string.
 
-        if part_length_limit == 0:
-            break
+    Largest time unit output is weeks.
 
-        if minutes > 0:
-            if seconds >= 30 and part_length_limit == 1:
-                minutes += 1
+    Args:
+        td (timedelta): Duration to be formatted.
+        length_limit (int, optional): Limit for number of components in the time string.
+            Must be a positive integer. Defaults to 3.
+        locale (str, optional): Locale code for unit names. Defaults to "en".
 
-            parts.append(f"{minutes} {'minute' if minutes == 1 else 'minutes'}")
-            part_length_limit -= 1
+    Returns:
+        str: Formatted string
+    """
+    return FORMATTERS.get_duration_plan(locale)(td, length_limit)
 
-        if part_length_limit == 0:
-            break
 
-        if seconds > 0:
-            # no need for any more rounding
-            parts.append(f"{seconds} {'second' if seconds == 1 else 'seconds'}")
-            part_length_limit -= 1
+def format_timedeltas(
+    tds: Iterable[timedelta], length_limit: int = 3, locale: str = DEFAULT_LOCALE
+) -> List[str]:
+    """Batch version of `format_timedelta()`. Durations that are the same to the second
+    (e.g. countdowns of RPs that update together) are only formatted once.
 
-        break
+    Args:
+        tds (Iterable[timedelta]): Durations to be formatted.
+        length_limit (int, optional): Limit for number of components in each string. Defaults to 3.
+        locale (str, optional): Locale code for unit names. Defaults to "en".
 
-    # Join the parts with commas and 'and' for the last part
-    if len(parts) == 0:
-        return "now"
-    elif len(parts) == 1:
-        return parts[0]
-    else:
-        return ", ".join(parts[:-1]) + f" and {parts[-1]}"
+    Returns:
+        List[str]: Formatted strings, in the same order.
+    """
+    plan = FORMATTERS.get_duration_plan(locale)
+    formatted: Dict[int, str] = {}
+    results = []
+    for td in tds:
+        seconds = int(td.total_seconds())
+        string = formatted.get(seconds)
+        if string is None:
+            string = formatted[seconds] = plan(td, length_limit)
+        results.append(string)
+    return results
 
 
 def main():
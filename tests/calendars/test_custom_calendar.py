@@ -0,0 +1,127 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from cidderbot.calendars.base import CALENDAR_EPOCH
+from cidderbot.calendars.custom import CustomCalendar
+from cidderbot.scheduling.clock_store import datetime_to_us
+from cidderbot.utils.time_formatters import TimeUnit
+
+# Harptos-like: 12 months of 30 days, 10 day weeks, and a leap day in Flamerule every 4 years
+HARPTOS = CustomCalendar(
+    "harptos",
+    [
+        ("Hammer", 30), ("Alturiak", 30), ("Ches", 30), ("Tarsakh", 30), ("Mirtul", 30), ("Kythorn", 30),
+        ("Flamerule", 30), ("Eleasis", 30), ("Eleint", 30), ("Marpenoth", 30), ("Uktar", 30), ("Nightal", 30),
+    ],
+    days_per_week=10,
+    leap_every=4,
+    leap_month=6,
+)
+
+
+def test_day_tables_match_counting_days():
+    days = 0
+    for year in range(1, 30):
+        for month in range(1, 13):
+            for day in range(1, HARPTOS.month_length(year, month) + 1):
+                assert HARPTOS.date_from_days(days) == (year, month, day)
+                assert HARPTOS.days_from_date(year, month, day) == days
+                days += 1
+
+    assert HARPTOS.days_before_year(5) == 4 * 360 + 1
+    assert HARPTOS.date_from_days(HARPTOS.days_from_date(9000, 7, 31)) == (9000, 7, 31)
+
+
+def test_add_months_clamps_day_of_month():
+    dt = HARPTOS.date(1492, 7, 31, 12, 30)  # leap day
+
+    assert HARPTOS.add(dt, TimeUnit.YEAR, 1) == HARPTOS.date(1493, 7, 30, 12, 30)
+    assert HARPTOS.add(dt, TimeUnit.MONTH, 1) == HARPTOS.date(1492, 8, 30, 12, 30)
+    assert HARPTOS.add(dt, TimeUnit.MONTH, -7) == HARPTOS.date(1491, 12, 30, 12, 30)
+    assert HARPTOS.add(dt, TimeUnit.WEEK, 1) == HARPTOS.date(1492, 8, 10, 12, 30)
+
+
+@pytest.mark.parametrize("unit", [TimeUnit.DAY, TimeUnit.WEEK, TimeUnit.MONTH, TimeUnit.YEAR])
+def test_count_until(unit):
+    start = HARPTOS.date(1490, 3, 30)
+    for days in range(0, 3000, 7):
+        end = start + timedelta(days=days, hours=5)
+        count = HARPTOS.count_until(start, end, unit)
+        assert HARPTOS.add(start, unit, count) >= end
+        assert count == 0 or HARPTOS.add(start, unit, count - 1) < end
+
+
+def test_units_in():
+    assert HARPTOS.units_in(TimeUnit.YEAR, TimeUnit.MONTH) == 12
+    assert HARPTOS.units_in(TimeUnit.YEAR, TimeUnit.DAY) == 360
+    assert HARPTOS.units_in(TimeUnit.MONTH, TimeUnit.WEEK) == 3
+    assert HARPTOS.units_in(TimeUnit.DAY, TimeUnit.HOUR) == 24
+    assert HARPTOS.units_in(TimeUnit.DAY, TimeUnit.MONTH) == 0
+
+
+@pytest.mark.parametrize(
+    "unit,expected",
+    [
+        (TimeUnit.YEAR, "1492"),
+        (TimeUnit.MONTH, "Flamerule 1492"),
+        (TimeUnit.WEEK, "Week 22, 1492"),
+        (TimeUnit.DAY, "31 Flamerule 1492"),
+        (TimeUnit.HOUR, "31 Flamerule 1492, 12:00"),
+        (TimeUnit.MINUTE, "31 Flamerule 1492, 12:30"),
+        (TimeUnit.SECOND, "31 Flamerule 1492, 12:30:05"),
+    ],
+)
+def test_format_and_parse(unit, expected):
+    dt = HARPTOS.date(1492, 7, 31, 12, 30, 5)
+    assert HARPTOS.format(dt, unit) == expected
+    if unit != TimeUnit.WEEK:  # weeks aren't parsed, like Gregorian ones
+        assert HARPTOS.add(HARPTOS.parse(expected), unit, 1) > dt
+
+
+@pytest.mark.parametrize(
+    "string,expected",
+    [
+        ("1492-07-31T12:30", (1492, 7, 31, 12, 30)),
+        ("1 hammer 1492", (1492, 1, 1)),
+        ("Flam  1492", (1492, 7, 1)),
+        ("1492", (1492, 1, 1)),
+        ("31 Flamerule 1493", None),  # not a leap year
+        ("12 1492", None),
+        ("1 March 1492", None),
+    ],
+)
+def test_parse(string, expected):
+    assert HARPTOS.parse(string) == (HARPTOS.date(*expected) if expected else None)
+
+
+def test_format_uses_locale_for_weeks():
+    assert HARPTOS.format(HARPTOS.date(1492, 1, 11), TimeUnit.WEEK, "de") == "Woche 02, 1492"
+
+
+def test_add_months_us_matches_add():
+    rng = np.random.default_rng(1)
+    dts = [CALENDAR_EPOCH + timedelta(days=int(days), seconds=int(seconds))
+           for days, seconds in zip(rng.integers(0, 2_000_000, 500), rng.integers(0, 86400, 500))]
+    months = rng.integers(0, 600, 500)
+
+    added = HARPTOS.add_months_us(np.array([datetime_to_us(dt) for dt in dts]), months)
+    assert added.tolist() == [datetime_to_us(HARPTOS.add(dt, TimeUnit.MONTH, int(m))) for dt, m in zip(dts, months)]
+
+
+@pytest.mark.parametrize(
+    "definition",
+    [
+        {"name": "x", "months": []},
+        {"name": "x", "months": [["A", 0]]},
+        {"name": "x", "months": [["A", 10], ["a", 10]]},
+        {"name": "x", "months": [["A1", 10]]},
+        {"name": "x", "months": [["A", 10]], "leap_month": 3},
+        {"months": [["A", 10]]},
+        {"name": "x", "months": 5},
+    ],
+)
+def test_invalid_definitions(definition):
+    with pytest.raises(ValueError):
+        CustomCalendar.from_dict(definition)
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from cidderbot.calendars.base import RpCalendar
+from cidderbot.calendars.custom import CustomCalendar
+from cidderbot.calendars.gregorian import GREGORIAN
+from cidderbot.calendars.registry import CALENDARS, get_calendar, load_calendars, register_calendar
+
+
+def test_load_calendars(tmp_path):
+    path = tmp_path / "calendars.json"
+    path.write_text(json.dumps([{"name": "test-tiny", "months": [["Sow", 10], ["Reap", 10]], "days_per_week": 5}]))
+
+    try:
+        (calendar,) = load_calendars(str(path))
+        assert get_calendar("test-tiny") is calendar
+        assert calendar.days_per_year == 20
+    finally:
+        CALENDARS.pop("test-tiny", None)
+
+
+def test_get_calendar():
+    assert get_calendar("gregorian") is GREGORIAN
+    with pytest.raises(ValueError):
+        get_calendar("test-missing")
+    with pytest.raises(ValueError):
+        register_calendar(CustomCalendar("gregorian", [("A", 10)]))
+
+
+def test_calendars_must_implement_the_abstract_methods():
+    class Incomplete(RpCalendar):
+        name = "test-incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()  # pylint: disable=abstract-class-instantiated
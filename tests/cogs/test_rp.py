@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from cidderbot.calendars.custom import CustomCalendar
+from cidderbot.cidder import scheduler_task_name
+from cidderbot.testing.factories import make_rp
+from cidderbot.testing.fake_discord import FakeDiscordHarness, FakeMessage
+from cidderbot.utils.time_formatters import TimeUnit
+
+
+def test_reload_keeps_rps_and_their_schedule():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=10, guild_count=5) as harness:
+            cog = harness.cog
+            rps = list(harness.cidder.rps)
+            scheduler_task = harness.cidder.tasks.get(scheduler_task_name(0))
+            channel = harness.guilds[0].channels[1]
+
+            # owner only
+            await harness.bot.on_message(FakeMessage("rp!reload", harness.player, channel))
+            assert harness.bot.get_cog("Rp") is cog
+
+            await harness.bot.on_message(FakeMessage("rp!reload", harness.owner, channel))
+            new_cog = harness.bot.get_cog("Rp")
+            assert new_cog is not cog
+            assert channel.sent[-1].startswith("Reloaded in")
+
+            assert harness.cidder.rps == rps
+            assert harness.cidder.tasks.get(scheduler_task_name(0)) is scheduler_task
+            assert len(harness.cidder.shards[0].scheduler) == len(rps)
+
+            # the reloaded cog sends the updates
+            stats = await harness.advance(timedelta(days=1))
+            assert stats["increments"] >= len(rps)
+            assert stats["update_messages"] > 0
+
+    asyncio.run(scenario())
+
+
+def test_due_rps_wait_for_the_reloaded_cog():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=3, guild_count=3) as harness:
+            cidder = harness.cidder
+            handler = harness.cog.update_rps
+
+            # as in the middle of a reload
+            cidder.set_update_handler(None)
+            harness.clock.now += timedelta(days=1)
+            firing = asyncio.create_task(cidder.run_pending(harness.clock.now))
+            await asyncio.sleep(0.01)
+            assert not firing.done()
+
+            cidder.set_update_handler(handler)
+            fired = await asyncio.wait_for(firing, 1)
+            assert len(fired) == 3
+
+    asyncio.run(scenario())
+
+
+def test_commands_are_valid_slash_commands():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=2, guild_count=1) as harness:
+            return [command.to_dict(harness.bot.tree) for command in harness.bot.tree.get_commands()]
+
+    payloads = {payload["name"]: payload for payload in asyncio.run(scenario())}
+
+    assert {"date", "info", "when", "stats", "reload"} <= set(payloads)
+    # Discord rejects descriptions over 100 characters
+    assert all(0 < len(payload["description"]) <= 100 for payload in payloads.values())
+    # owner commands are hidden from everyone but admins
+    assert payloads["reload"]["default_member_permissions"] == 0
+    assert payloads["date"]["default_member_permissions"] is None
+
+
+def test_april_fools_only_in_the_gregorian_calendar():
+    # the same stored datetime is 1 April in the Gregorian calendar, but 19 MonthC in this one
+    calendar = CustomCalendar("decimal", [(f"Month{chr(65 + i)}", 36) for i in range(10)])
+    april_first = datetime(1, 4, 1, tzinfo=timezone.utc)
+    gregorian = make_rp("Gregorian", rp_datetime=april_first, rp_datetime_incr_unit=TimeUnit.DAY)
+    custom = make_rp("Decimal", rp_datetime=april_first, rp_datetime_incr_unit=TimeUnit.DAY, calendar=calendar)
+
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=1, guild_count=1) as harness:
+            # pylint: disable=protected-access
+            return harness.cog._get_custom_messages(gregorian), harness.cog._get_custom_messages(custom)
+
+    assert asyncio.run(scenario()) == ("Happy April Fools!", "")
+
+
+def test_when_too_far_ahead():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=1, guild_count=1) as harness:
+            channel = harness.guilds[0].channels[1]
+            await harness.bot.on_message(FakeMessage("rp!when 1 January 5000", harness.player, channel))
+            return channel.sent[-1]
+
+    assert asyncio.run(scenario()) == "01 January 5000 is too far ahead in rp0."
+
+
+def test_when_and_overview_use_cidders_clock():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=1, guild_count=1) as harness:
+            channel = harness.guilds[0].channels[1]
+            await harness.bot.on_message(FakeMessage("rp!when 1 March 1970", harness.player, channel))
+            await harness.bot.on_message(FakeMessage("rp!overview", harness.owner, channel))
+            return channel.sent[-2:]
+
+    # the virtual clock is at 2025, so by the wall clock these dates would be long gone
+    when, overview = asyncio.run(scenario())
+    assert when.startswith("It will be 01 March 1970 in rp0 in ")
+    assert "- rp0: " in overview and " January 1970, next day" in overview
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from cidderbot.database.database import Database
+from cidderbot.database.db_exceptions import DatabaseNotConnectedException
+
+
+def test_reads_environment_when_connecting(monkeypatch):
+    monkeypatch.delenv("DB_HOST", raising=False)
+    db = Database()
+
+    # set after construction, like load_dotenv() during bot startup
+    monkeypatch.setenv("DB_HOST", "db.example.com")
+    monkeypatch.setenv("DB_NAME", "cidder")
+
+    conninfo = db._get_conninfo()  # pylint: disable=protected-access
+    assert "host=db.example.com" in conninfo
+    assert "dbname=cidder" in conninfo
+    assert "port=5432" in conninfo
+
+
+def test_not_open_until_opened():
+    db = Database()
+    assert not db.is_open
+    assert db.get_stats() == {}
+
+    async def query():
+        await db.fetchone("SELECT 1")
+
+    with pytest.raises(DatabaseNotConnectedException):
+        asyncio.run(query())
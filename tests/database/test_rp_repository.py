@@ -0,0 +1,107 @@
+import asyncio
+from datetime import timedelta
+
+import psycopg
+import pytest
+
+from cidderbot.calendars.gregorian import GREGORIAN
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.database.rp_repository import (
+    RpStateWriteBehind,
+    row_to_rp,
+    rp_to_row,
+)
+from cidderbot.testing import factories
+from cidderbot.testing.factories import StubGuild
+from cidderbot.utils.time_formatters import TimeUnit
+
+
+class FakeRepository:
+    def __init__(self) -> None:
+        self.batches = []
+
+    async def upsert_many(self, rps):
+        names = sorted(rp.name for rp in rps)
+        self.batches.append(names)
+        return len(names)
+
+
+def make_rp(name: str, guilds=()) -> RpHandler:
+    # with everything that's saved set to something other than the default
+    return factories.make_rp(name, guilds, channel_id=42, extra_channel_ids=[43, 44], locale="fr")
+
+
+def test_row_round_trip():
+    guilds = [StubGuild(1), StubGuild(2)]
+    rp = make_rp("Sagrea", guilds)
+
+    row = rp_to_row(rp)
+    assert row[1] == "{1,2}"
+    assert row[-1] == "{43,44}"
+
+    # the database returns arrays as lists
+    row = (row[0], [1, 2]) + row[2:-1] + ([43, 44],)
+    loaded = row_to_rp(row, {guild.id: guild for guild in guilds})
+
+    assert loaded.name == rp.name
+    assert loaded.guilds == guilds
+    assert loaded.channel_id == 42
+    assert loaded.channel_ids == [42, 43, 44]
+    assert loaded.rp_datetime_incr_unit == TimeUnit.MONTH
+    assert loaded.rp_datetime == rp.rp_datetime
+    assert loaded.prev_incr_datetime == rp.prev_incr_datetime
+    assert loaded.incr_interval == timedelta(days=1)
+    assert loaded.locale == "fr"
+    assert loaded.calendar is GREGORIAN
+
+
+def test_unknown_calendar_is_not_loaded_as_gregorian():
+    row = rp_to_row(make_rp("Sagrea"))
+    row = (row[0], []) + row[2:-3] + ("fr", "test-unloaded", [])
+
+    with pytest.raises(ValueError):
+        row_to_rp(row, {})
+
+
+def test_write_behind_batches_burst_into_one_flush():
+    repository = FakeRepository()
+    writer = RpStateWriteBehind(repository, flush_delay=0.01)
+    rps = [make_rp(f"rp{i}") for i in range(50)]
+
+    async def scenario():
+        task = asyncio.create_task(writer.run())
+        await asyncio.sleep(0)
+
+        for rp in rps:
+            writer.mark_dirty(rp)
+        # marking the same RP again doesn't write it twice
+        writer.mark_dirty(rps[0])
+
+        await asyncio.sleep(0.05)
+        writer.stop()
+        await task
+
+    asyncio.run(scenario())
+
+    assert len(repository.batches) == 1
+    assert len(repository.batches[0]) == 50
+    assert writer.rows_written == 50
+    assert not writer
+
+
+def test_write_behind_requeues_on_failure():
+    class FailingRepository:
+        async def upsert_many(self, rps):
+            raise psycopg.OperationalError("connection lost")
+
+    writer = RpStateWriteBehind(FailingRepository())
+    rp = make_rp("a")
+    writer.mark_dirty(rp)
+
+    assert asyncio.run(writer.flush()) == 0
+    assert writer.failed_flushes == 1
+    assert len(writer) == 1
+
+    writer.repository = FakeRepository()
+    assert asyncio.run(writer.flush()) == 1
+    assert not writer
@@ -0,0 +1,219 @@
+import asyncio
+import os
+
+import pytest
+
+from cidderbot.database.database import Database
+from cidderbot.database.worker_leases import (
+    CLAIMS_TABLE,
+    LEASES_TABLE,
+    WORKERS_TABLE,
+    RpWorkerLeases,
+    assign_partitions,
+    partition_for_rp,
+)
+from cidderbot.testing.factories import VirtualClock, make_rp
+
+
+def test_partition_for_rp_is_stable():
+    # crc32, not hash(), so every process agrees
+    assert partition_for_rp("Cold War", 16) == partition_for_rp("Cold War", 16)
+    assert all(0 <= partition_for_rp(f"rp {i}", 7) < 7 for i in range(100))
+
+
+def test_assign_partitions_splits_evenly():
+    workers = ["b", "a", "c"]
+    assigned = {worker: assign_partitions(16, workers, worker) for worker in workers}
+
+    every = sorted(p for partitions in assigned.values() for p in partitions)
+    assert every == list(range(16))
+    assert sorted(len(partitions) for partitions in assigned.values()) == [5, 5, 6]
+
+    # a worker that hasn't shown up in the table yet still counts itself
+    assert assign_partitions(4, [], "a") == [0, 1, 2, 3]
+
+
+def test_leases_run_out_locally():
+    clock = VirtualClock(0.0)
+    worker = RpWorkerLeases(Database(), "a", partition_count=4, lease_seconds=30, clock=clock)
+    rp = make_rp("A")
+
+    # as if a heartbeat at t=0 got every partition
+    worker._held = {0, 1, 2, 3}  # pylint: disable=protected-access
+    worker._held_until = 30.0  # pylint: disable=protected-access
+    assert worker.holds(rp)
+
+    clock.now = 30.0
+    assert not worker.held_partitions
+    assert not worker.holds(rp)
+
+
+def test_claim_falls_back_to_held_leases():
+    clock = VirtualClock(0.0)
+    # never opened, so claiming fails
+    worker = RpWorkerLeases(Database(), "a", partition_count=2, lease_seconds=30, clock=clock)
+    rps = [make_rp(f"rp {i}") for i in range(10)]
+
+    held = partition_for_rp("rp 0", 2)
+    worker._held = {held}  # pylint: disable=protected-access
+    worker._held_until = 30.0  # pylint: disable=protected-access
+
+    claimed = asyncio.run(worker.claim(rps))
+    assert claimed
+    assert claimed == [rp for rp in rps if worker.partition_for(rp) == held]
+
+    clock.now = 31.0
+    assert not asyncio.run(worker.claim(rps))
+
+
+def test_increments_in_unheld_partitions_are_kept_for_later():
+    clock = VirtualClock(0.0)
+    worker = RpWorkerLeases(Database(), "a", partition_count=2, lease_seconds=30, clock=clock)
+    rps = [make_rp(f"rp {i}") for i in range(10)]
+
+    # holds nothing yet, e.g. just joined
+    assert not asyncio.run(worker.claim(rps))
+    assert not asyncio.run(worker.claim(rps))
+    assert worker.get_stats()["unclaimed"] == 10
+
+    held = partition_for_rp("rp 0", 2)
+    unclaimed = worker._get_unclaimed({held}, clock.now)  # pylint: disable=protected-access
+    assert sorted(unclaimed.values(), key=rps.index) == [rp for rp in rps if worker.partition_for(rp) == held]
+
+    # forgotten once the partitions must have been taken over by someone
+    clock.now = worker.unclaimed_retention + 1
+    assert not worker._get_unclaimed({0, 1}, clock.now)  # pylint: disable=protected-access
+    assert worker.get_stats()["unclaimed"] == 0
+
+
+# ==== Against a real database ====
+# Uses the usual DB_* settings. Run a local Postgres, e.g.
+#   docker run -e POSTGRES_PASSWORD=test -p 5432:5432 postgres
+# then set DB_HOST=localhost DB_NAME=postgres DB_USER=postgres DB_PASSWORD=test CIDDER_TEST_POSTGRES=1
+
+requires_postgres = pytest.mark.skipif(
+    os.getenv("CIDDER_TEST_POSTGRES") != "1", reason="needs a local Postgres, set CIDDER_TEST_POSTGRES=1"
+)
+
+
+async def _open_clean_database() -> Database:
+    database = Database()
+    assert await database.open(retries=1)
+    for table in (WORKERS_TABLE, LEASES_TABLE, CLAIMS_TABLE):
+        await database.execute(f"DROP TABLE IF EXISTS {table};")
+    return database
+
+
+@requires_postgres
+def test_workers_split_partitions():
+    async def run():
+        database = await _open_clean_database()
+        try:
+            a = RpWorkerLeases(database, "a", partition_count=8)
+            b = RpWorkerLeases(database, "b", partition_count=8)
+            await a.ensure_schema()
+
+            await a.heartbeat()  # alone, so a wants everything
+            await b.heartbeat()  # b can't have anything until a lets go
+            assert len(a.held_partitions) == 8
+            assert not b.held_partitions
+
+            await a.heartbeat()  # a sees b and releases its half
+            await b.heartbeat()
+            assert a.held_partitions == {0, 2, 4, 6}
+            assert b.held_partitions == {1, 3, 5, 7}
+        finally:
+            await database.close()
+
+    asyncio.run(run())
+
+
+@requires_postgres
+def test_increment_is_claimed_once():
+    async def run():
+        database = await _open_clean_database()
+        try:
+            a = RpWorkerLeases(database, "a", partition_count=1)
+            b = RpWorkerLeases(database, "b", partition_count=1)
+            await a.ensure_schema()
+            await a.heartbeat()
+
+            rp = make_rp("A")
+            # b wrongly thinks it holds the partition, e.g. it stalled past its lease
+            b._held = {0}  # pylint: disable=protected-access
+            b._held_until = float("inf")  # pylint: disable=protected-access
+
+            assert not await b.claim([rp])
+            assert await a.claim([rp]) == [rp]
+            # same increment again, e.g. fired twice
+            assert not await a.claim([rp])
+
+            rp.update()
+            assert await a.claim([rp]) == [rp]
+        finally:
+            await database.close()
+
+    asyncio.run(run())
+
+
+@requires_postgres
+def test_dead_worker_is_taken_over():
+    async def run():
+        database = await _open_clean_database()
+        try:
+            a = RpWorkerLeases(database, "a", partition_count=4, lease_seconds=1)
+            b = RpWorkerLeases(database, "b", partition_count=4, lease_seconds=1)
+            await a.ensure_schema()
+            await a.heartbeat()
+            assert len(a.held_partitions) == 4
+
+            # a dies without releasing anything
+            await b.heartbeat()
+            assert not b.held_partitions
+
+            await asyncio.sleep(1.1)
+            await b.heartbeat()
+            assert len(b.held_partitions) == 4
+
+            # a clean shutdown hands over straight away
+            await b.release()
+            await a.heartbeat()
+            assert len(a.held_partitions) == 4
+        finally:
+            await database.close()
+
+    asyncio.run(run())
+
+
+@requires_postgres
+def test_increment_due_during_takeover_is_announced_once():
+    async def run():
+        database = await _open_clean_database()
+        try:
+            late = []
+            a = RpWorkerLeases(database, "a", partition_count=1, lease_seconds=1)
+            b = RpWorkerLeases(database, "b", partition_count=1, lease_seconds=1, on_late_claims=late.extend)
+            await a.ensure_schema()
+            await a.heartbeat()
+
+            # a dies, and the RP falls due before b can take its partition
+            await b.heartbeat()
+            rp = make_rp("A")
+            assert not await b.claim([rp])
+            rp.update()  # advanced locally, as Cidder does
+
+            await asyncio.sleep(1.1)
+            await b.heartbeat()
+            assert b.held_partitions == {0}
+            assert late == [rp]
+
+            # not again, and not by anyone else
+            await b.heartbeat()
+            assert late == [rp]
+            assert b.get_stats()["late_claimed"] == 1
+            count = await database.fetchone(f"SELECT count(*) FROM {CLAIMS_TABLE};")
+            assert count == (1,)
+        finally:
+            await database.close()
+
+    asyncio.run(run())
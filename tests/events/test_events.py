@@ -0,0 +1,141 @@
+import asyncio
+from datetime import timedelta
+
+import discord
+
+from cidderbot.bot import BotMain, CidderBot
+from cidderbot.cidder import Cidder, scheduler_task_name
+from cidderbot.events.events import BotEvents
+from cidderbot.testing.fake_discord import FakeChannel, FakeDiscordHarness, FakeGuild, FakeMessage
+
+
+def test_on_ready_after_reconnects_only_resyncs():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=10, guild_count=5) as harness:
+            cog = harness.cog
+            rps = list(harness.cidder.rps)
+
+            # joined while disconnected
+            harness.bot.guilds.append(FakeGuild(99, "new guild"))
+            await asyncio.gather(*(harness.bot.on_ready() for _ in range(3)))  # pylint: disable=no-member
+
+            assert harness.bot.get_cog("Rp") is cog
+            assert harness.cidder.rps == rps
+            assert any(guild.id == 99 for guild in harness.cidder.guilds)
+            # one timer for all RPs, each RP scheduled once
+            assert harness.cidder.tasks.names() == [scheduler_task_name(0)]
+            assert harness.cidder.tasks.started_count == 1
+            assert len(harness.cidder.shards[0].scheduler) == len(rps)
+
+        assert not harness.cidder.tasks.names()
+
+    asyncio.run(scenario())
+
+
+def test_channel_events_update_the_registry():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=2, guild_count=2) as harness:
+            guild = harness.guilds[0]
+            channel = FakeChannel(12345 << 22, guild, "new-channel")
+            await harness.bot.on_guild_channel_create(channel)  # pylint: disable=no-member
+            assert harness.cidder.entities.get_channel_guild_id(channel.id) == guild.id
+
+            await harness.bot.on_guild_channel_delete(channel)  # pylint: disable=no-member
+            assert harness.cidder.entities.get_channel(channel.id) is None
+
+            await harness.bot.on_message(  # pylint: disable=no-member
+                FakeMessage("rp!memory", harness.owner, guild.channels[0])
+            )
+            return guild.channels[0].sent[-1]
+
+    reply = asyncio.run(scenario())
+    assert "registry: 2 guilds, 4 channels" in reply
+    assert "discord.py guild cache" in reply
+
+
+def test_slash_only_mode_has_no_message_handler():
+    async def scenario():
+        harness = FakeDiscordHarness(rp_count=2, guild_count=1)
+        await harness.bot.setup_offline()
+        BotEvents(harness.bot, harness.cidder, prefix_commands=False)
+        try:
+            await harness.bot.on_ready()  # pylint: disable=no-member
+            assert "on_message" not in vars(harness.bot)
+            return harness.bot.tree.get_command("date")
+        finally:
+            await harness.close()
+
+    assert asyncio.run(scenario()) is not None
+
+    intents = BotMain._setup_intents(prefix_commands=False)  # pylint: disable=protected-access
+    assert not intents.message_content
+    assert not intents.messages
+    assert BotMain._setup_intents(prefix_commands=True).message_content  # pylint: disable=protected-access
+
+
+def test_on_message_rejects_non_commands_before_parsing():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=2, guild_count=2) as harness:
+            custom, default = harness.guilds[0].channels[1], harness.guilds[1].channels[1]
+            await harness.cidder.set_guild_prefix(harness.guilds[0].id, "!")
+
+            for content, author, channel in (
+                ("!prefix", harness.player, custom),
+                ("rp!prefix", harness.player, custom),  # old prefix
+                ("rp!prefix", harness.player, default),
+                ("just chatting", harness.player, default),
+                ("rp!prefix", harness.bot.user, default),
+            ):
+                await harness.bot.on_message(FakeMessage(content, author, channel))  # pylint: disable=no-member
+
+            counts = {
+                key[0]: child.value
+                for key, child in harness.cidder.metrics.get("cidder_incoming_messages_total").children()
+            }
+            return counts, custom.sent, default.sent
+
+    counts, custom_sent, default_sent = asyncio.run(scenario())
+    assert counts == {"processed": 2, "no_prefix": 2, "bot_author": 1}
+    assert custom_sent == ["The command prefix here is `!`."]
+    assert default_sent == ["The command prefix here is `rp!`."]
+
+
+def test_incoming_and_sent_messages_are_separate_metrics():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=2, guild_count=2) as harness:
+            channel = harness.guilds[0].channels[1]
+            await harness.bot.on_message(FakeMessage("rp!prefix", harness.player, channel))  # pylint: disable=no-member
+            await harness.advance(timedelta(days=1))
+            return harness.cidder.metrics.render().splitlines()
+
+    lines = asyncio.run(scenario())
+    assert "# HELP cidder_incoming_messages_total Messages received, by how far they got." in lines
+    assert 'cidder_incoming_messages_total{result="processed"} 1' in lines
+    assert "# HELP cidder_messages_total Messages sent, by result." in lines
+    assert 'cidder_messages_total{result="sent"} 2' in lines
+    assert not any(line.startswith('cidder_messages_total{result="processed"}') for line in lines)
+
+
+def test_closing_the_bot_shuts_cidder_down_first():
+    sent = []
+
+    class Channel:
+        id = 1
+
+        async def send(self, content):
+            # still able to send
+            assert not bot.is_closed()
+            sent.append(content)
+
+    async def scenario():
+        cidder = Cidder()
+        cidder.dispatcher.send(Channel(), "final update")
+        bot.cidder = cidder
+        await bot.close()
+        await bot.close()
+
+    bot = CidderBot(command_prefix="!", intents=discord.Intents.none())
+    asyncio.run(scenario())
+
+    assert sent == ["final update"]
+    assert bot.is_closed()
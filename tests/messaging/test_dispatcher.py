@@ -0,0 +1,147 @@
+import asyncio
+
+import aiohttp
+
+from cidderbot.messaging.dispatcher import MessageDispatcher, TokenBucket
+from cidderbot.metrics.registry import MetricsRegistry
+from cidderbot.testing.factories import VirtualClock
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, delay: float = 0.0) -> None:
+        self.id = channel_id
+        self.delay = delay
+        self.sent = []
+
+    async def send(self, content: str) -> None:
+        await asyncio.sleep(self.delay)
+        self.sent.append(content)
+
+
+def test_token_bucket():
+    clock = VirtualClock(0.0)
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=clock)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 1.0
+
+    clock.now = 0.5
+    assert bucket.try_acquire() == 0.5
+
+    # never refills past capacity
+    clock.now = 100.0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() > 0
+
+
+def test_messages_to_the_same_channel_are_coalesced():
+    channel = FakeChannel(1)
+    other = FakeChannel(2)
+    metrics = MetricsRegistry()
+
+    async def scenario():
+        dispatcher = MessageDispatcher(coalesce_window=0.01, metrics=metrics)
+        dispatcher.send(channel, "a")
+        dispatcher.send(channel, "b")
+        dispatcher.send_many([channel, other], "c")
+        assert dispatcher.queue_depth == 4
+
+        await dispatcher.flush()
+        return dispatcher
+
+    dispatcher = asyncio.run(scenario())
+
+    assert channel.sent == ["a\nb\nc"]
+    assert other.sent == ["c"]
+    assert dispatcher.sent_count == 2
+    assert dispatcher.coalesced_count == 2
+    assert dispatcher.queue_depth == 0
+    assert dispatcher.max_queue_depth == 4
+    assert metrics.get("cidder_messages_total").labels("sent").value == 2
+    assert metrics.get("cidder_message_send_seconds").labels().count == 2
+    assert metrics.get("cidder_message_queue_depth").get() == 0
+
+
+def test_coalesced_messages_stay_under_the_length_limit():
+    channel = FakeChannel(1)
+
+    async def scenario():
+        dispatcher = MessageDispatcher(coalesce_window=0, max_length=10)
+        for content in ("aaaa", "bbbb", "cccc", "d" * 25):
+            dispatcher.send(channel, content)
+        await dispatcher.flush()
+
+    asyncio.run(scenario())
+
+    assert channel.sent == ["aaaa\nbbbb", "cccc", "d" * 10, "d" * 10, "d" * 5]
+    assert all(len(content) <= 10 for content in channel.sent)
+
+
+def test_channels_are_sent_to_concurrently():
+    channels = [FakeChannel(i, delay=0.05) for i in range(10)]
+
+    async def scenario():
+        dispatcher = MessageDispatcher(coalesce_window=0)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        dispatcher.send_many(channels, "update")
+        await dispatcher.flush()
+        return dispatcher, loop.time() - start
+
+    dispatcher, elapsed = asyncio.run(scenario())
+
+    assert all(channel.sent == ["update"] for channel in channels)
+    assert elapsed < 0.3
+    assert dispatcher.get_stats()["mean_send_latency"] >= 0.05
+
+
+def test_channel_rate_limit_paces_sends():
+    channel = FakeChannel(1)
+
+    async def scenario():
+        dispatcher = MessageDispatcher(
+            coalesce_window=0, channel_rate=100.0, channel_burst=1, max_length=1
+        )
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        # 5 messages that can't be merged
+        dispatcher.send(channel, "abcde")
+        await dispatcher.flush()
+        return loop.time() - start
+
+    elapsed = asyncio.run(scenario())
+
+    assert channel.sent == list("abcde")
+    # 1 immediately, then one every 10ms
+    assert elapsed >= 0.035
+
+
+class FlakyChannel(FakeChannel):
+    def __init__(self, channel_id: int, errors) -> None:
+        super().__init__(channel_id)
+        self.errors = list(errors)
+
+    async def send(self, content: str) -> None:
+        if self.errors:
+            raise self.errors.pop(0)
+        await super().send(content)
+
+
+def test_connection_errors_only_fail_their_message():
+    channel = FlakyChannel(1, [aiohttp.ClientConnectionError("reset"), OSError("unreachable"), asyncio.TimeoutError()])
+
+    async def scenario():
+        dispatcher = MessageDispatcher(coalesce_window=0, max_length=1)
+        for content in "abcd":
+            dispatcher.send(channel, content)
+        await dispatcher.flush()
+        return dispatcher
+
+    dispatcher = asyncio.run(scenario())
+
+    # the rest of the queue is still sent
+    assert channel.sent == ["d"]
+    assert dispatcher.failed_count == 3
+    assert dispatcher.queue_depth == 0
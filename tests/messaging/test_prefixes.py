@@ -0,0 +1,64 @@
+from cidderbot.messaging.prefixes import DEFAULT_PREFIX, PrefixCache
+from cidderbot.testing.factories import StubGuild
+from cidderbot.utils.string_utils.validators import validate_command_prefix
+
+
+class FakeMessage:
+    def __init__(self, content: str, guild=None) -> None:
+        self.content = content
+        self.guild = guild
+
+
+def test_guilds_use_the_default_until_changed():
+    prefixes = PrefixCache()
+    g1, g2 = StubGuild(1), StubGuild(2)
+    prefixes.set(1, "!")
+
+    assert prefixes.get(1) == "!"
+    assert prefixes.get(2) == DEFAULT_PREFIX
+    # DMs have no guild
+    assert prefixes.get(None) == DEFAULT_PREFIX
+
+    assert prefixes.matches(FakeMessage("!date", g1))
+    assert not prefixes.matches(FakeMessage("rp!date", g1))
+    assert prefixes.matches(FakeMessage("rp!date", g2))
+    assert prefixes(None, FakeMessage("hello", g1)) == "!"
+
+    # setting the default is the same as resetting
+    prefixes.set(1, DEFAULT_PREFIX)
+    assert not prefixes
+    assert not prefixes.reset(1)
+
+
+def test_load_replaces_cached_prefixes():
+    prefixes = PrefixCache()
+    prefixes.set(1, "!")
+    prefixes.load({2: "?"})
+    assert prefixes.get(1) == DEFAULT_PREFIX
+    assert prefixes.get(2) == "?"
+
+
+def test_load_keeps_unsaved_changes():
+    prefixes = PrefixCache()
+    prefixes.set(1, "!", saved=False)
+    prefixes.reset(2, saved=False)
+    prefixes.load({2: "?", 3: "$"})
+
+    assert prefixes.get(1) == "!"
+    assert prefixes.get(2) == DEFAULT_PREFIX
+    assert prefixes.get(3) == "$"
+    assert prefixes.get_unsaved() == {1: "!", 2: None}
+
+    # saving an outdated change doesn't lose the newer one
+    prefixes.set(1, "?", saved=False)
+    prefixes.mark_saved(1, "!")
+    prefixes.mark_saved(2, None)
+    assert prefixes.get_unsaved() == {1: "?"}
+
+
+def test_validate_command_prefix():
+    assert validate_command_prefix("!")
+    assert validate_command_prefix("cidder!")
+    assert not validate_command_prefix("")
+    assert not validate_command_prefix("rp !")
+    assert not validate_command_prefix("x" * 11)
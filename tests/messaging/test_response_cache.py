@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.messaging.response_cache import CachedResponse, ResponseCache
+from cidderbot.testing.factories import VirtualClock, make_rp
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# make_rp's RPs go 1 RP month per day of real time, so 1 RP day is 48 minutes
+
+
+@pytest.fixture(name="clock")
+def fixture_clock():
+    return VirtualClock(START)
+
+
+def build_date(rp: RpHandler) -> CachedResponse:
+    return CachedResponse([f"{rp.name}: {rp.format_current_rp_time()}, next in ", "."])
+
+
+def test_render_fills_in_gaps():
+    response = CachedResponse(["a ", " b ", "."])
+
+    assert response.render("1", "2") == "a 1 b 2."
+    assert CachedResponse(["static"]).render() == "static"
+
+
+def test_responses_are_cached_until_the_next_unit(clock):
+    rp = make_rp("Sagrea", clock=clock)
+    cache = ResponseCache(clock=clock)
+
+    first = cache.get_or_build("date", rp, lambda: build_date(rp))
+    clock.now = START + timedelta(minutes=47)
+    assert cache.get_or_build("date", rp, lambda: build_date(rp)) is first
+    assert first.render("1 minute") == "Sagrea: 01 January 1970, next in 1 minute."
+
+    # next RP day
+    clock.now = START + timedelta(minutes=48)
+    second = cache.get_or_build("date", rp, lambda: build_date(rp))
+    assert second.render("48 minutes") == "Sagrea: 02 January 1970, next in 48 minutes."
+
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 2
+
+
+def test_update_invalidates_responses(clock):
+    rp = make_rp("Sagrea", clock=clock)
+    cache = ResponseCache(clock=clock)
+
+    first = cache.get_or_build("date", rp, lambda: build_date(rp))
+    rp.update()
+
+    assert cache.get_or_build("date", rp, lambda: build_date(rp)) is not first
+
+
+def test_least_recently_used_response_is_evicted(clock):
+    rps = [make_rp(name, clock=clock) for name in "ABC"]
+    cache = ResponseCache(max_size=2, clock=clock)
+
+    cache.get_or_build("date", rps[0], lambda: build_date(rps[0]))
+    cache.get_or_build("date", rps[1], lambda: build_date(rps[1]))
+    # A is now more recently used than B
+    cache.get_or_build("date", rps[0], lambda: build_date(rps[0]))
+    cache.get_or_build("date", rps[2], lambda: build_date(rps[2]))
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    cache.get_or_build("date", rps[0], lambda: build_date(rps[0]))
+    assert cache.get_stats()["hit_rate"] == 0.4
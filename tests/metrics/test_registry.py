@@ -0,0 +1,69 @@
+import math
+
+import pytest
+
+from cidderbot.metrics.registry import MetricsRegistry
+
+
+def test_counter_and_gauge_rendering():
+    registry = MetricsRegistry()
+    commands = registry.counter("cidder_commands_total", "Commands run.", ["command"])
+    commands.labels("date").inc()
+    commands.labels(command="date").inc(2)
+    registry.gauge("cidder_queue_depth", "Queued.").set_function(lambda: 7)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE cidder_commands_total counter" in lines
+    assert 'cidder_commands_total{command="date"} 3' in lines
+    assert "cidder_queue_depth 7" in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_sum 3.65" in lines
+    assert "latency_seconds_count 4" in lines
+
+    child = histogram.labels()
+    assert child.quantile(0.5) == 0.1
+    assert child.quantile(0.75) == 1.0
+    assert math.isinf(child.quantile(1.0))
+
+
+def test_metrics_are_shared_by_name():
+    registry = MetricsRegistry()
+    registry.counter("a_total", "A.").inc()
+    registry.counter("a_total", "A.").inc()
+
+    assert registry.get("a_total").labels().value == 2
+    with pytest.raises(ValueError):
+        registry.gauge("a_total", "A.")
+    with pytest.raises(ValueError):
+        registry.counter("a_total", "A.").inc(-1)
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("x_total", "X.", ["name"]).labels('a "quoted"\nname').inc()
+
+    assert 'x_total{name="a \\"quoted\\"\\nname"} 1' in registry.render()
+
+
+def test_summarize():
+    registry = MetricsRegistry()
+    registry.histogram("h_seconds", "H.", ["command"]).labels("date").observe(0.002)
+    registry.gauge("g", "G.").set(1.5)
+
+    assert registry.summarize() == [
+        "h_seconds[date]: n=1, mean=0.002, p50<=0.005, p95<=0.005",
+        "g: 1.5",
+    ]
@@ -0,0 +1,35 @@
+import asyncio
+import socket
+
+import aiohttp
+
+from cidderbot.metrics.registry import MetricsRegistry
+from cidderbot.metrics.server import MetricsServer
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_serves_metrics():
+    registry = MetricsRegistry()
+    registry.counter("cidder_test_total", "Test.").inc()
+    server = MetricsServer(registry, port=get_free_port())
+
+    async def scenario():
+        assert await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{server.port}/metrics") as response:
+                    return response.status, response.headers["Content-Type"], await response.text()
+        finally:
+            await server.stop()
+
+    status, content_type, body = asyncio.run(scenario())
+
+    assert status == 200
+    assert content_type.startswith("text/plain; version=0.0.4")
+    assert "cidder_test_total 1" in body
+    assert not server.is_running
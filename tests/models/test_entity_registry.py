@@ -0,0 +1,76 @@
+import sys
+
+import pytest
+
+from cidderbot.models.entity_registry import EntityRegistry
+from cidderbot.models.guild import CidderGuild
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, name: str, channel_ids=()) -> None:
+        self.id = guild_id
+        self.name = name
+        self.channels = [FakeChannel(channel_id, self) for channel_id in channel_ids]
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild) -> None:
+        self.id = channel_id
+        self.guild = guild
+
+
+def test_guilds_and_channels_are_added_and_removed_incrementally():
+    registry = EntityRegistry()
+    g1 = FakeGuild(1, "one", [10, 11])
+    model = registry.add_guild(g1)
+
+    assert model.name == "one"
+    assert [channel.id for channel in model.channels] == [10, 11]
+    assert registry.get_channel_guild_id(11) == 1
+
+    registry.add_channel(FakeChannel(12, g1))
+    assert registry.get_channel(12).guild is model
+    # channels of unknown guilds (e.g. DMs) are ignored
+    assert registry.add_channel(FakeChannel(20, FakeGuild(2, "two"))) is None
+
+    assert registry.remove_channel(10)
+    assert not registry.remove_channel(10)
+    assert [channel.id for channel in model.channels] == [11, 12]
+
+    # joining again (e.g. after a rename) keeps the same model
+    g1.name = "renamed"
+    assert registry.add_guild(g1) is model
+    assert model.name == "renamed"
+
+    assert registry.remove_guild(1) is model
+    assert not registry.channels
+    assert registry.get_channel_guild_id(11) is None
+
+
+def test_sync_channels_reconciles_missed_events():
+    registry = EntityRegistry()
+    g1 = FakeGuild(1, "one", [10, 11])
+    registry.add_guild(g1)
+
+    # 10 was deleted and 12 created while disconnected; iterated only once, like get_all_channels()
+    channels = iter([FakeChannel(11, g1), FakeChannel(12, g1)])
+    assert registry.sync_channels(channels) == (1, 1)
+    assert sorted(registry.channels) == [11, 12]
+
+
+def test_models_are_slotted_and_small():
+    guild = CidderGuild(1, "one", [10])
+    with pytest.raises(AttributeError):
+        guild.extra = 1  # pylint: disable=assigning-non-slot
+    assert not hasattr(guild.get_channel(10), "__dict__")
+
+    registry = EntityRegistry()
+    empty = registry.get_memory_bytes()
+    for i in range(100):
+        registry.add_guild(FakeGuild(i, f"guild{i}", [1000 + 2 * i, 1001 + 2 * i]))
+
+    stats = registry.get_memory_stats()
+    assert stats["guilds"] == 100
+    assert stats["channels"] == 200
+    assert stats["bytes"] > empty
+    assert stats["bytes"] >= sum(sys.getsizeof(guild) for guild in registry.guilds.values())
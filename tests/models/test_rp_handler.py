@@ -0,0 +1,189 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cidderbot.calendars.custom import CustomCalendar
+from cidderbot.testing.factories import VirtualClock, make_rp
+from cidderbot.utils.time_formatters import TimeUnit
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(name="clock")
+def fixture_clock():
+    return VirtualClock(START)
+
+
+@pytest.fixture(name="rp")
+def fixture_rp(clock):
+    # 1 day of real time = 1 RP month of 30 days
+    return make_rp("Sagrea", clock=clock)
+
+
+def test_times_within_a_unit_are_cached(rp, clock):
+    clock.now = START + timedelta(hours=13)  # 16.25 RP days
+
+    assert rp.format_current_rp_time() == "17 January 1970"
+    assert rp.format_next_rp_time() == "18 January 1970"
+    misses = rp.cache_misses
+
+    # still within the same RP day
+    clock.now = START + timedelta(hours=13, minutes=30)
+    assert rp.format_current_rp_time() == "17 January 1970"
+    assert rp.get_next_rp_unit_time() == datetime(1970, 1, 18, tzinfo=timezone.utc)
+    assert rp.cache_misses == misses
+    assert rp.cache_hits > 0
+
+
+def test_cache_expires_at_next_unit(rp, clock):
+    clock.now = START + timedelta(hours=13)
+    next_unit = rp.next_unit_datetime
+    assert next_unit == START + timedelta(days=1) * 17 / 30
+
+    clock.now = next_unit
+    assert rp.format_current_rp_time() == "18 January 1970"
+    assert rp.get_time_to_next_rp_unit() == timedelta(days=1) / 30
+
+
+def test_next_unit_on_a_unit_boundary(rp, clock):
+    # exactly 17 RP days (of 48 minutes) in: the 18th has just begun, and the next unit is a whole unit away
+    clock.now = START + timedelta(minutes=48 * 17)
+    assert rp.get_current_rp_unit_time() == datetime(1970, 1, 18, tzinfo=timezone.utc)
+    assert rp.get_next_rp_unit_time() == datetime(1970, 1, 19, tzinfo=timezone.utc)
+    assert rp.next_unit_datetime == START + timedelta(minutes=48 * 18)
+
+    # and at the increment itself
+    clock.now = START
+    assert rp.next_unit_datetime == START + timedelta(minutes=48)
+
+
+def test_update_invalidates_cache(rp, clock):
+    clock.now = START + timedelta(days=1)
+    rp.format_current_rp_time()
+
+    rp.update()
+    assert rp.format_current_rp_time() == "01 February 1970"
+    assert rp.format_next_rp_incr_time() == "March 1970"
+
+
+def test_cache_stats(rp, clock):
+    rp.invalidate_cache()
+    rp.cache_hits = rp.cache_misses = 0
+
+    rp.get_current_rp_unit_time()
+    clock.now += timedelta(seconds=1)
+    rp.get_current_rp_unit_time()
+
+    assert rp.get_cache_stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_rp_time_at(rp):
+    assert rp.rp_time_at(START) == datetime(1970, 1, 1, tzinfo=timezone.utc)
+    assert rp.rp_time_at(START + timedelta(hours=13)) == datetime(1970, 1, 17, tzinfo=timezone.utc)
+
+    # increments are calendar months, not 30 days
+    assert rp.rp_time_at(START + timedelta(days=1)) == datetime(1970, 2, 1, tzinfo=timezone.utc)
+    assert rp.rp_time_at(START + timedelta(days=365)) == datetime(2000, 6, 1, tzinfo=timezone.utc)
+
+    # 29.5 units into February doesn't run into March
+    assert rp.rp_time_at(START + timedelta(days=1.99)) == datetime(1970, 2, 28, tzinfo=timezone.utc)
+
+    with pytest.raises(ValueError):
+        rp.rp_time_at(START - timedelta(seconds=1))
+
+
+def test_real_time_when(rp):
+    assert rp.real_time_when(datetime(1970, 1, 1, tzinfo=timezone.utc)) == START
+    assert rp.real_time_when(datetime(1970, 1, 16, tzinfo=timezone.utc)) == START + timedelta(hours=12)
+    assert rp.real_time_when(datetime(1970, 3, 1, tzinfo=timezone.utc)) == START + timedelta(days=2)
+    # 50 years ahead
+    assert rp.real_time_when(datetime(2020, 1, 1, tzinfo=timezone.utc)) == START + timedelta(days=600)
+
+    with pytest.raises(ValueError):
+        rp.real_time_when(datetime(1969, 12, 31, tzinfo=timezone.utc))
+
+
+def test_real_time_when_too_far_ahead(rp):
+    # monthly increments are simulated, and 3000 years of them are more than one lookup may do
+    with pytest.raises(ValueError):
+        rp.real_time_when(datetime(4970, 1, 1, tzinfo=timezone.utc))
+    with pytest.raises(ValueError):
+        rp.rp_time_at(START + timedelta(days=36500))
+    # past the datetime range
+    with pytest.raises(ValueError):
+        rp.rp_time_at(datetime.max.replace(tzinfo=timezone.utc))
+
+
+def test_fixed_length_increments_are_not_simulated(clock):
+    # 1 hour of real time = 1 RP day, in weekly increments
+    rp = make_rp("Weekly", rp_datetime_incr_unit=TimeUnit.WEEK, incr_interval=timedelta(hours=7), clock=clock)
+
+    target = datetime(4970, 1, 1, tzinfo=timezone.utc)
+    real_dt = rp.real_time_when(target)
+    assert rp.rp_time_at(real_dt) == target
+    assert real_dt == START + timedelta(hours=(target - rp.rp_datetime).days)
+    assert len(rp._get_boundary_index()) == 1  # pylint: disable=protected-access
+
+    clock.now = START + timedelta(hours=35)
+    rp.update()
+    assert rp.real_time_when(target) == real_dt
+    assert len(rp._get_boundary_index()) == 1  # pylint: disable=protected-access
+
+
+def test_mapping_round_trip_after_update(rp, clock):
+    target = datetime(1985, 7, 9, tzinfo=timezone.utc)
+    real_dt = rp.real_time_when(target)
+
+    clock.now = START + timedelta(days=1)
+    rp.update()
+
+    assert rp.real_time_when(target) == real_dt
+    assert rp.rp_time_at(real_dt) == target
+
+
+def test_mapping_follows_month_end_clamping(clock):
+    # Jan 31 + 1 month = Feb 28, and from then on the 28th, as each increment adds to the last
+    rp = make_rp("Month ends", rp_datetime=datetime(1970, 1, 31, tzinfo=timezone.utc), clock=clock)
+    predicted = [rp.rp_time_at(START + timedelta(days=k)) for k in range(15)]
+    assert predicted[2] == datetime(1970, 3, 28, tzinfo=timezone.utc)
+
+    for k in range(1, 15):
+        clock.now = START + timedelta(days=k)
+        rp.update()
+        assert rp.rp_datetime == predicted[k]
+        # the index built before the updates is still right about what comes next
+        assert rp.rp_time_at(clock.now + timedelta(days=1)) == rp.add_to_datetime(rp.rp_datetime, TimeUnit.MONTH, 1)
+
+    # 2 days into the increment that starts on April 28th, not 30 days into one starting on the 31st
+    assert rp.real_time_when(datetime(1971, 4, 30, tzinfo=timezone.utc)) == START + timedelta(days=15, hours=1.6)
+
+
+def test_add_to_datetime_months_and_years(rp):
+    jan_31 = datetime(1970, 1, 31, tzinfo=timezone.utc)
+    assert rp.add_to_datetime(jan_31, TimeUnit.MONTH, 1) == datetime(1970, 2, 28, tzinfo=timezone.utc)
+    assert rp.add_to_datetime(jan_31, TimeUnit.MONTH, 11) == datetime(1970, 12, 31, tzinfo=timezone.utc)
+    assert rp.add_to_datetime(jan_31, TimeUnit.MONTH, 13) == datetime(1971, 2, 28, tzinfo=timezone.utc)
+
+    leap_day = datetime(1972, 2, 29, tzinfo=timezone.utc)
+    assert rp.add_to_datetime(leap_day, TimeUnit.YEAR, 1) == datetime(1973, 2, 28, tzinfo=timezone.utc)
+
+
+def test_custom_calendar(clock):
+    # 10 months of 36 days, 1 day of real time = 1 RP month
+    calendar = CustomCalendar("decimal", [(f"Month{chr(65 + i)}", 36) for i in range(10)], leap_every=2)
+    rp = make_rp("Decimal", rp_datetime=calendar.date(1, 9, 36), clock=clock, calendar=calendar)
+    assert rp.num_units_in_incr == 36
+
+    clock.now = START + timedelta(hours=12)
+    assert rp.format_current_rp_time() == "18 MonthJ 1"  # clamped to 18 days into MonthJ
+    assert rp.format_next_rp_incr_time() == "MonthJ 1"
+
+    clock.now = START + timedelta(days=2)
+    rp.update()
+    rp.update()
+    assert rp.rp_datetime == calendar.date(2, 1, 36)
+    assert rp.format_current_rp_time() == "36 MonthA 2"
+
+    # year 2 is a leap year, with 37 days in MonthJ, reached 9 increments later
+    assert rp.real_time_when(calendar.date(2, 10, 37)) == START + timedelta(days=11) + timedelta(days=1) / 36
+    assert rp.rp_time_at(START + timedelta(days=11, hours=12)) == calendar.date(3, 1, 17)
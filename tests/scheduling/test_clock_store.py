@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from cidderbot.calendars.custom import CustomCalendar
+from cidderbot.models.rp_handler import RpHandler
+from cidderbot.scheduling.clock_store import RpClockStore, us_array_to_datetimes
+from cidderbot.testing import factories
+from cidderbot.utils.time_formatters import TimeUnit
+
+
+def make_rp(name, unit, incr_unit, rp_datetime, interval=timedelta(days=1), **kwargs) -> RpHandler:
+    return factories.make_rp(
+        name,
+        rp_datetime_unit=unit,
+        rp_datetime_incr_unit=incr_unit,
+        rp_datetime=rp_datetime,
+        # recent, so the handler doesn't advance itself on creation
+        last_datetime=datetime.now(timezone.utc) - timedelta(minutes=1),
+        incr_interval=interval,
+        **kwargs,
+    )
+
+
+def test_fixed_units():
+    rp = make_rp("a", TimeUnit.DAY, TimeUnit.MONTH, datetime(1970, 1, 1, tzinfo=timezone.utc))
+    store = RpClockStore()
+    store.add(rp)
+
+    # 13h into a 1 day increment of 30 days = 16.25 days
+    now = rp.prev_incr_datetime + timedelta(hours=13)
+
+    assert us_array_to_datetimes(store.current_unit_times(now)) == [
+        datetime(1970, 1, 17, tzinfo=timezone.utc)
+    ]
+    assert us_array_to_datetimes(store.next_unit_times(now)) == [
+        datetime(1970, 1, 18, tzinfo=timezone.utc)
+    ]
+    expected_next = rp.prev_incr_datetime + timedelta(days=1) * 17 / 30
+    (next_unit,) = us_array_to_datetimes(store.next_unit_datetimes(now))
+    assert abs(next_unit - expected_next) < timedelta(milliseconds=1)
+
+
+
+def test_next_unit_on_a_unit_boundary_matches_handler():
+    clock = factories.VirtualClock(datetime.now(timezone.utc))
+    rp = make_rp("a", TimeUnit.DAY, TimeUnit.MONTH, datetime(1970, 1, 1, tzinfo=timezone.utc), clock=clock)
+    store = RpClockStore()
+    store.add(rp)
+
+    # exactly 17 RP days (of 48 minutes) into the increment
+    clock.now = rp.prev_incr_datetime + timedelta(minutes=48 * 17)
+
+    assert us_array_to_datetimes(store.next_unit_times(clock.now)) == [rp.get_next_rp_unit_time()]
+    assert us_array_to_datetimes(store.next_unit_datetimes(clock.now)) == [rp.next_unit_datetime]
+    assert rp.next_unit_datetime == clock.now + timedelta(minutes=48)
+
+
+def test_calendar_units_clamp_day_of_month():
+    rp = make_rp("a", TimeUnit.MONTH, TimeUnit.YEAR, datetime(1970, 1, 31, 6, tzinfo=timezone.utc))
+    store = RpClockStore()
+    store.add(rp)
+
+    # 0.1 of a year of 12 months = 1.2 months
+    now = rp.prev_incr_datetime + timedelta(days=1) / 10
+
+    assert us_array_to_datetimes(store.current_unit_times(now)) == [
+        datetime(1970, 2, 28, 6, tzinfo=timezone.utc)
+    ]
+    assert us_array_to_datetimes(store.next_unit_times(now)) == [
+        datetime(1970, 3, 31, 6, tzinfo=timezone.utc)
+    ]
+
+
+def test_matches_handlers_across_many_rps():
+    start = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    rps = [
+        make_rp(f"rp{i}", TimeUnit.HOUR, TimeUnit.DAY, start + timedelta(days=i), timedelta(minutes=10 + i))
+        for i in range(200)
+    ]
+    store = RpClockStore(capacity=8)
+    for rp in rps:
+        store.add(rp)
+    assert len(store) == 200
+
+    now = datetime.now(timezone.utc) + timedelta(minutes=3)
+    current = store.current_unit_times(now)
+
+    for rp, value in zip(store.handlers, us_array_to_datetimes(current)):
+        elapsed = (now - rp.prev_incr_datetime) / rp.incr_interval
+        assert value == start + timedelta(days=int(rp.name[2:]), hours=int(elapsed * 24))
+
+
+def test_remove_and_due():
+    start = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    a = make_rp("a", TimeUnit.DAY, TimeUnit.DAY, start, timedelta(hours=1))
+    b = make_rp("b", TimeUnit.DAY, TimeUnit.DAY, start, timedelta(hours=2))
+    c = make_rp("c", TimeUnit.DAY, TimeUnit.DAY, start, timedelta(hours=3))
+    store = RpClockStore()
+    for rp in (a, b, c):
+        store.add(rp)
+
+    now = datetime.now(timezone.utc) + timedelta(minutes=90)
+    assert store.due(now) == [a]
+
+    assert store.remove(a)
+    assert not store.remove(a)
+    assert store.handlers == [c, b]
+    assert not store.due(now)
+    assert np.all(store.next_incr_datetimes() > np.datetime64(now.replace(tzinfo=None)))
+
+
+def test_custom_calendars_match_handlers():
+    short = CustomCalendar("short", [("Frost", 20), ("Thaw", 45), ("Ember", 31)], leap_every=3, leap_month=0)
+    long = CustomCalendar("long", [(f"Moon {chr(65 + i)}", 28) for i in range(13)])
+    rps = [
+        make_rp(
+            f"rp{i}",
+            (TimeUnit.MONTH, TimeUnit.YEAR, TimeUnit.WEEK)[i % 3],
+            TimeUnit.YEAR,
+            calendar.date(1 + i, 1 + i % 3, 20),
+            timedelta(minutes=5 + i),
+            calendar=calendar,
+        )
+        for i, calendar in enumerate([short, long] * 10)
+    ]
+    rps.append(make_rp("gregorian", TimeUnit.MONTH, TimeUnit.YEAR, datetime(1970, 1, 31, tzinfo=timezone.utc)))
+    store = RpClockStore()
+    for rp in rps:
+        store.add(rp)
+
+    now = datetime.now(timezone.utc) + timedelta(hours=3)
+    current = us_array_to_datetimes(store.current_unit_times(now))
+    upcoming = us_array_to_datetimes(store.next_unit_times(now))
+    for rp, value, next_value in zip(store.handlers, current, upcoming):
+        rp._clock = lambda: now  # pylint: disable=protected-access,cell-var-from-loop
+        assert value == rp.get_current_rp_unit_time()
+        assert next_value == rp.get_next_rp_unit_time()
@@ -0,0 +1,155 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from cidderbot.scheduling.scheduler import RpScheduler
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeRp:
+    """Minimal stand-in for RpHandler, with only what the scheduler needs."""
+
+    def __init__(self, name: str, next_incr: datetime, interval: timedelta) -> None:
+        self.name = name
+        self.next_incr_datetime = next_incr
+        self.incr_interval = interval
+        self.updates = 0
+
+    def update(self) -> None:
+        self.updates += 1
+        self.next_incr_datetime += self.incr_interval
+
+    def __repr__(self) -> str:
+        return f"<FakeRp: {self.name}>"
+
+
+def make_scheduler():
+    batches = []
+
+    async def on_due(rps):
+        batches.append([rp.name for rp in rps])
+        for rp in rps:
+            rp.update()
+
+    return RpScheduler(on_due), batches
+
+
+def test_fires_due_rps_in_one_batch():
+    scheduler, batches = make_scheduler()
+    a = FakeRp("a", START + timedelta(seconds=10), timedelta(seconds=10))
+    b = FakeRp("b", START + timedelta(seconds=10), timedelta(seconds=30))
+    c = FakeRp("c", START + timedelta(seconds=20), timedelta(seconds=10))
+    for rp in (a, b, c):
+        scheduler.add(rp)
+
+    assert scheduler.next_deadline == START + timedelta(seconds=10)
+
+    fired = asyncio.run(scheduler.run_pending(START + timedelta(seconds=10)))
+    assert sorted(rp.name for rp in fired) == ["a", "b"]
+    assert batches == [["a", "b"]]
+
+    # rescheduled at the new absolute deadlines
+    assert scheduler.get_deadline(a) == START + timedelta(seconds=20)
+    assert scheduler.get_deadline(b) == START + timedelta(seconds=40)
+
+    fired = asyncio.run(scheduler.run_pending(START + timedelta(seconds=20)))
+    assert sorted(rp.name for rp in fired) == ["a", "c"]
+
+
+def test_nothing_fires_before_deadline():
+    scheduler, batches = make_scheduler()
+    scheduler.add(FakeRp("a", START + timedelta(seconds=10), timedelta(seconds=10)))
+
+    assert not asyncio.run(scheduler.run_pending(START + timedelta(seconds=9)))
+    assert not batches
+
+
+def test_remove_and_reschedule():
+    scheduler, _ = make_scheduler()
+    a = FakeRp("a", START + timedelta(seconds=10), timedelta(seconds=10))
+    b = FakeRp("b", START + timedelta(seconds=20), timedelta(seconds=10))
+    scheduler.add(a)
+    scheduler.add(b)
+
+    assert scheduler.remove(a)
+    assert not scheduler.remove(a)
+    assert a not in scheduler
+    assert len(scheduler) == 1
+    assert scheduler.next_deadline == START + timedelta(seconds=20)
+
+    scheduler.reschedule(b, START + timedelta(seconds=5))
+    assert len(scheduler) == 1
+    assert scheduler.next_deadline == START + timedelta(seconds=5)
+
+    fired = asyncio.run(scheduler.run_pending(START + timedelta(seconds=5)))
+    assert fired == [b]
+    assert b.updates == 1
+
+
+def test_records_lateness():
+    scheduler, _ = make_scheduler()
+    a = FakeRp("a", START + timedelta(seconds=10), timedelta(seconds=10))
+    scheduler.add(a)
+
+    asyncio.run(scheduler.run_pending(START + timedelta(seconds=12)))
+
+    stats = scheduler.get_lateness_stats()
+    assert stats["fired"] == 1
+    assert stats["last"] == 2.0
+    assert stats["max"] == 2.0
+    assert scheduler.lateness_by_rp["a"] == timedelta(seconds=2)
+
+
+def test_rp_not_advanced_is_not_refired():
+    due = []
+
+    async def on_due(rps):
+        due.append(list(rps))  # but doesn't advance them, e.g. the channel could not be retrieved
+
+    scheduler = RpScheduler(on_due)
+    a = FakeRp("a", START + timedelta(seconds=10), timedelta(seconds=10))
+    scheduler.add(a)
+
+    asyncio.run(scheduler.run_pending(START + timedelta(seconds=10)))
+    asyncio.run(scheduler.run_pending(START + timedelta(seconds=15)))
+    assert due == [[a]]
+    assert scheduler.get_deadline(a) == START + timedelta(seconds=20)
+
+
+def test_run_wakes_for_earliest_deadline():
+    async def scenario():
+        batches = []
+
+        async def on_due(rps):
+            batches.append([rp.name for rp in rps])
+            for rp in rps:
+                rp.update()
+            scheduler.stop()
+
+        scheduler = RpScheduler(on_due)
+        now = datetime.now(timezone.utc)
+        scheduler.add(FakeRp("late", now + timedelta(hours=1), timedelta(hours=1)))
+        task = asyncio.create_task(scheduler.run())
+
+        await asyncio.sleep(0.01)
+        # added at runtime with an earlier deadline
+        scheduler.add(FakeRp("soon", now + timedelta(milliseconds=50), timedelta(hours=1)))
+
+        await asyncio.wait_for(task, 2)
+        return batches
+
+    assert asyncio.run(scenario()) == [["soon"]]
+
+
+def test_rp_removed_while_firing_is_not_rescheduled():
+    async def on_due(rps):
+        for rp in rps:
+            scheduler.remove(rp)
+
+    scheduler = RpScheduler(on_due)
+    a = FakeRp("a", START + timedelta(seconds=10), timedelta(seconds=10))
+    scheduler.add(a)
+
+    asyncio.run(scheduler.run_pending(START + timedelta(seconds=10)))
+    assert a not in scheduler
+    assert scheduler.next_deadline is None
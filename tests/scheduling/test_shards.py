@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+from cidderbot.scheduling.shards import ShardPartition, shard_id_for_guild
+from cidderbot.testing.factories import make_rp
+
+
+async def on_due(_rps):
+    pass
+
+
+def test_shard_id_for_guild():
+    # the shard is in the bits above the 22 bit worker/sequence part of the snowflake
+    assert shard_id_for_guild(0, 4) == 0
+    assert shard_id_for_guild(5 << 22, 4) == 1
+    assert shard_id_for_guild((5 << 22) | 0x3FFFFF, 4) == 1
+    assert shard_id_for_guild(81384788765712384, 1) == 0
+    assert shard_id_for_guild(81384788765712384, 16) == (81384788765712384 >> 22) % 16
+
+
+def test_partition_owns_and_indexes_rps():
+    shard = ShardPartition(1, on_due, lambda: datetime.now(timezone.utc))
+    a, b = make_rp("A"), make_rp("B")
+
+    shard.own(a)
+    shard.own(a)
+    assert shard.rps == [a]
+    assert len(shard.scheduler) == 1
+
+    # indexed RPs don't have to be owned
+    shard.index(10, a)
+    shard.index(10, b)
+    assert shard.get_rps_for_guild(10) == [a, b]
+    shard.unindex(10, a)
+    shard.unindex(10, b)
+    assert not shard.rps_by_guild
+
+    assert shard.disown(a)
+    assert not shard.disown(a)
+    assert len(shard.scheduler) == 0
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+
+from cidderbot.scheduling.task_registry import TaskRegistry
+
+
+def test_only_one_task_per_name():
+    started = []
+
+    async def forever(label):
+        started.append(label)
+        await asyncio.Event().wait()
+
+    async def scenario():
+        registry = TaskRegistry()
+        first = registry.start("timer", forever("first"))
+        second = registry.start("timer", forever("second"))
+        await asyncio.sleep(0)
+
+        assert second is first
+        assert registry.names() == ["timer"]
+        assert "timer" in registry
+
+        assert await registry.cancel("timer")
+        assert not await registry.cancel("timer")
+        assert len(registry) == 0
+        return registry
+
+    registry = asyncio.run(scenario())
+
+    # the duplicate coroutine was closed without running
+    assert started == ["first"]
+    assert registry.started_count == 1
+    assert registry.duplicate_count == 1
+
+
+def test_finished_tasks_are_removed_and_failures_logged(caplog):
+    async def fail():
+        raise RuntimeError("boom")
+
+    async def scenario():
+        registry = TaskRegistry()
+        registry.start("done", asyncio.sleep(0))
+        registry.start("failing", fail())
+        await asyncio.sleep(0.01)
+        assert len(registry) == 0
+
+        # can be started again once finished
+        registry.start("done", asyncio.sleep(0))
+        assert registry.is_running("done")
+        await registry.cancel_all()
+
+    with caplog.at_level(logging.ERROR):
+        asyncio.run(scenario())
+
+    assert "Task failing failed: boom" in caplog.text
@@ -0,0 +1,310 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from cidderbot.calendars.registry import CALENDARS
+from cidderbot.cidder import Cidder
+from cidderbot.testing.factories import StubGuild, make_rp
+
+
+@pytest.fixture(name="cidder")
+def fixture_cidder():
+    cidder = Cidder()
+    cidder._initialized = True  # pylint: disable=protected-access
+    return cidder
+
+
+def test_get_rps_for_guild(cidder):
+    g1, g2, g3 = StubGuild(1), StubGuild(2), StubGuild(3)
+    a = make_rp("A", [g1, g2])
+    b = make_rp("B", [g2])
+    cidder.register_rp(a)
+    cidder.register_rp(b)
+
+    assert cidder.get_rps_for_guild(g1) == [a]
+    assert cidder.get_rps_for_guild(g2) == [a, b]
+    assert not cidder.get_rps_for_guild(g3)
+
+
+def test_get_rp_for_guild_with_multiple_rps(cidder):
+    g1 = StubGuild(1)
+    a = make_rp("Alpha", [g1])
+    b = make_rp("Beta", [g1])
+    cidder.register_rp(a)
+
+    assert cidder.get_rp_for_guild(g1) is a
+
+    cidder.register_rp(b)
+    assert cidder.get_rp_for_guild(g1) is None
+    assert cidder.get_rp_for_guild(g1, "beta") is b
+    assert cidder.get_rp_for_guild(g1, "gamma") is None
+
+
+def test_index_follows_rp_and_guild_changes(cidder):
+    g1, g2 = StubGuild(1), StubGuild(2)
+    a = make_rp("A", [g1])
+    cidder.register_rp(a)
+
+    cidder.add_guild_to_rp(a, g2)
+    assert cidder.get_rps_for_guild(g2) == [a]
+
+    cidder.remove_guild(g1)
+    assert not cidder.get_rps_for_guild(g1)
+    assert [g.id for g in a.guilds] == [2]
+
+    assert cidder.remove_rp(a)
+    assert not cidder.get_rps_for_guild(g2)
+    assert not cidder.remove_rp(a)
+
+
+def test_resync_reconciles_guilds(cidder):
+    g1, g2, g3 = StubGuild(1), StubGuild(2), StubGuild(3)
+    cidder.add_guild(g1)
+    cidder.add_guild(g2)
+    a = make_rp("A", cidder.guilds)
+    cidder.register_rp(a)
+    registry_g1 = cidder.entities.get_guild(1)
+
+    # after a full reconnect, the bot has new objects for the same guilds
+    new_g1 = StubGuild(1)
+    assert cidder.resync([new_g1, g3], [], []) == {"joined": 1, "left": 1, "moved": 0}
+
+    # the registry (and RPs) keep their own guilds, which don't need replacing
+    assert [guild.id for guild in cidder.guilds] == [1, 3]
+    assert cidder.entities.get_guild(1) is registry_g1
+    assert a.guilds == [registry_g1]
+    assert cidder.get_rps_for_guild(g1) == [a]
+    assert not cidder.get_rps_for_guild(g2)
+
+
+def test_initialize_twice_only_resyncs(cidder):
+    a = make_rp("A", [StubGuild(1)])
+    cidder.register_rp(a)
+
+    asyncio.run(cidder.initialize([StubGuild(1)], [], []))
+    assert cidder.rps == [a]
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild: StubGuild) -> None:
+        self.id = channel_id
+        self.guild = guild
+
+
+def test_rps_are_owned_by_the_shard_of_their_update_channel():
+    cidder = Cidder(shard_count=2)
+    cidder._initialized = True  # pylint: disable=protected-access
+    g0, g1 = StubGuild(2 << 22), StubGuild(3 << 22)
+    a = make_rp("A", [g0])
+    b = make_rp("B", [g0, g1])
+    b.channel_id = 100
+    cidder.register_rp(a)
+    cidder.register_rp(b)
+
+    # channel unknown so far, so B goes with its first guild
+    assert cidder.get_owner_shard(a) is cidder.shards[0]
+    assert cidder.get_owner_shard(b) is cidder.shards[0]
+
+    assert cidder.resync([g0, g1], [FakeChannel(100, g1)], [])["moved"] == 1
+    assert cidder.get_owner_shard(b) is cidder.shards[1]
+    assert cidder.shards[0].rps == [a]
+    assert len(cidder.shards[1].scheduler) == 1
+
+    # each shard indexes its own guilds
+    assert cidder.get_rps_for_guild(g0) == [a, b]
+    assert cidder.get_rps_for_guild(g1) == [b]
+    assert list(cidder.shards[1].rps_by_guild) == [g1.id]
+    assert cidder.get_shard_stats() == {
+        0: {"guilds": 1, "rps": 1, "scheduled": 1},
+        1: {"guilds": 1, "rps": 1, "scheduled": 1},
+    }
+
+
+class FakeWorkerLeases:
+    def __init__(self, claimable) -> None:
+        self.claimable = claimable
+
+    async def claim(self, rps):
+        return [rp for rp in rps if rp in self.claimable]
+
+
+class FakeStateWriter:
+    def __init__(self) -> None:
+        self.dirty = []
+
+    def mark_dirty(self, rp) -> None:
+        self.dirty.append(rp)
+
+
+def test_worker_only_updates_claimed_rps(cidder):
+    g1 = StubGuild(1)
+    a, b = make_rp("A", [g1]), make_rp("B", [g1])
+    cidder.register_rp(a)
+    cidder.register_rp(b)
+    cidder.worker_leases = FakeWorkerLeases([a])
+    cidder.rp_state_writer = FakeStateWriter()
+
+    updated = []
+
+    async def handler(rps):
+        updated.extend(rps)
+        for rp in rps:
+            rp.update()
+        cidder.notify_rps_updated(rps)
+
+    cidder.set_update_handler(handler)
+    b_next = b.next_incr_datetime
+
+    asyncio.run(cidder._on_rps_due([a, b]))  # pylint: disable=protected-access
+
+    assert updated == [a]
+    # another worker announces B, but its date still moves on here. Only A is saved.
+    assert b.next_incr_datetime == b_next + b.incr_interval
+    assert cidder.rp_state_writer.dirty == [a]
+
+
+def test_late_claims_are_announced_without_advancing(cidder):
+    a, b = make_rp("A", [StubGuild(1)]), make_rp("B", [StubGuild(1)])
+    calls = []
+
+    async def handler(rps, advance=True):
+        calls.append((rps, advance))
+
+    async def scenario():
+        # from the lease heartbeat, before the cog is loaded
+        cidder._on_late_claims([a])  # pylint: disable=protected-access
+        cidder._on_late_claims([b])  # pylint: disable=protected-access
+        await asyncio.sleep(0)
+        assert not calls
+
+        cidder.set_update_handler(handler)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert calls == [([a, b], False)]
+
+
+def test_env_rp_in_a_custom_calendar(cidder, monkeypatch, tmp_path):
+    path = tmp_path / "calendars.json"
+    path.write_text('[{"name": "test-seasons", "months": [["Spring", 90], ["Summer", 90], ["Autumn", 90]]}]')
+    for key, value in {
+        "CALENDARS_FILE": str(path),
+        "RP_CALENDAR": "test-seasons",
+        "RP_NAME": "Seasons",
+        "RP_DT_UNIT": "DAY",
+        "RP_DT_INCR_UNIT": "MONTH",
+        "RP_DT_ISOSTRING": "1200-03-90",
+        "RP_DT_INCR_AMT": "1",
+        "PREV_INCR_DT_ISOSTRING": datetime.now(timezone.utc).replace(tzinfo=None).isoformat(),
+        "INCR_INTERVAL_SECONDS": "86400",
+        "CHANNEL_ID": "42",
+    }.items():
+        monkeypatch.setenv(key, value)
+
+    try:
+        (rp,) = asyncio.run(cidder._load_rps())  # pylint: disable=protected-access
+        assert rp.calendar.name == "test-seasons"
+        assert rp.format_current_rp_time() == "90 Autumn 1200"
+        assert rp.format_next_rp_incr_time() == "Spring 1201"
+    finally:
+        CALENDARS.pop("test-seasons", None)
+
+
+class SlowDatabase:
+    """Configured, but doesn't answer until `reachable` is set, and then can't be connected to."""
+
+    def __init__(self) -> None:
+        self.reachable = asyncio.Event()
+
+    @staticmethod
+    def is_configured() -> bool:
+        return True
+
+    async def open(self) -> bool:
+        await self.reachable.wait()
+        return False
+
+    async def close(self) -> None:
+        pass
+
+
+def test_initialize_does_not_wait_for_the_database():
+    database = SlowDatabase()
+    cidder = Cidder(database=database)
+    rp = make_rp("A", [StubGuild(1)])
+
+    async def load_rps():
+        return [rp]
+
+    cidder._load_rps = load_rps  # pylint: disable=protected-access
+
+    async def scenario():
+        await asyncio.wait_for(cidder.initialize([StubGuild(1)], [], []), 1)
+        assert cidder.is_initialized
+        assert not cidder.rps
+
+        # once the database gives up, the RPs are loaded without it
+        database.reachable.set()
+        await asyncio.sleep(0.01)
+        assert cidder.rps == [rp]
+        assert cidder.rp_repository is None
+        await cidder.shutdown()
+
+    asyncio.run(scenario())
+
+
+class FakePrefixRepository:
+    def __init__(self, on_save=None) -> None:
+        self.rows = {3: "?"}
+        self.on_save = on_save
+
+    async def load_all(self):
+        return dict(self.rows)
+
+    async def save(self, guild_id, prefix):
+        self.rows[guild_id] = prefix
+        if self.on_save:
+            await self.on_save()
+
+    async def delete(self, guild_id):
+        self.rows.pop(guild_id, None)
+
+
+def test_prefixes_changed_while_connecting_are_saved_once_open():
+    database = SlowDatabase()
+    cidder = Cidder(database=database)
+
+    async def load_rps():
+        return []
+
+    cidder._load_rps = load_rps  # pylint: disable=protected-access
+
+    async def scenario():
+        await cidder.initialize([StubGuild(1)], [], [])
+        assert cidder.is_database_connecting
+        assert not await cidder.set_guild_prefix(1, "!")
+        assert not await cidder.set_guild_prefix(3, None)
+
+        # as in open_database(), with guild 2 changing its prefix while the others are saved
+        repository = FakePrefixRepository(on_save=lambda: cidder.set_guild_prefix(2, "$"))
+        cidder.prefixes.load(await repository.load_all())
+        assert cidder.prefixes.get(1) == "!"
+        assert cidder.prefixes.get(3) == cidder.prefixes.default_prefix
+        await cidder._save_unsaved_prefixes(repository)  # pylint: disable=protected-access
+        assert repository.rows == {1: "!", 2: "$"}
+        assert not cidder.prefixes.get_unsaved()
+
+        database.reachable.set()
+        await asyncio.sleep(0.01)
+        assert not cidder.is_database_connecting
+        await cidder.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_prefixes_without_a_database_are_not_saved(cidder):
+    assert not asyncio.run(cidder.set_guild_prefix(1, "!"))
+    assert not cidder.is_database_connecting
+    assert cidder.prefixes.get(1) == "!"
+    assert cidder.prefixes.get_unsaved() == {1: "!"}
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import timedelta
+
+from cidderbot.testing.fake_discord import FakeDiscordHarness, FakeMessage
+
+
+def test_commands_are_answered_end_to_end():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=10, guild_count=5) as harness:
+            stats = await harness.run_commands(harness.make_commands(50), concurrency=4)
+
+            channel = harness.guilds[0].channels[1]
+            await harness.bot.on_message(FakeMessage("rp!date rp0", harness.player, channel))
+            return harness, stats, channel.sent[-1]
+
+    harness, stats, reply = asyncio.run(scenario())
+
+    assert len(harness.cidder.rps) == 10
+    assert stats["messages"] == 50
+    assert stats["replies"] == 50
+    assert stats["p50_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert "1970" in reply
+
+
+def test_advance_fires_increments_and_sends_updates():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=10, guild_count=5) as harness:
+            dates_before = [rp.rp_datetime for rp in harness.cidder.rps]
+            stats = await harness.advance(timedelta(days=1))
+            return harness, dates_before, stats
+
+    harness, dates_before, stats = asyncio.run(scenario())
+
+    # every RP increments at least once a day
+    assert stats["increments"] >= 10
+    # updates for RPs sharing a channel may be coalesced
+    assert 0 < stats["update_messages"] <= stats["increments"]
+    assert all(rp.rp_datetime > before for rp, before in zip(harness.cidder.rps, dates_before))
+    assert harness.clock.now == FakeDiscordHarness.START + timedelta(days=1)
+
+
+def test_sharded_bot():
+    async def scenario():
+        async with FakeDiscordHarness(rp_count=20, guild_count=8, shard_count=4) as harness:
+            stats = await harness.advance(timedelta(days=1))
+
+            channel = harness.guilds[0].channels[1]
+            await harness.bot.on_message(FakeMessage("rp!shards", harness.owner, channel))
+            return harness, stats, channel.sent[-1]
+
+    harness, stats, report = asyncio.run(scenario())
+
+    # every shard owns some RPs and fired them
+    assert all(len(shard.rps) == 5 for shard in harness.cidder.shards.values())
+    assert all(scheduler.fired_count > 0 for scheduler in harness.cidder.schedulers)
+    assert stats["increments"] >= 20
+    assert report.count("50ms") == 4
@@ -0,0 +1,98 @@
+import logging
+import threading
+
+from cidderbot.utils.logging_utils.async_logging import AsyncLogPipeline, OverflowPolicy
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET, gate: threading.Event = None) -> None:
+        super().__init__(level)
+        self.messages = []
+        self.threads = set()
+        self.gate = gate
+
+    def emit(self, record):
+        if self.gate:
+            self.gate.wait()
+        self.threads.add(threading.current_thread())
+        self.messages.append(record.getMessage())
+
+
+def make_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_routes_records_on_background_thread():
+    pipeline = AsyncLogPipeline()
+    everything = ListHandler()
+    warnings = ListHandler(logging.WARNING)
+    other = ListHandler()
+    logger = make_logger("test_async_routes", pipeline.add_route("main", [everything, warnings]))
+    pipeline.add_route("other", [other])
+    pipeline.start()
+
+    logger.info("hello %s", "world")
+    logger.warning("careful")
+    pipeline.stop()
+
+    assert everything.messages == ["hello world", "careful"]
+    assert warnings.messages == ["careful"]
+    assert not other.messages
+    assert threading.current_thread() not in everything.threads
+    assert pipeline.get_stats()["enqueued"] == 2
+
+
+def test_message_args_are_merged_when_logged():
+    pipeline = AsyncLogPipeline()
+    handler = ListHandler()
+    logger = make_logger("test_async_args", pipeline.add_route("main", [handler]))
+    pipeline.start()
+
+    args = ["before"]
+    logger.info("value: %s", args)
+    args[0] = "after"
+    pipeline.stop()
+
+    assert handler.messages == ["value: ['before']"]
+
+
+def test_drop_newest_when_full_and_flush_on_stop():
+    gate = threading.Event()
+    pipeline = AsyncLogPipeline(queue_size=5, overflow_policy=OverflowPolicy.DROP_NEWEST)
+    handler = ListHandler(gate=gate)
+    logger = make_logger("test_async_drop", pipeline.add_route("main", [handler]))
+    pipeline.start()
+
+    # the first record is taken by the (blocked) listener, the next 5 fill the queue
+    for i in range(20):
+        logger.info("%s", i)
+
+    gate.set()
+    pipeline.stop()
+
+    stats = pipeline.get_stats()
+    assert stats["dropped"] > 0
+    assert stats["enqueued"] + stats["dropped"] == 20
+    assert len(handler.messages) == stats["enqueued"]
+    assert handler.messages[:5] == ["0", "1", "2", "3", "4"]
+
+
+def test_drop_oldest_keeps_newest_records():
+    gate = threading.Event()
+    pipeline = AsyncLogPipeline(queue_size=5, overflow_policy=OverflowPolicy.DROP_OLDEST)
+    handler = ListHandler(gate=gate)
+    logger = make_logger("test_async_drop_oldest", pipeline.add_route("main", [handler]))
+    pipeline.start()
+
+    for i in range(20):
+        logger.info("%s", i)
+
+    gate.set()
+    pipeline.stop()
+
+    assert handler.messages[-5:] == ["15", "16", "17", "18", "19"]
+    assert pipeline.dropped > 0
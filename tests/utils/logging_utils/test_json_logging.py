@@ -0,0 +1,35 @@
+import json
+import logging
+
+from cidderbot.testing.factories import raised
+from cidderbot.utils.logging_utils.json_logging import JsonLinesFormatter
+
+
+def make_record(level=logging.INFO, exc_info=None, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("root", level, __file__, 1, "%s updated", ("RP",), exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_context_fields_are_included():
+    line = JsonLinesFormatter().format(
+        make_record(rp="Sagrea", guild=123, duration_ms=1.5)
+    )
+    entry = json.loads(line)
+
+    assert "\n" not in line
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "RP updated"
+    assert entry["rp"] == "Sagrea"
+    assert entry["guild"] == 123
+    assert entry["duration_ms"] == 1.5
+    assert "command" not in entry
+
+
+def test_exception_is_kept_on_one_line():
+    record = make_record(logging.ERROR, raised(ValueError("boom")))
+
+    line = JsonLinesFormatter().format(record)
+
+    assert "\n" not in line
+    assert json.loads(line)["exc"].endswith("ValueError: boom")
@@ -0,0 +1,53 @@
+import logging
+
+from cidderbot.testing.factories import raised
+from cidderbot.utils.logging_utils.log_config import (
+    ColoredFormatter,
+    RenderedFormatter,
+    get_log_level_colors,
+)
+from cidderbot.utils.string_utils.colors import Colors, colorize_string
+
+FORMAT = "[%(asctime)s %(levelname)s] %(message)s"
+
+
+class CountingRecord(logging.LogRecord):
+    message_builds = 0
+
+    def getMessage(self):
+        CountingRecord.message_builds += 1
+        return super().getMessage()
+
+
+def make_record(level=logging.WARNING, exc_info=None) -> logging.LogRecord:
+    return CountingRecord("root", level, __file__, 1, "%s is %s", ("RP", "late"), exc_info)
+
+
+def test_plain_and_colored_share_one_render():
+    record = make_record()
+    CountingRecord.message_builds = 0
+
+    plain = RenderedFormatter(fmt=FORMAT).format(record)
+    colored = ColoredFormatter(fmt=FORMAT).format(record)
+    short = ColoredFormatter(fmt=FORMAT, datefmt="%H:%M:%S").format(record)
+
+    assert CountingRecord.message_builds == 1
+    assert plain.endswith("WARNING] RP is late")
+    assert colored == colorize_string(plain, get_log_level_colors()[logging.WARNING])
+    assert short.endswith("WARNING] RP is late" + Colors.RESET)
+
+
+def test_exception_text_follows_colored_line():
+    record = make_record(logging.ERROR, raised(ValueError("boom")))
+
+    plain = RenderedFormatter(fmt=FORMAT).format(record)
+    colored = ColoredFormatter(fmt=FORMAT).format(record)
+
+    line, traceback_text = plain.split("\n", 1)
+    assert traceback_text.endswith("ValueError: boom")
+    assert colored == colorize_string(line, get_log_level_colors()[logging.ERROR]) + "\n" + traceback_text
+
+
+def test_default_format():
+    formatter = ColoredFormatter()
+    assert formatter.format(make_record(logging.INFO)).endswith("INFO]: RP is late" + Colors.RESET)
@@ -0,0 +1,84 @@
+import json
+import os
+
+from cidderbot.utils.logging_utils.log_query import (
+    LogIndex,
+    level_mask_at_least,
+    open_index,
+    parse_since,
+)
+
+
+def write_entries(path, entries):
+    with open(path, "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def make_entries(start, count, rp="A", level="INFO"):
+    return [
+        {"ts": float(start + i), "level": level, "message": str(start + i), "rp": rp}
+        for i in range(count)
+    ]
+
+
+def test_level_mask():
+    assert level_mask_at_least("warning") == 4 | 8 | 16
+    assert level_mask_at_least("DEBUG") == 31
+
+
+def test_parse_since():
+    assert parse_since("1h", now=10000.0) == 6400.0
+    assert parse_since("90s", now=100.0) == 10.0
+
+
+def test_query_skips_blocks(tmp_path):
+    path = str(tmp_path / "cidder.jsonl")
+    write_entries(path, make_entries(0, 10, rp="A"))
+    write_entries(path, make_entries(10, 10, rp="B"))
+    write_entries(path, make_entries(20, 10, rp="A", level="WARNING"))
+
+    index = LogIndex(path, block_records=10)
+    assert index.update() == 3
+
+    mask = level_mask_at_least("WARNING")
+    assert len(list(index.candidate_blocks(level_mask=mask))) == 1
+    assert len(list(index.candidate_blocks(rp="B"))) == 1
+    assert len(list(index.candidate_blocks(since=15.0))) == 2
+
+    results = list(index.query(since=25.0, level="WARNING", rp="A"))
+    assert [entry["message"] for entry in results] == ["25", "26", "27", "28", "29"]
+    assert not list(index.query(rp="B", level="WARNING"))
+
+
+def test_index_is_updated_incrementally_and_rebuilt_after_rotation(tmp_path):
+    path = str(tmp_path / "cidder.jsonl")
+    write_entries(path, make_entries(0, 5))
+    index = open_index(path)
+    assert len(index.blocks) == 1
+    assert os.path.exists(path + ".idx")
+
+    # only the new lines are indexed
+    write_entries(path, make_entries(5, 5, rp="B"))
+    index = open_index(path)
+    assert len(index.blocks) == 2
+    assert [e["message"] for e in index.query(rp="B")] == ["5", "6", "7", "8", "9"]
+
+    # rotated: new, smaller file
+    os.remove(path)
+    write_entries(path, make_entries(100, 2, rp="C"))
+    index = open_index(path)
+    assert len(index.blocks) == 1
+    assert [e["message"] for e in index.query()] == ["100", "101"]
+
+
+def test_partial_last_line_is_not_indexed(tmp_path):
+    path = str(tmp_path / "cidder.jsonl")
+    write_entries(path, make_entries(0, 2))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"ts": 2.0, "lev')
+
+    index = LogIndex(path)
+    index.update()
+
+    assert [e["message"] for e in index.query()] == ["0", "1"]
@@ -0,0 +1,30 @@
+from cidderbot.utils.memory import deep_sizeof, format_bytes
+
+
+class Slotted:
+    __slots__ = ("items", "_state")
+
+    def __init__(self, items, state) -> None:
+        self.items = items
+        self._state = state
+
+
+def test_deep_sizeof_follows_references_once():
+    shared = list(range(1000))
+    one = deep_sizeof(Slotted(shared, None))
+    both = deep_sizeof([Slotted(shared, None), Slotted(shared, None)])
+
+    assert one > deep_sizeof([])
+    # the shared list is only counted once
+    assert both < 2 * one
+
+
+def test_deep_sizeof_skips_state():
+    big_state = list(range(10000))
+    assert deep_sizeof(Slotted([], big_state)) < deep_sizeof(big_state)
+
+
+def test_format_bytes():
+    assert format_bytes(512) == "512B"
+    assert format_bytes(2048) == "2.0KiB"
+    assert format_bytes(3 * 1024 * 1024) == "3.0MiB"
@@ -0,0 +1,48 @@
+from cidderbot.metrics.registry import MetricsRegistry
+from cidderbot.testing.factories import VirtualClock
+from cidderbot.utils.startup_timeline import StartupTimeline
+
+
+def test_phases_are_consecutive():
+    clock = VirtualClock(10.0)
+    timeline = StartupTimeline(started_at=9.5, clock=clock)
+
+    assert timeline.mark("imports") == 0.5
+    clock.now = 10.25
+    timeline.mark("logging setup")
+    clock.now = 12.0
+    timeline.mark("gateway connect")
+
+    assert timeline.phases == [("imports", 0.5), ("logging setup", 0.25), ("gateway connect", 1.75)]
+    assert timeline.total == 2.5
+
+    report = timeline.format_report()
+    assert report.startswith("Startup took 2.500s:")
+    assert "gateway connect" in report and "70.0%" in report
+
+
+def test_marks_after_finishing_are_ignored():
+    clock = VirtualClock(10.0)
+    timeline = StartupTimeline(clock=clock)
+    clock.now = 11.0
+    timeline.mark("on_ready")
+
+    assert timeline.finish()
+    assert not timeline.finish()
+
+    # e.g. on_ready again after a reconnect
+    clock.now = 20.0
+    timeline.mark("on_ready")
+    assert timeline.phases == [("on_ready", 1.0)]
+    assert timeline.total == 1.0
+
+
+def test_record_metrics():
+    clock = VirtualClock(10.0)
+    timeline = StartupTimeline(clock=clock)
+    clock.now = 10.5
+    timeline.mark("imports")
+
+    metrics = MetricsRegistry()
+    timeline.record_metrics(metrics)
+    assert metrics.get("cidder_startup_phase_seconds").labels("imports").get() == 0.5
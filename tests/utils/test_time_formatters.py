@@ -1,8 +1,17 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 
 import pytest
 
-from cidderbot.utils.time_formatters import format_timedelta
+from cidderbot.utils.time_formatters import (
+    FORMATTERS,
+    TimeUnit,
+    convert_time_unit_string,
+    convert_time_unit_strings,
+    count_time_units_until,
+    format_timedelta,
+    format_timedeltas,
+    parse_time_string,
+)
 
 
 @pytest.mark.parametrize(
@@ -28,3 +37,83 @@ from cidderbot.utils.time_formatters import format_timedelta
 )
 def test_format_timedelta(input_td, input_len, expected):
     assert format_timedelta(input_td, input_len) == expected
+
+
+@pytest.mark.parametrize(
+    "input_string,expected",
+    [
+        ("1970", datetime(1970, 1, 1, tzinfo=timezone.utc)),
+        ("March 1975", datetime(1975, 3, 1, tzinfo=timezone.utc)),
+        ("01 March 1975", datetime(1975, 3, 1, tzinfo=timezone.utc)),
+        ("1 Mar 1975", datetime(1975, 3, 1, tzinfo=timezone.utc)),
+        ("01 March 1975, 12:42", datetime(1975, 3, 1, 12, 42, tzinfo=timezone.utc)),
+        ("1975-03-01T12:00", datetime(1975, 3, 1, 12, tzinfo=timezone.utc)),
+        ("the heat death of the universe", None),
+    ],
+)
+def test_parse_time_string(input_string, expected):
+    assert parse_time_string(input_string) == expected
+
+
+@pytest.mark.parametrize(
+    "start,end,unit,expected",
+    [
+        (datetime(1970, 1, 1), datetime(1970, 1, 1), TimeUnit.DAY, 0),
+        (datetime(1970, 1, 1), datetime(1970, 1, 2, 1), TimeUnit.DAY, 2),
+        (datetime(1970, 1, 31), datetime(1970, 2, 28), TimeUnit.MONTH, 1),
+        (datetime(1970, 1, 31), datetime(1970, 3, 1), TimeUnit.MONTH, 2),
+        (datetime(1970, 6, 1), datetime(1972, 6, 1), TimeUnit.YEAR, 2),
+        (datetime(1970, 6, 1), datetime(1972, 6, 2), TimeUnit.YEAR, 3),
+    ],
+)
+def test_count_time_units_until(start, end, unit, expected):
+    assert count_time_units_until(start, end, unit) == expected
+
+
+STRFTIME_FORMATS = {
+    TimeUnit.YEAR: "%Y",
+    TimeUnit.MONTH: "%B %Y",
+    TimeUnit.WEEK: "Week %W, %Y",
+    TimeUnit.DAY: "%d %B %Y",
+    TimeUnit.HOUR: "%d %B %Y, %H:00",
+    TimeUnit.MINUTE: "%d %B %Y, %H:%M",
+    TimeUnit.SECOND: "%d %B %Y, %H:%M:%S",
+}
+
+
+@pytest.mark.parametrize("unit", list(TimeUnit))
+def test_convert_time_unit_string_matches_strftime(unit):
+    dts = [datetime(1970, 1, 1) + timedelta(hours=37 * i, seconds=i) for i in range(2000)]
+    assert convert_time_unit_strings(dts, unit) == [dt.strftime(STRFTIME_FORMATS[unit]) for dt in dts]
+
+
+@pytest.mark.parametrize(
+    "locale,expected_date,expected_duration",
+    [
+        ("en", "14 March 1970, 15:09", "1 day, 2 hours and 1 minute"),
+        ("fr", "14 mars 1970, 15:09", "1 jour, 2 heures et 1 minute"),
+        ("de", "14 März 1970, 15:09", "1 Tag, 2 Stunden und 1 Minute"),
+        ("es", "14 marzo 1970, 15:09", "1 día, 2 horas y 1 minuto"),
+    ],
+)
+def test_locales(locale, expected_date, expected_duration):
+    dt = datetime(1970, 3, 14, 15, 9, 26, tzinfo=timezone.utc)
+    assert convert_time_unit_string(dt, TimeUnit.MINUTE, locale) == expected_date
+    assert format_timedelta(timedelta(days=1, hours=2, minutes=1), 3, locale) == expected_duration
+
+
+def test_unknown_locale():
+    with pytest.raises(ValueError):
+        convert_time_unit_string(datetime(1970, 1, 1), TimeUnit.DAY, "xx")
+    with pytest.raises(ValueError):
+        format_timedelta(timedelta(seconds=1), locale="xx")
+
+
+def test_plans_are_compiled_once():
+    assert FORMATTERS.get_plan(TimeUnit.DAY, "fr") is FORMATTERS.get_plan(TimeUnit.DAY, "fr")
+    assert FORMATTERS.get_duration_plan("fr") is FORMATTERS.get_duration_plan("fr")
+
+
+def test_format_timedeltas():
+    tds = [timedelta(seconds=90), timedelta(days=8, seconds=1234), timedelta(seconds=90.5), timedelta(0)]
+    assert format_timedeltas(tds, 2) == [format_timedelta(td, 2) for td in tds]